@@ -0,0 +1,192 @@
+# Alarm rules evaluated on the attoDRY telemetry.
+# getAttodryErrorStatus only reports a fault once the attoDRY has tripped. The rules below
+# look at the live values (thresholds, rates of change, rolling z-scores) to warn before that
+# happens. Every rule keeps a constant amount of state and is updated in O(1) per sample; the
+# engine only evaluates the rules of the channels present in a snapshot.
+#
+# usage:
+#	engine = AlarmEngine(defaultRules())
+#	engine.subscribe(print)
+#	engine.attach(poller)
+
+import collections
+import logging
+import math
+
+log = logging.getLogger(__name__)
+
+# <raised> is True when the rule becomes active and False when it clears again
+Alarm = collections.namedtuple('Alarm', ['time', 'rule', 'channel', 'value', 'raised', 'message'])
+
+
+class Rule:
+	"""
+	Base class: check(t, value) returns True while the rule is violated
+	"""
+
+	def __init__(self, channel, name=None, severity='warning'):
+		self.channel = channel
+		self.name = name or self.__class__.__name__+'('+channel+')'
+		self.severity = severity
+
+	def check(self, t, value):
+		raise NotImplementedError
+
+	def describe(self, value):
+		return self.name+': '+self.channel+' = '+str(value)
+
+
+class Threshold(Rule):
+
+	def __init__(self, channel, above=None, below=None, **kwargs):
+		"""
+		Active while the value is larger than <above> or smaller than <below>
+		"""
+		Rule.__init__(self, channel, **kwargs)
+		self.above = above
+		self.below = below
+
+	def check(self, t, value):
+		return (self.above is not None and value > self.above) or (self.below is not None and value < self.below)
+
+
+class RateOfChange(Rule):
+
+	def __init__(self, channel, above=None, below=None, tau=60.0, **kwargs):
+		"""
+		Active while the rate of change (units per second, exponentially averaged
+		over <tau> seconds) is larger than <above> or smaller than <below>
+		"""
+		Rule.__init__(self, channel, **kwargs)
+		self.above = above
+		self.below = below
+		self.tau = tau
+		self.rate = 0.0
+		self._last = None
+
+	def check(self, t, value):
+		last = self._last
+		self._last = (t, value)
+		if last is None or t <= last[0]:
+			return False
+		dt = t - last[0]
+		self.rate += (1.0 - math.exp(-dt/self.tau))*((value - last[1])/dt - self.rate)
+		return (self.above is not None and self.rate > self.above) or (self.below is not None and self.rate < self.below)
+
+	def describe(self, value):
+		return self.name+': '+self.channel+' changes by %.3g per second' % self.rate
+
+
+class ZScore(Rule):
+
+	def __init__(self, channel, window=120, limit=5.0, **kwargs):
+		"""
+		Active while a value deviates by more than <limit> standard deviations from
+		the mean of the previous <window> samples
+		"""
+		Rule.__init__(self, channel, **kwargs)
+		self.limit = limit
+		self.z = 0.0
+		self._window = collections.deque(maxlen=window)
+		self._sum = 0.0
+		self._sumSq = 0.0
+
+	def check(self, t, value):
+		window = self._window
+		n = len(window)
+		active = False
+		if n >= 10:
+			mean = self._sum/n
+			var = self._sumSq/n - mean*mean
+			if var > 0:
+				self.z = (value - mean)/math.sqrt(var)
+				active = abs(self.z) > self.limit
+		if n == window.maxlen:
+			old = window[0]
+			self._sum -= old
+			self._sumSq -= old*old
+		window.append(value)
+		self._sum += value
+		self._sumSq += value*value
+		return active
+
+	def describe(self, value):
+		return self.name+': '+self.channel+' = '+str(value)+' (z = %.1f)' % self.z
+
+
+def defaultRules():
+	"""
+	Early warnings for the faults reported by getAttodryErrorStatus. The limits are
+	starting points and should be adapted to the cryostat.
+	"""
+	return [
+		Threshold('getAttodryErrorStatus', above=0, name='attoDRY error', severity='critical'),
+		RateOfChange('get4KStageTemperature', above=0.5/60, name='4K stage warming up'),
+		RateOfChange('getSampleTemperature', above=5.0/60, name='sample warming up fast'),
+		ZScore('getSampleTemperature', name='sample temperature jump'),
+		RateOfChange('getTurbopumpFrequency', below=-1.0, tau=30.0, name='turbopump slowing down'),
+		RateOfChange('GetTurbopumpFrequ800', below=-1.0, tau=30.0, name='turbopump slowing down'),
+		RateOfChange('getPressure', above=1.0/60, name='pressure rising'),
+		RateOfChange('getReservoirTemperature', above=0.5/60, name='reservoir warming up'),
+		ZScore('getMagneticField', name='magnetic field jump', severity='critical'),
+	]
+
+
+class AlarmEngine:
+
+	def __init__(self, rules=()):
+		self._rules = collections.defaultdict(list)
+		self._active = set()
+		self._subscribers = []
+		for rule in rules:
+			self.add(rule)
+
+	def add(self, rule):
+		self._rules[rule.channel].append(rule)
+
+	def subscribe(self, callback):
+		"""
+		Calls <callback>(alarm) whenever a rule is raised or cleared
+		"""
+		self._subscribers.append(callback)
+
+	def attach(self, poller):
+		"""
+		Evaluates the rules on every snapshot of <poller>
+		"""
+		poller.subscribe(self.process)
+
+	def active(self):
+		"""
+		Returns the rules that are currently raised
+		"""
+		return list(self._active)
+
+	def process(self, snapshot):
+		"""
+		Evaluates the rules for the values in <snapshot> and returns the alarms that
+		were raised or cleared
+		"""
+		alarms = []
+		t = snapshot.time
+		rules = self._rules
+		for channel, value in snapshot.values.items():
+			# value != value: nan, the read failed
+			if channel not in rules or value != value:
+				continue
+			for rule in rules[channel]:
+				active = rule.check(t, value)
+				if active == (rule in self._active):
+					continue
+				if active:
+					self._active.add(rule)
+				else:
+					self._active.discard(rule)
+				alarms.append(Alarm(t, rule.name, channel, value, active, rule.describe(value)))
+		for alarm in alarms:
+			for callback in list(self._subscribers):
+				try:
+					callback(alarm)
+				except Exception:
+					log.exception('alarm subscriber %r failed', callback)
+		return alarms
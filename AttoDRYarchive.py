@@ -0,0 +1,292 @@
+# Compressed columnar archive of the telemetry.
+# Snapshots are cut into blocks of rows; every channel of a block is stored separately: the
+# values are XOR-ed with the previous value (slowly changing temperatures and pressures give
+# mostly zero bits), the bytes are shuffled so that equal bytes of all values are next to each
+# other, and the result is compressed with zlib. The times are stored as delta encoded
+# microseconds (1 us resolution). An index at the end of the file gives the time range, offset
+# and size of every block, so a single channel or time range is decoded without touching the
+# other data. Every block also starts with a small header (time range, rows, sizes of the
+# columns and a checksum), and the file is flushed after every block: an archive whose writer
+# was not closed (a crash or a power loss) has no index, and is read by scanning the block
+# headers from the start, up to the last complete block.
+#
+# usage:
+#	with ArchiveWriter('run.adarc', poller.channels) as w:
+#		poller.subscribe(w.add)
+#	a = Archive('run.adarc')
+#	times, T = a.read('getSampleTemperature', start, end)
+#	AttoDRYarchive.fromTelemetry('run.adtel', 'run.adarc')
+#
+# file format (little endian): b'ADRYARC2', size of the channel list (uint32) and the channels
+# (JSON), the blocks, the index (zlib compressed JSON: channels and for every block first time,
+# last time, rows and (offset, size) of the time column and of every channel), index offset
+# (uint64), index size (uint64), b'ADRYARC2'. A block: b'ADBK', first and last time (double),
+# rows, CRC32 of the block data, size of the time column, size of every channel column (all
+# uint32), then the time column and the channel columns. Archives of the first version
+# (b'ADRYARC1') have no channel list and block headers, and are only read with their index.
+
+import array
+import itertools
+import json
+import operator
+import struct
+import sys
+import threading
+import zlib
+
+import AttoDRYtelemetry
+
+MAGIC = b'ADRYARC2'
+MAGIC1 = b'ADRYARC1'
+BLOCK = b'ADBK'
+
+_footer = struct.Struct('<QQ8s')
+_size = struct.Struct('<I')
+# marker, first time, last time, rows, CRC32 of the data, size of the time column
+_blockHeader = struct.Struct('<4sddIII')
+
+
+def _shuffle(data, width=8):
+	# byte i of every value, for i = 0..width-1
+	return b''.join(data[i::width] for i in range(width))
+
+
+def _unshuffle(data, width=8):
+	out = bytearray(len(data))
+	n = len(data)//width
+	for i in range(width):
+		out[i::width] = data[i*n:(i+1)*n]
+	return out
+
+
+def _native(a):
+	if sys.byteorder == 'big':
+		a.byteswap()
+	return a
+
+
+def encodeValues(values, level=6):
+	"""
+	Returns the doubles <values> XOR/shuffle/zlib encoded
+	"""
+	bits = array.array('Q', array.array('d', values).tobytes())
+	xored = array.array('Q', bits[:1])
+	xored.extend(map(operator.xor, bits[1:], bits[:-1]))
+	return zlib.compress(_shuffle(_native(xored).tobytes()), level)
+
+
+def decodeValues(data):
+	"""
+	Returns the doubles encoded with encodeValues as a memoryview
+	"""
+	xored = _native(array.array('Q', _unshuffle(zlib.decompress(data))))
+	bits = array.array('Q', itertools.accumulate(xored, operator.xor))
+	return memoryview(bits).cast('B').cast('d')
+
+
+def encodeTimes(times, level=6):
+	"""
+	Returns the unix times <times> as delta encoded microseconds, shuffled and
+	compressed
+	"""
+	us = [round(t*1e6) for t in times]
+	deltas = array.array('q', us[:1])
+	deltas.extend(map(operator.sub, us[1:], us[:-1]))
+	return zlib.compress(_shuffle(_native(deltas).tobytes()), level)
+
+
+def decodeTimes(data):
+	deltas = _native(array.array('q', _unshuffle(zlib.decompress(data))))
+	return array.array('d', (us/1e6 for us in itertools.accumulate(deltas)))
+
+
+class ArchiveWriter:
+
+	def __init__(self, path, channels, blockRows=4096, level=6):
+		"""
+		Writes snapshots of <channels> to the archive at <path> in blocks of
+		<blockRows> rows; <level> is the zlib compression level
+		"""
+		self.path = path
+		self.channels = tuple(channels)
+		self.blockRows = blockRows
+		self.level = level
+		self.rows = 0
+		self._times = []
+		self._columns = [[] for name in self.channels]
+		self._blocks = []
+		self._lock = threading.Lock()
+		self._file = None
+
+	def __enter__(self):
+		self.open()
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def open(self):
+		self._file = open(self.path, 'wb')
+		channels = json.dumps({'channels': self.channels}).encode('utf-8')
+		self._file.write(MAGIC + _size.pack(len(channels)) + channels)
+		self._file.flush()
+
+	def add(self, snapshot):
+		"""
+		Appends <snapshot> (can be used as a Poller subscriber)
+		"""
+		values = snapshot.values
+		with self._lock:
+			self._times.append(snapshot.time)
+			for name, column in zip(self.channels, self._columns):
+				column.append(AttoDRYtelemetry.toFloat(values.get(name)))
+			self.rows += 1
+			if len(self._times) >= self.blockRows:
+				self._writeBlock()
+
+	def _writeBlock(self):
+		times = self._times
+		columns = [encodeTimes(times, self.level)] + [encodeValues(column, self.level) for column in self._columns]
+		sizes = [len(data) for data in columns]
+		data = b''.join(columns)
+		header = _blockHeader.pack(BLOCK, times[0], times[-1], len(times), zlib.crc32(data), sizes[0])
+		header += struct.pack('<%dI' % len(self.channels), *sizes[1:])
+		self._file.write(header)
+		self._blocks.append(_block(times[0], times[-1], len(times), self._file.tell(), sizes))
+		self._file.write(data)
+		# the block is complete on disk, even if the writer is never closed
+		self._file.flush()
+		self._times = []
+		self._columns = [[] for name in self.channels]
+
+	def close(self):
+		with self._lock:
+			if self._file is None:
+				return
+			if self._times:
+				self._writeBlock()
+			index = zlib.compress(json.dumps({'channels': self.channels, 'blocks': self._blocks}).encode('utf-8'))
+			offset = self._file.tell()
+			self._file.write(index)
+			self._file.write(_footer.pack(offset, len(index), MAGIC))
+			self._file.close()
+			self._file = None
+
+
+class Archive:
+
+	def __init__(self, path):
+		"""
+		Opens the archive at <path> and reads its index. Without an index (the
+		writer was not closed) the complete blocks are found from their headers,
+		and recovered is True.
+		"""
+		self.path = path
+		self.recovered = False
+		with open(path, 'rb') as f:
+			version = f.read(len(MAGIC))
+			if version not in (MAGIC, MAGIC1):
+				raise Exception('Error: '+str(path)+' is not an attoDRY archive')
+			end = f.seek(0, 2)
+			magic = None
+			if end >= len(MAGIC) + _footer.size:
+				f.seek(-_footer.size, 2)
+				offset, size, magic = _footer.unpack(f.read(_footer.size))
+			if magic == version:
+				f.seek(offset)
+				index = json.loads(zlib.decompress(f.read(size)))
+			elif version == MAGIC:
+				index = self._scan(f)
+				self.recovered = True
+			else:
+				raise Exception('Error: '+str(path)+' is incomplete (the writer was not closed)')
+		self.channels = tuple(index['channels'])
+		self.blocks = index['blocks']
+		self.rows = sum(block['rows'] for block in self.blocks)
+		self._column = dict((name, i) for i, name in enumerate(self.channels))
+
+	def _scan(self, f):
+		# rebuilds the index from the block headers, up to the first incomplete block
+		f.seek(len(MAGIC))
+		head = f.read(_size.size)
+		header = f.read(_size.unpack(head)[0]) if len(head) == _size.size else b''
+		try:
+			channels = json.loads(header)['channels']
+		except ValueError:
+			raise Exception('Error: '+str(self.path)+' is incomplete (the writer was not closed) and has no channel list')
+		columnSizes = struct.Struct('<%dI' % len(channels))
+		blocks = []
+		while True:
+			head = f.read(_blockHeader.size)
+			if len(head) < _blockHeader.size or head[:len(BLOCK)] != BLOCK:
+				break
+			marker, first, last, rows, crc, timeSize = _blockHeader.unpack(head)
+			head = f.read(columnSizes.size)
+			if len(head) < columnSizes.size:
+				break
+			sizes = [timeSize] + list(columnSizes.unpack(head))
+			offset = f.tell()
+			data = f.read(sum(sizes))
+			if len(data) < sum(sizes) or zlib.crc32(data) != crc:
+				break
+			blocks.append(_block(first, last, rows, offset, sizes))
+		return {'channels': channels, 'blocks': blocks}
+
+	def _read(self, f, location):
+		offset, size = location
+		f.seek(offset)
+		return f.read(size)
+
+	def _selected(self, start, end):
+		return [block for block in self.blocks if (start is None or block['last'] >= start) and (end is None or block['first'] <= end)]
+
+	def chunks(self, name, start=None, end=None):
+		"""
+		Yields (times, values) of the channel <name> for every block that
+		overlaps <start>..<end>; values is a memoryview of doubles over the
+		decoded block (no further copy)
+		"""
+		column = self._column[name]
+		with open(self.path, 'rb') as f:
+			for block in self._selected(start, end):
+				yield decodeTimes(self._read(f, block['time'])), decodeValues(self._read(f, block['columns'][column]))
+
+	def read(self, name, start=None, end=None):
+		"""
+		Returns the times and values (array.array of doubles) of the channel
+		<name> between the unix times <start> and <end>
+		"""
+		times = array.array('d')
+		values = array.array('d')
+		for t, v in self.chunks(name, start, end):
+			if (start is None or t[0] >= start) and (end is None or t[-1] <= end):
+				times.extend(t)
+				values.frombytes(v.cast('B'))
+				continue
+			for ti, vi in zip(t, v):
+				if (start is None or ti >= start) and (end is None or ti <= end):
+					times.append(ti)
+					values.append(vi)
+		return times, values
+
+
+def _block(first, last, rows, offset, sizes):
+	# index entry of a block whose columns of <sizes> follow each other from <offset>
+	locations = []
+	for size in sizes:
+		locations.append([offset, size])
+		offset += size
+	return {'first': first, 'last': last, 'rows': rows, 'time': locations[0], 'columns': locations[1:]}
+
+
+def fromTelemetry(source, destination, **kwargs):
+	"""
+	Converts the AttoDRYtelemetry file <source> into the archive <destination>
+	and returns the number of rows
+	"""
+	with open(source, 'rb') as f:
+		channels = AttoDRYtelemetry.header(f).channels
+	with ArchiveWriter(destination, channels, **kwargs) as w:
+		for snapshot in AttoDRYtelemetry.iterate(source):
+			w.add(snapshot)
+	return w.rows
@@ -0,0 +1,128 @@
+# Registry of the readable values (channels) of the attoDRY.
+# Every channel is described once, on one line: the PyAttoDRY getter, its kind (float, int or
+# bool), unit, the typical rate of change (unit per second, None for flags and codes that change
+# in steps) and its Prometheus metric name and description (channels of different models that
+# measure the same quantity share the metric name, which is unique per model). The exported DLL
+# symbol and the models that have the channel come from its alias in AttoDRYlib.functions, the
+# ctypes type it reads from AttoDRYlib.signature. PyAttoDRY.channels, the metrics exporter, the
+# export schema and the gateway are built from it, so a new channel needs its alias and a line
+# here; AttoDRY gets a getter for every channel it has no method for. dtype() compiles the
+# channels into a numpy record layout; with native=False it is the record layout of the
+# AttoDRYtelemetry files, which AttoDRYtelemetry.array() maps without copying. numpy is only
+# imported by dtype() and records().
+#
+# usage:
+#	AttoDRYchannels.get('getSampleTemperature').unit	# 'K'
+#	AttoDRYchannels.names(AttoDRYlib.ATTODRY800)
+#	AttoDRYchannels.dtype(poller.channels)			# numpy.dtype([('time', '<f8'), ('getSampleTemperature', '<f4'), ...])
+
+import collections
+
+import AttoDRYlib as ADRY
+
+Channel = collections.namedtuple('Channel', ['name', 'symbol', 'ctype', 'kind', 'unit', 'models', 'rate', 'metric', 'description'])
+
+
+def _channel(name, kind, unit, rate, metric, description):
+	symbol, models = ADRY.functions[name]
+	# the getters read the value through a pointer to it
+	ctype = ADRY.signature(name)[0]._type_
+	return Channel(name, symbol, ctype, kind, unit, models, rate, metric, description)
+
+
+# in the order of the snapshots: the channels of all models first
+registry = (
+	_channel('getAttodryErrorStatus', 'int', '', None, 'attodry_error_status', 'Current attoDRY error code (0: no error)'),
+	_channel('getSampleTemperature', 'float', 'K', 0.1, 'attodry_sample_temperature_kelvin', 'Sample temperature'),
+	_channel('getUserTemperature', 'float', 'K', None, 'attodry_user_temperature_kelvin', 'User set point temperature'),
+	_channel('getVtiTemperature', 'float', 'K', 0.1, 'attodry_vti_temperature_kelvin', 'VTI temperature'),
+	_channel('get4KStageTemperature', 'float', 'K', 0.01, 'attodry_4k_stage_temperature_kelvin', '4K stage temperature'),
+	_channel('get40KStageTemperature', 'float', 'K', 0.05, 'attodry_40k_stage_temperature_kelvin', '40K stage temperature'),
+	_channel('getMagneticField', 'float', 'T', 0.01, 'attodry_magnetic_field_tesla', 'Magnetic field'),
+	_channel('getMagneticFieldSetPoint', 'float', 'T', None, 'attodry_magnetic_field_setpoint_tesla', 'Magnetic field set point'),
+	_channel('getSampleHeaterPower', 'float', 'W', 0.01, 'attodry_sample_heater_power_watts', 'Sample heater power'),
+	_channel('getVtiHeaterPower', 'float', 'W', 0.01, 'attodry_vti_heater_power_watts', 'VTI heater power'),
+	_channel('isControllingField', 'bool', '', None, 'attodry_controlling_field', 'Magnetic field control is active'),
+	_channel('isControllingTemperature', 'bool', '', None, 'attodry_controlling_temperature', 'Temperature control is active'),
+	_channel('isPersistentModeSet', 'bool', '', None, 'attodry_persistent_mode', 'Persistent mode is set for the magnet'),
+	_channel('isZeroingField', 'bool', '', None, 'attodry_zeroing_field', 'The field is being swept to zero'),
+	_channel('isGoingToBaseTemperature', 'bool', '', None, 'attodry_going_to_base_temperature', 'The base temperature process is active'),
+	_channel('isPumping', 'bool', '', None, 'attodry_pumping', 'The pump is running'),
+	_channel('isSampleHeaterOn', 'bool', '', None, 'attodry_sample_heater_on', 'The sample heater is on'),
+	_channel('isExchangeHeaterOn', 'bool', '', None, 'attodry_exchange_heater_on', 'The exchange/VTI heater is on'),
+	_channel('isSampleExchangeInProgress', 'bool', '', None, 'attodry_sample_exchange_in_progress', 'The sample exchange process is active'),
+	_channel('isSampleReadyToExchange', 'bool', '', None, 'attodry_sample_ready_to_exchange', 'The sample stick can be removed or inserted'),
+	_channel('isSystemRunning', 'bool', '', None, 'attodry_system_running', 'The system is running'),
+	# attoDRY1100 and attoDRY2100
+	_channel('getPressure', 'float', 'mbar', 1.0, 'attodry_pressure_mbar', 'Pressure in the valve junction block'),
+	_channel('getTurbopumpFrequency', 'float', 'Hz', 10.0, 'attodry_turbopump_frequency_hertz', 'Turbopump frequency'),
+	# attoDRY2100
+	_channel('getCryostatInPressure', 'float', 'mbar', 10.0, 'attodry_cryostat_in_pressure_mbar', 'Pressure at the cryostat inlet'),
+	_channel('getCryostatOutPressure', 'float', 'mbar', 10.0, 'attodry_cryostat_out_pressure_mbar', 'Pressure at the cryostat outlet'),
+	_channel('getDumpPressure', 'float', 'mbar', 1.0, 'attodry_dump_pressure_mbar', 'Pressure at the helium dump'),
+	_channel('getCryostatInValve', 'bool', '', None, 'attodry_cryostat_in_valve_open', 'Cryostat in valve is open'),
+	_channel('getCryostatOutValve', 'bool', '', None, 'attodry_cryostat_out_valve_open', 'Cryostat out valve is open'),
+	_channel('getDumpInValve', 'bool', '', None, 'attodry_dump_in_valve_open', 'Dump in valve is open'),
+	_channel('getDumpOutValve', 'bool', '', None, 'attodry_dump_out_valve_open', 'Dump out valve is open'),
+	_channel('getReservoirTemperature', 'float', 'K', 0.05, 'attodry_reservoir_temperature_kelvin', 'Helium reservoir temperature'),
+	_channel('getReservoirHeaterPower', 'float', 'W', 0.01, 'attodry_reservoir_heater_power_watts', 'Helium reservoir heater power'),
+	# attoDRY1100
+	_channel('getHeliumValve', 'bool', '', None, 'attodry_helium_valve_open', 'Helium valve is open'),
+	_channel('getInnerVolumeValve', 'bool', '', None, 'attodry_inner_volume_valve_open', 'Inner volume valve is open'),
+	_channel('getOuterVolumeValve', 'bool', '', None, 'attodry_outer_volume_valve_open', 'Outer volume valve is open'),
+	_channel('getPumpValve', 'bool', '', None, 'attodry_pump_valve_open', 'Pump valve is open'),
+	# attoDRY800
+	_channel('getPressure800', 'float', 'mbar', 1.0, 'attodry_pressure_mbar', 'Pressure measured by the attoDRY800 vacuum gauge'),
+	_channel('GetTurbopumpFrequ800', 'float', 'Hz', 10.0, 'attodry_turbopump_frequency_hertz', 'Turbopump frequency'),
+	_channel('getBreakVac800Valve', 'bool', '', None, 'attodry_break_vacuum_valve_open', 'Break vacuum valve is open'),
+	_channel('getPump800Valve', 'bool', '', None, 'attodry_pump_valve_open', 'Pump valve is open'),
+	_channel('getSampleSpace800Valve', 'bool', '', None, 'attodry_sample_space_valve_open', 'Sample space valve is open'),
+)
+
+byName = dict((c.name, c) for c in registry)
+
+
+def get(name):
+	"""
+	Returns the Channel <name>, None if it is not in the registry
+	"""
+	return byName.get(name)
+
+
+def names(model=None):
+	"""
+	Returns the names of the channels of <model> (a setup version; None: all)
+	"""
+	return tuple(c.name for c in registry if model is None or model in c.models)
+
+
+def dtype(channels=None, native=True):
+	"""
+	Returns the numpy dtype of a record of <channels> (default: all): the time
+	(float64, unix time) and a field per channel. With <native> the fields have
+	the width of the ctypes type the DLL returns (float32, int32), otherwise
+	they are float64 like in the telemetry files. Channels that are not in the
+	registry are float64.
+	"""
+	import numpy
+	fields = [('time', '<f8')]
+	for name in (names() if channels is None else channels):
+		channel = byName.get(name)
+		if native and channel is not None:
+			fields.append((name, numpy.dtype(channel.ctype).newbyteorder('<')))
+		else:
+			fields.append((name, '<f8'))
+	return numpy.dtype(fields)
+
+
+def records(snapshots, channels=None):
+	"""
+	Returns <snapshots> as a numpy record array of dtype(<channels>, native=False)
+	(failed reads stay nan)
+	"""
+	import numpy
+	from AttoDRYtelemetry import toFloat
+	layout = dtype(channels, native=False)
+	fields = layout.names[1:]
+	rows = [(s.time,) + tuple(toFloat(s.values.get(name)) for name in fields) for s in snapshots]
+	return numpy.array(rows, dtype=layout)
@@ -0,0 +1,127 @@
+# Clock used by the simulator, the session, the poller and all waits.
+# By default this is the real time. With setClock(VirtualClock(speed)) everything built on top
+# of these functions runs <speed> times faster, together with the simulated cryostat, so e.g. a
+# full cooldown-measure-warmup cycle against AttoDRYsim takes seconds instead of hours.
+#
+# usage:
+#	AttoDRYclock.setClock(AttoDRYclock.VirtualClock(speed=1000))
+#	AttoDRYsim.install()
+
+import time as _time
+
+
+class RealClock:
+
+	speed = 1.0
+
+	def now(self):
+		return _time.time()
+
+	def monotonic(self):
+		# perf_counter: time.monotonic() only has a resolution of about 16 ms on Windows
+		return _time.perf_counter()
+
+	def sleep(self, seconds):
+		_time.sleep(seconds)
+
+	def wait(self, event, timeout=None):
+		return event.wait(timeout)
+
+
+class VirtualClock:
+
+	def __init__(self, speed=1000.0, start=None):
+		"""
+		A clock that runs <speed> times faster than the real time, starting at
+		the unix time <start> (default: now)
+		"""
+		self.speed = float(speed)
+		self._real0 = _time.perf_counter()
+		self._epoch = _time.time() if start is None else start
+
+	def now(self):
+		return self._epoch + self.monotonic()
+
+	def monotonic(self):
+		return (_time.perf_counter() - self._real0)*self.speed
+
+	def sleep(self, seconds):
+		if seconds > 0:
+			_time.sleep(seconds/self.speed)
+
+	def wait(self, event, timeout=None):
+		return event.wait(None if timeout is None else max(timeout, 0)/self.speed)
+
+
+clock = RealClock()
+
+
+def setClock(c):
+	"""
+	Makes all modules use the clock <c> (None: real time)
+	"""
+	global clock
+	clock = RealClock() if c is None else c
+
+
+def now():
+	"""
+	Unix time in seconds
+	"""
+	return clock.now()
+
+
+def monotonic():
+	return clock.monotonic()
+
+
+def sleep(seconds):
+	clock.sleep(seconds)
+
+
+def wait(event, timeout=None):
+	"""
+	Waits for the threading.Event <event> at most <timeout> (clock) seconds
+	"""
+	return clock.wait(event, timeout)
+
+
+def waitUntil(predicate, timeout, interval=1.0, stop=None):
+	"""
+	Calls <predicate>() every <interval> seconds until it returns a true value,
+	which is returned. Raises an Exception after <timeout> seconds, returns None
+	if the threading.Event <stop> is set.
+	"""
+	deadline = monotonic() + timeout
+	while True:
+		result = predicate()
+		if result:
+			return result
+		remaining = deadline - monotonic()
+		if remaining <= 0:
+			raise Exception('Error: timeout after '+str(timeout)+' s')
+		if stop is None:
+			sleep(min(interval, remaining))
+		elif wait(stop, min(interval, remaining)):
+			return None
+
+
+def waitStable(read, target, tolerance, duration, timeout, interval=1.0, stop=None):
+	"""
+	Waits until the value returned by <read>() stays within <tolerance> of
+	<target> for <duration> seconds and returns the last value. Raises an
+	Exception after <timeout> seconds, returns None if <stop> is set.
+	"""
+	state = {'since': None, 'value': None}
+
+	def stable():
+		value = state['value'] = read()
+		if abs(value - target) > tolerance:
+			state['since'] = None
+			return False
+		if state['since'] is None:
+			state['since'] = monotonic()
+		return monotonic() - state['since'] >= duration
+	if waitUntil(stable, timeout, interval, stop) is None:
+		return None
+	return state['value']
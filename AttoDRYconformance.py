@@ -0,0 +1,172 @@
+# Conformance check of the PyAttoDRY wrappers against the DLL exports.
+# Every AttoDRY method is called on every model against a RecordingBackend, which only records
+# the exported symbol and the arguments of each call. A wrapper conforms if it makes exactly one
+# DLL call, to the symbol of its alias in AttoDRYlib.functions, with the argument types of
+# AttoDRYlib.signature, and if the methods that are not available on a model fail before
+# reaching the DLL. This catches wrappers that call the wrong export, pass a python float where
+# the DLL expects a c_float, or read channels that have no alias, and AttoDRYchannels entries that
+# are not getters or whose kind does not fit the type they read. No DLL or device is needed.
+#
+# usage:
+#	python AttoDRYconformance.py			# prints the matrix, exit code 1 if a wrapper fails
+#	failures = check(AttoDRYlib.ATTODRY800)		# [(method, message)]
+
+import ctypes
+import inspect
+import sys
+
+import AttoDRYchannels
+import AttoDRYlib as ADRY
+from PyAttoDRY import AttoDRY
+
+# methods that do not wrap a DLL function
+skipped = ('channels',)
+
+# arguments used for the calls that need some
+callArguments = {'COMPort': 'COM1', 'savepath': 'curve.crv', 'loadpath': 'curve.crv'}
+
+
+class RecordingBackend:
+	"""
+	Backend for AttoDRYlib.useBackend that records (symbol, arguments) of every
+	call and returns 0 (no error) without touching the output arguments
+	"""
+
+	def __init__(self):
+		self.calls = []
+
+	def __getattr__(self, export):
+		def func(*args):
+			self.calls.append((export, args))
+			return 0
+		func.__name__ = export
+		self.__dict__[export] = func
+		return func
+
+
+def matches(expected, arg):
+	"""
+	Returns True if <arg> is passed to the DLL as the type <expected>; python
+	ints and bytes are accepted where ctypes converts them without argtypes
+	"""
+	obj = getattr(arg, '_obj', None)		# the object of ctypes.byref()
+	if isinstance(expected, type) and issubclass(expected, ctypes._Pointer):
+		return type(arg) is expected or type(obj) is expected._type_
+	if expected is ctypes.c_char_p:
+		# a string, or a buffer the DLL writes a string to
+		return type(arg) in (bytes, ctypes.c_char_p) or (isinstance(obj, ctypes.Array) and obj._type_ is ctypes.c_char)
+	if expected is ctypes.c_void_p:
+		return arg is None or type(arg) in (int, ctypes.c_void_p)
+	if expected in (ctypes.c_int, ctypes.c_uint16):
+		return type(arg) in (int, expected)
+	return type(arg) is expected
+
+
+def describe(arg):
+	obj = getattr(arg, '_obj', None)
+	return 'byref('+type(obj).__name__+')' if obj is not None else type(arg).__name__
+
+
+def arguments(func):
+	args = []
+	for parameter in inspect.signature(func).parameters.values():
+		if parameter.default is not inspect.Parameter.empty:
+			break
+		args.append(callArguments.get(parameter.name, 1))
+	return args
+
+
+def conforms(name, calls):
+	"""
+	Returns None if <calls> are what the alias <name> should do, otherwise
+	the reason why not
+	"""
+	if len(calls) != 1:
+		return 'made %d DLL calls instead of 1: %s' % (len(calls), ', '.join(call[0] for call in calls))
+	export, args = calls[0]
+	if export != ADRY.functions[name][0]:
+		return 'calls '+export+' instead of '+ADRY.functions[name][0]
+	expected = ADRY.signature(name)
+	if len(args) != len(expected) or not all(matches(e, a) for e, a in zip(expected, args)):
+		return 'passes (%s) instead of (%s)' % (', '.join(describe(a) for a in args), ', '.join(e.__name__ for e in expected))
+	return None
+
+
+def check(setup_version):
+	"""
+	Checks all AttoDRY methods on <setup_version>; returns [(method, message)]
+	of the ones that do not conform, and sets check.results to method ->
+	'ok', 'n/a' (correctly refused on this model) or 'FAIL'
+	"""
+	previous = (ADRY.attoDRYLib, ADRY.model, AttoDRY.running)
+	backend = RecordingBackend()
+	failures = []
+	results = {}
+	try:
+		ADRY.useBackend(backend)
+		AttoDRY.running = None
+		dev = AttoDRY(setup_version)
+		dev.begin()
+		problem = conforms('begin', backend.calls)
+		results['begin'] = 'ok' if problem is None else 'FAIL'
+		if problem is not None:
+			failures.append(('begin', problem))
+		for name, func in inspect.getmembers(AttoDRY, inspect.isfunction):
+			if name.startswith('_') or name in skipped or name == 'begin':
+				continue
+			func = getattr(dev, name)
+			backend.calls = []
+			if name not in ADRY.functions:
+				failures.append((name, 'has no alias in AttoDRYlib.functions'))
+				results[name] = 'FAIL'
+				continue
+			try:
+				func(*arguments(func))
+				error = None
+			except Exception as e:
+				error = e
+			if not ADRY.available(name):
+				if backend.calls or not isinstance(error, AttributeError):
+					failures.append((name, 'is not available on the '+ADRY.models[setup_version]+', but was not refused'))
+					results[name] = 'FAIL'
+				else:
+					results[name] = 'n/a'
+				continue
+			problem = 'raised '+repr(error) if error is not None else conforms(name, backend.calls)
+			results[name] = 'ok' if problem is None else 'FAIL'
+			if problem is not None:
+				failures.append((name, problem))
+		# symbol, models and type of the channels are taken from AttoDRYlib
+		for channel in AttoDRYchannels.registry:
+			name = channel.name
+			if not hasattr(AttoDRY, name):
+				failures.append((name, 'is a channel without method'))
+			elif len(ADRY.signature(name)) != 1:
+				failures.append((name, 'is a channel, but not a getter'))
+			elif (channel.kind == 'float') != (channel.ctype in (ctypes.c_float, ctypes.c_double)):
+				failures.append((name, 'is a '+channel.kind+' channel, but reads a '+channel.ctype.__name__))
+	finally:
+		ADRY.useBackend(previous[0])
+		ADRY.model = previous[1]
+		AttoDRY.running = previous[2]
+	check.results = results
+	return failures
+
+
+if __name__ == '__main__':
+	matrix = {}
+	failures = []
+	for setup_version, model in sorted(ADRY.models.items()):
+		failures.extend((model, name, message) for name, message in check(setup_version))
+		for name, result in check.results.items():
+			matrix.setdefault(name, {})[model] = result
+	models = [ADRY.models[v] for v in sorted(ADRY.models)]
+	width = max(len(name) for name in matrix)
+	print(' '*width + ''.join('%13s' % model for model in models))
+	for name in sorted(matrix):
+		print(name.ljust(width) + ''.join('%13s' % matrix[name].get(model, '') for model in models))
+	print()
+	for model, name, message in failures:
+		print('%s on the %s: %s' % (name, model, message))
+	print('%d wrappers, %d failures' % (len(matrix), len(failures)))
+	sys.exit(1 if failures else 0)
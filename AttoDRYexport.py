@@ -0,0 +1,240 @@
+# Export of the telemetry to Parquet or HDF5.
+# The column types and units of the channels come from the registry in AttoDRYchannels (c_float ->
+# float64, c_int -> int32, bool). Other getters are described from their signature
+# (AttoDRYlib.signature), is*/..Valve getters are booleans, and the unit comes from the docstring
+# ("in Kelvin", "in mbar", ...) or, where the docstring does not give it, from the name.
+# Snapshots are buffered and written in row groups, so exports of any length run in constant
+# memory. The files carry the cryostat model and the unit of every column as metadata: the model
+# selected with begin(setup_version) for live exports, the model stored in the telemetry file for
+# exportTelemetry. pyarrow (Parquet) and h5py (HDF5) are only imported when used.
+#
+# usage:
+#	with ParquetExporter('run.parquet', poller.channels) as e:
+#		poller.subscribe(e.add)
+#	AttoDRYexport.exportTelemetry('run.adtel', 'run.h5')
+
+import collections
+import ctypes
+import inspect
+import json
+import math
+import re
+import threading
+
+import AttoDRYchannels
+import AttoDRYlib as ADRY
+import AttoDRYtelemetry
+import PyAttoDRY
+from PyAttoDRY import AttoDRY
+
+Column = collections.namedtuple('Column', ['name', 'type', 'unit', 'ctype'])
+
+# unit names used in the docstrings
+docUnits = {'kelvin': 'K', 'tesla': 'T', 'watts': 'W', 'watt': 'W', 'mbar': 'mbar', 'hz': 'Hz'}
+
+# fallback: unit by part of the getter name, first match wins
+nameUnits = (
+	('Temperature', 'K'),
+	('MagneticField', 'T'),
+	('Pressure', 'mbar'),
+	('Power', 'W'),
+	('Frequ', 'Hz'),
+)
+
+
+def column(name, dev=AttoDRY):
+	"""
+	Returns the Column of the getter <name>
+	"""
+	channel = AttoDRYchannels.get(name)
+	if channel is not None:
+		return Column(name, channel.kind, channel.unit, channel.ctype)
+	func = getattr(dev, name)
+	# the getters read the value through a pointer to it
+	argument = ADRY.signature(name)
+	ctype = argument[0]._type_ if len(argument) == 1 and issubclass(argument[0], ctypes._Pointer) else ctypes.c_float
+	if name.startswith('is') or name.endswith('Valve'):
+		return Column(name, 'bool', '', ctype)
+	kind = 'float' if ctype in (ctypes.c_float, ctypes.c_double) else 'int'
+	unit = ''
+	match = re.search(r'\bin (kelvin|tesla|watts?|mbar|hz)\b', inspect.getdoc(func) or '', re.IGNORECASE)
+	if match:
+		unit = docUnits[match.group(1).lower()]
+	elif kind == 'float':
+		unit = next((u for part, u in nameUnits if part in name), '')
+	return Column(name, kind, unit, ctype)
+
+
+def schema(channels=None, dev=None):
+	"""
+	Returns the Columns of <channels> (default: the channels of <dev>, or of the
+	running AttoDRY)
+	"""
+	if channels is None:
+		channels = PyAttoDRY.device(dev).channels()
+	return [column(name, dev or AttoDRY) for name in channels]
+
+
+def metadata(setup_version):
+	"""
+	Returns the metadata stored with an export of a recording of the model
+	<setup_version> (None: unknown)
+	"""
+	return {'model': ADRY.models.get(setup_version), 'setup_version': setup_version}
+
+
+def _convert(value, kind):
+	# nan (read failed) -> None, booleans and codes to python bool/int
+	value = AttoDRYtelemetry.toFloat(value)
+	if math.isnan(value):
+		return None
+	if kind == 'bool':
+		return value != 0
+	if kind == 'int':
+		return int(value)
+	return value
+
+
+class Exporter:
+	"""
+	Buffers snapshots and writes them in row groups of <rowGroup> rows; the
+	writing is done by the subclasses. <meta> is the metadata of the recording
+	(default: that of the model selected with begin()).
+	"""
+
+	def __init__(self, path, channels=None, rowGroup=65536, extra=None, dev=None, meta=None):
+		self.path = path
+		self.columns = schema(channels, dev)
+		self.rowGroup = rowGroup
+		self.metadata = dict(meta) if meta is not None else metadata(ADRY.model)
+		self.metadata['units'] = dict((c.name, c.unit) for c in self.columns if c.unit)
+		self.metadata.update(extra or {})
+		self.rows = 0
+		self._times = []
+		self._values = [[] for c in self.columns]
+		self._lock = threading.Lock()
+
+	def __enter__(self):
+		self.open()
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def add(self, snapshot):
+		"""
+		Appends <snapshot> (can be used as a Poller subscriber)
+		"""
+		values = snapshot.values
+		with self._lock:
+			self._times.append(snapshot.time)
+			for c, column in zip(self.columns, self._values):
+				column.append(_convert(values.get(c.name), c.type))
+			if len(self._times) >= self.rowGroup:
+				self._flush()
+
+	def _flush(self):
+		if self._times:
+			self.write(self._times, self._values)
+			self.rows += len(self._times)
+			self._times = []
+			self._values = [[] for c in self.columns]
+
+	def close(self):
+		with self._lock:
+			self._flush()
+			self.finish()
+
+	def open(self):
+		raise NotImplementedError
+
+	def write(self, times, values):
+		raise NotImplementedError
+
+	def finish(self):
+		raise NotImplementedError
+
+
+class ParquetExporter(Exporter):
+
+	def open(self):
+		import pyarrow
+		import pyarrow.parquet
+		self._pa = pyarrow
+		types = {'float': pyarrow.float64(), 'int': pyarrow.int32(), 'bool': pyarrow.bool_()}
+		fields = [pyarrow.field('time', pyarrow.timestamp('us', tz='UTC'), nullable=False)]
+		for c in self.columns:
+			fields.append(pyarrow.field(c.name, types[c.type], metadata={'unit': c.unit} if c.unit else None))
+		self._schema = pyarrow.schema(fields, metadata={'attodry': json.dumps(self.metadata)})
+		self._writer = pyarrow.parquet.ParquetWriter(self.path, self._schema, compression='zstd')
+
+	def write(self, times, values):
+		pa = self._pa
+		arrays = [pa.array([round(t*1e6) for t in times], type=self._schema.field('time').type)]
+		for i, column in enumerate(values):
+			arrays.append(pa.array(column, type=self._schema.field(i + 1).type))
+		self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+
+	def finish(self):
+		self._writer.close()
+
+
+class HDF5Exporter(Exporter):
+	"""
+	One resizable dataset per channel (and 'time', unix time in seconds).
+	Missing values are nan for floats and -1 for booleans and codes.
+	"""
+
+	dtypes = {'float': 'f8', 'int': 'i4', 'bool': 'i1'}
+
+	def open(self):
+		import h5py
+		self._file = h5py.File(self.path, 'w')
+		for key, value in self.metadata.items():
+			self._file.attrs[key] = json.dumps(value) if isinstance(value, dict) else ('' if value is None else value)
+		self._datasets = [self._file.create_dataset('time', (0,), dtype='f8', maxshape=(None,), chunks=(self.rowGroup,), compression='gzip')]
+		for c in self.columns:
+			d = self._file.create_dataset(c.name, (0,), dtype=self.dtypes[c.type], maxshape=(None,), chunks=(self.rowGroup,), compression='gzip', shuffle=True)
+			d.attrs['unit'] = c.unit
+			d.attrs['type'] = c.type
+			self._datasets.append(d)
+
+	def write(self, times, values):
+		n = len(times)
+		columns = [times]
+		for c, column in zip(self.columns, values):
+			missing = math.nan if c.type == 'float' else -1
+			columns.append([missing if v is None else v for v in column])
+		for d, column in zip(self._datasets, columns):
+			d.resize((self.rows + n,))
+			d[self.rows:] = column
+
+	def finish(self):
+		self._file.close()
+
+
+def exporter(path, channels=None, **kwargs):
+	"""
+	Returns the Exporter for the file extension of <path> (.parquet, .h5 or
+	.hdf5)
+	"""
+	if path.endswith('.parquet'):
+		return ParquetExporter(path, channels, **kwargs)
+	if path.endswith('.h5') or path.endswith('.hdf5'):
+		return HDF5Exporter(path, channels, **kwargs)
+	raise Exception('Error: unknown export format of '+str(path)+' (use .parquet, .h5 or .hdf5)')
+
+
+def exportTelemetry(source, destination, **kwargs):
+	"""
+	Exports the AttoDRYtelemetry file <source> to <destination> (Parquet or
+	HDF5, by the extension) and returns the number of rows. The metadata is
+	that of the recording, not of the running AttoDRY.
+	"""
+	with open(source, 'rb') as f:
+		header = AttoDRYtelemetry.header(f)
+	kwargs.setdefault('meta', metadata(header.setup_version))
+	with exporter(destination, header.channels, **kwargs) as e:
+		for snapshot in AttoDRYtelemetry.iterate(source):
+			e.add(snapshot)
+	return e.rows
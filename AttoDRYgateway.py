@@ -0,0 +1,378 @@
+# Network gateway for the attoDRY.
+# One Poller reads the device; the gateway encodes every snapshot once and fans it out to any
+# number of WebSocket clients, so additional viewers cost no DLL calls. Each client chooses its
+# channels and the minimum time between two messages (downsampling); a slow client only ever
+# gets the newest snapshot and never holds up the others. Set points are accepted over REST with
+# a bearer token and are sent through the Session, i.e. the one serialised command path.
+#
+# usage:
+#	with Session(setup_version=1) as s:
+#		poller = Poller(interval=1.0, gate=s.ready)
+#		Gateway(s, poller, port=8765, token='secret').start()
+#		poller.start()
+#
+# endpoints:
+#	GET  /snapshot											last snapshot as JSON
+#	GET  /channels											unit, kind and typical rate of the channels (AttoDRYchannels)
+#	GET  /stream?interval=5&channels=getSampleTemperature	WebSocket, one JSON snapshot per message
+#	POST /setpoint/temperature, /setpoint/field				body {"value": 1.9}, header Authorization: Bearer <token>
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import math
+import socket
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import AttoDRYchannels
+
+log = logging.getLogger(__name__)
+
+# quantity -> (AttoDRY method that sets it, minimum, maximum); adapt the field to the magnet
+setpoints = {
+	'temperature': ('setUserTemperature', 1.5, 320.0),
+	'field': ('setUserMagneticField', -9.0, 9.0),
+}
+
+GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+# largest payload accepted from a client (the clients only send pings and close frames); the
+# payload of a control frame is at most 125 bytes (RFC 6455)
+maxPayload = 4096
+maxControlPayload = 125
+
+
+def encode(snapshot, channels=None):
+	"""
+	Returns <snapshot> (only <channels>, default: all) as JSON bytes; nan is
+	sent as null
+	"""
+	values = snapshot.values
+	if channels is not None:
+		values = dict((name, values.get(name)) for name in channels)
+	values = dict((name, None if isinstance(value, float) and math.isnan(value) else value) for name, value in values.items())
+	return json.dumps({'time': snapshot.time, 'values': values}, separators=(',', ':')).encode('utf-8')
+
+
+def describe(channels):
+	"""
+	Returns the registry entries of <channels> as JSON bytes (channels that are
+	not in the registry are described with null)
+	"""
+	description = {}
+	for name in channels:
+		c = AttoDRYchannels.get(name)
+		description[name] = None if c is None else {'kind': c.kind, 'unit': c.unit, 'rate': c.rate, 'description': c.description}
+	return json.dumps(description, separators=(',', ':')).encode('utf-8')
+
+
+def frame(payload, opcode=0x1):
+	"""
+	Returns an unmasked WebSocket frame (server to client) of <payload>
+	"""
+	n = len(payload)
+	if n < 126:
+		head = struct.pack('!BB', 0x80 | opcode, n)
+	elif n < 1 << 16:
+		head = struct.pack('!BBH', 0x80 | opcode, 126, n)
+	else:
+		head = struct.pack('!BBQ', 0x80 | opcode, 127, n)
+	return head + payload
+
+
+def _readExactly(f, n):
+	data = f.read(n)
+	if len(data) < n:
+		raise EOFError()
+	return data
+
+
+def readFrame(f, limit=maxPayload):
+	"""
+	Reads a masked client frame from the file <f>; returns (opcode, payload).
+	Raises FrameTooLarge before reading a payload of more than <limit> bytes
+	(125 for control frames), and ProtocolError for an unmasked frame (a
+	client has to mask all its frames).
+	"""
+	b0, b1 = _readExactly(f, 2)
+	if not b1 & 0x80:
+		raise ProtocolError('unmasked client frame')
+	opcode = b0 & 0x0f
+	n = b1 & 0x7f
+	if n == 126:
+		n = struct.unpack('!H', _readExactly(f, 2))[0]
+	elif n == 127:
+		n = struct.unpack('!Q', _readExactly(f, 8))[0]
+	if n > (maxControlPayload if opcode & 0x8 else limit):
+		raise FrameTooLarge(n)
+	mask = _readExactly(f, 4)
+	payload = _readExactly(f, n)
+	if n:
+		key = (mask*(n//4 + 1))[:n]
+		payload = (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(n, 'big')
+	return opcode, payload
+
+
+class FrameTooLarge(Exception):
+	# raised by readFrame for a frame that is not read
+	pass
+
+
+class ProtocolError(Exception):
+	# raised by readFrame for a frame that violates RFC 6455
+	pass
+
+
+class Client:
+
+	def __init__(self, handler, channels, interval):
+		self.handler = handler
+		self.channels = channels
+		self.interval = interval
+		self.sent = 0
+		self.skipped = 0
+		self.closed = threading.Event()
+		self._last = None
+		self._pending = None
+		self._cond = threading.Condition()
+		self._sendLock = threading.Lock()
+
+	def offer(self, snapshot, encoded):
+		"""
+		Called for every snapshot; keeps it if the client is due (downsampling).
+		An older snapshot that was not sent yet is replaced.
+		"""
+		if self._last is not None and snapshot.time - self._last < self.interval:
+			return
+		self._last = snapshot.time
+		with self._cond:
+			if self._pending is not None:
+				self.skipped += 1
+			self._pending = encoded
+			self._cond.notify()
+
+	def send(self, data, opcode=0x1):
+		with self._sendLock:
+			self.handler.wfile.write(frame(data, opcode))
+			self.handler.wfile.flush()
+
+	def close(self):
+		self.closed.set()
+		with self._cond:
+			self._cond.notify()
+
+	def run(self):
+		# sends the pending snapshots until the client or the gateway closes the connection
+		while True:
+			with self._cond:
+				while self._pending is None and not self.closed.is_set():
+					self._cond.wait()
+				if self.closed.is_set():
+					return
+				data, self._pending = self._pending, None
+			try:
+				self.send(data)
+			except OSError:
+				self.close()
+				return
+			self.sent += 1
+
+	def receive(self):
+		# answers pings and notices the close frame of the client
+		try:
+			while not self.closed.is_set():
+				opcode, payload = readFrame(self.handler.rfile)
+				if opcode == 0x8:
+					self.send(payload[:2], 0x8)
+					break
+				if opcode == 0x9:
+					self.send(payload, 0xa)
+		except FrameTooLarge:
+			try:
+				self.send(b'\x03\xf1', 0x8)	# 1009: message too big
+			except OSError:
+				pass
+		except ProtocolError:
+			try:
+				self.send(b'\x03\xea', 0x8)	# 1002: protocol error
+			except OSError:
+				pass
+		except (EOFError, OSError):
+			pass
+		self.close()
+
+
+class Gateway:
+
+	def __init__(self, session, poller, port=8765, host='', token=None):
+		"""
+		Serves the snapshots of <poller> and passes set points to <session>.
+		Without a <token> the set point endpoints are disabled.
+		"""
+		self.session = session
+		self.poller = poller
+		self.token = token
+		self.clients = set()
+		self._clientsLock = threading.Lock()
+		self._snapshot = None
+		self._body = None
+		self._channels = describe(poller.channels)
+		gateway = self
+
+		class Handler(BaseHTTPRequestHandler):
+			protocol_version = 'HTTP/1.1'
+
+			def do_GET(self):
+				url = urlsplit(self.path)
+				if url.path == '/snapshot':
+					body = gateway._body
+					if body is None:
+						self.send_error(503, 'no readout yet')
+					else:
+						self.reply(200, body)
+				elif url.path == '/channels':
+					self.reply(200, gateway._channels)
+				elif url.path == '/stream':
+					gateway._stream(self, parse_qs(url.query))
+				else:
+					self.send_error(404)
+
+			def do_POST(self):
+				url = urlsplit(self.path)
+				parts = url.path.strip('/').split('/')
+				if len(parts) != 2 or parts[0] != 'setpoint' or parts[1] not in setpoints:
+					self.send_error(404)
+					return
+				if not gateway._authorized(self.headers.get('Authorization', '')):
+					self.send_error(401 if gateway.token else 403)
+					return
+				method, minimum, maximum = setpoints[parts[1]]
+				try:
+					length = int(self.headers.get('Content-Length', 0))
+				except ValueError:
+					length = -1
+				# a negative length would read until the client closes the connection
+				if not 0 <= length <= maxPayload:
+					self.send_error(400, 'expected a Content-Length between 0 and %d' % maxPayload)
+					return
+				try:
+					body = json.loads(self.rfile.read(length) or b'{}')
+					value = float(body['value'])
+				except (ValueError, KeyError, TypeError):
+					self.send_error(400, 'expected {"value": <number>}')
+					return
+				# nan and infinity pass json.loads and float()
+				if not math.isfinite(value) or not minimum <= value <= maximum:
+					self.send_error(400, '%s must be between %g and %g' % (parts[1], minimum, maximum))
+					return
+				try:
+					gateway.session.call(method, value, timeout=30.0)
+				except Exception as e:
+					self.reply(502, json.dumps({'error': str(e)}).encode('utf-8'))
+					return
+				self.reply(200, json.dumps({parts[1]: value}).encode('utf-8'))
+
+			def reply(self, code, body):
+				self.send_response(code)
+				self.send_header('Content-Type', 'application/json')
+				self.send_header('Content-Length', str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			def log_message(self, *args):
+				pass
+
+		self.httpd = ThreadingHTTPServer((host, port), Handler)
+		self.httpd.daemon_threads = True
+		self._thread = None
+		if poller.snapshot is not None:
+			self.update(poller.snapshot)
+		poller.subscribe(self.update)
+
+	def _authorized(self, header):
+		if not self.token:
+			return False
+		scheme, _, token = header.partition(' ')
+		return scheme == 'Bearer' and hmac.compare_digest(token.encode('utf-8'), self.token.encode('utf-8'))
+
+	def update(self, snapshot):
+		# encode once per snapshot (and per channel selection), then hand the bytes to the clients
+		self._snapshot = snapshot
+		self._body = encode(snapshot)
+		encoded = {None: self._body}
+		with self._clientsLock:
+			clients = list(self.clients)
+		for client in clients:
+			data = encoded.get(client.channels)
+			if data is None:
+				data = encoded[client.channels] = encode(snapshot, client.channels)
+			client.offer(snapshot, data)
+
+	def _stream(self, handler, query):
+		key = handler.headers.get('Sec-WebSocket-Key')
+		if handler.headers.get('Upgrade', '').lower() != 'websocket' or not key:
+			handler.send_error(426, 'WebSocket upgrade expected')
+			return
+		try:
+			interval = float(query.get('interval', ['0'])[0])
+		except ValueError:
+			handler.send_error(400, 'bad interval')
+			return
+		channels = None
+		if 'channels' in query:
+			channels = tuple(name for name in ','.join(query['channels']).split(',') if name)
+			unknown = [name for name in channels if name not in self.poller.channels]
+			if unknown:
+				handler.send_error(400, 'not polled: '+','.join(unknown))
+				return
+		handler.send_response(101)
+		handler.send_header('Upgrade', 'websocket')
+		handler.send_header('Connection', 'Upgrade')
+		handler.send_header('Sec-WebSocket-Accept', base64.b64encode(hashlib.sha1(key.encode('ascii') + GUID).digest()).decode('ascii'))
+		handler.end_headers()
+		handler.wfile.flush()
+		handler.close_connection = True
+
+		client = Client(handler, channels, interval)
+		if self._snapshot is not None:
+			client.offer(self._snapshot, encode(self._snapshot, channels))
+		with self._clientsLock:
+			self.clients.add(client)
+		log.info('websocket client %s connected', handler.client_address[0])
+		receiver = threading.Thread(target=client.receive, name='AttoDRYgateway-receive', daemon=True)
+		receiver.start()
+		try:
+			client.run()
+		finally:
+			with self._clientsLock:
+				self.clients.discard(client)
+			try:
+				handler.connection.shutdown(socket.SHUT_RDWR)
+			except OSError:
+				pass
+			log.info('websocket client %s disconnected after %d messages', handler.client_address[0], client.sent)
+
+	def start(self):
+		self._thread = threading.Thread(target=self.httpd.serve_forever, name='AttoDRYgateway', daemon=True)
+		self._thread.start()
+
+	def stop(self):
+		self.poller.unsubscribe(self.update)
+		with self._clientsLock:
+			clients = list(self.clients)
+		for client in clients:
+			try:
+				client.send(b'\x03\xe9', 0x8)	# 1001: going away
+			except OSError:
+				pass
+			client.close()
+		self.httpd.shutdown()
+		self.httpd.server_close()
+		if self._thread is not None:
+			self._thread.join()
+			self._thread = None
@@ -0,0 +1,180 @@
+# Long-term health of the compressor and the turbopump.
+# Every tracked channel gets a linear trend that is updated with each sample and forgets old
+# samples exponentially (a time constant of a week by default), so it follows slow drifts over
+# months in constant memory. From the trend the tracker forecasts when a channel will cross its
+# limit: e.g. the 4K stage warming above the temperature at which the base temperature can no
+# longer be reached, or the turbopump frequency dropping because the pump needs maintenance.
+# Compressor errors (error code 32) are counted.
+#
+# usage:
+#	health = HealthTracker()
+#	health.attach(poller)
+#	for name, r in health.report().items(): print(name, r['slope_per_day'], r['limit_in_days'])
+
+import collections
+import math
+
+COMPRESSOR_ERROR = 32
+
+# channel -> (limit, 'above' or 'below', what it means); starting points, to be adapted to the cryostat
+limits = {
+	'get4KStageTemperature': (3.5, 'above', 'base temperature degrades'),
+	'get40KStageTemperature': (45.0, 'above', 'compressor performance degrades'),
+	'getTurbopumpFrequency': (1200.0, 'below', 'turbopump maintenance due'),
+	'GetTurbopumpFrequ800': (1200.0, 'below', 'turbopump maintenance due'),
+	'getPressure': (1e-3, 'above', 'vacuum degrades'),
+	'getPressure800': (1e-3, 'above', 'vacuum degrades'),
+}
+
+
+class Trend:
+	"""
+	Exponentially weighted linear regression of value over time; the weight of
+	a sample decays with exp(-age/<horizon>)
+	"""
+
+	def __init__(self, horizon):
+		self.horizon = horizon
+		self.t0 = None
+		self.last = None
+		# weighted sums of 1, t, y, t*t and t*y, with t relative to t0
+		self.s = [0.0, 0.0, 0.0, 0.0, 0.0]
+
+	def add(self, t, y):
+		if self.t0 is None:
+			self.t0 = t
+		elif t > self.last:
+			decay = math.exp(-(t - self.last)/self.horizon)
+			self.s = [v*decay for v in self.s]
+		self.last = t if self.last is None else max(t, self.last)
+		x = t - self.t0
+		s = self.s
+		s[0] += 1.0
+		s[1] += x
+		s[2] += y
+		s[3] += x*x
+		s[4] += x*y
+		if x > 10*self.horizon:
+			self._recentre()
+
+	def _recentre(self):
+		# move t0 to the last sample, so that the sums stay small (the fit does not change)
+		d = self.last - self.t0
+		w, st, sy, stt, sty = self.s
+		self.s = [w, st - w*d, sy, stt - 2*d*st + w*d*d, sty - d*sy]
+		self.t0 = self.last
+
+	def fit(self):
+		"""
+		Returns (value at the last sample, slope per second), None with too few
+		samples
+		"""
+		w, st, sy, stt, sty = self.s
+		det = w*stt - st*st
+		if w < 2 or det <= 1e-12*max(w*stt, 1e-300):
+			return None
+		slope = (w*sty - st*sy)/det
+		intercept = (sy - slope*st)/w
+		return intercept + slope*(self.last - self.t0), slope
+
+
+class HealthTracker:
+
+	def __init__(self, limits=limits, horizon=7*86400.0, running='isSystemRunning', errors=100):
+		"""
+		Tracks the channels of <limits> with a forgetting time of <horizon>
+		seconds, only while the channel <running> is 1 (None: always). The
+		times of the last <errors> compressor errors are kept.
+		"""
+		self.limits = dict(limits)
+		self.running = running
+		self.trends = dict((channel, Trend(horizon)) for channel in self.limits)
+		self.compressorErrors = 0
+		self.errorTimes = collections.deque(maxlen=errors)
+		self._lastError = 0
+		self._lastTime = None
+
+	def attach(self, poller):
+		poller.subscribe(self.process)
+
+	def process(self, snapshot):
+		"""
+		Adds the values of <snapshot>
+		"""
+		values = snapshot.values
+		t = snapshot.time
+		self._lastTime = t
+		error = values.get('getAttodryErrorStatus')
+		if error == COMPRESSOR_ERROR and self._lastError != COMPRESSOR_ERROR:
+			self.compressorErrors += 1
+			self.errorTimes.append(t)
+		if error is not None and error == error:
+			self._lastError = error
+		if self.running is not None and values.get(self.running) != 1:
+			return
+		for channel, trend in self.trends.items():
+			value = values.get(channel)
+			# value == value: not nan
+			if value is not None and value == value:
+				trend.add(t, value)
+
+	def forecast(self, channel):
+		"""
+		Returns the unix time at which <channel> is expected to cross its limit:
+		None if its trend goes the other way (or there are too few samples), the
+		time of the last sample if it crossed already
+		"""
+		trend = self.trends[channel]
+		fit = trend.fit()
+		if fit is None:
+			return None
+		value, slope = fit
+		limit, direction, meaning = self.limits[channel]
+		if (value > limit) if direction == 'above' else (value < limit):
+			return trend.last
+		if slope == 0 or (slope > 0) != (direction == 'above'):
+			return None
+		return trend.last + (limit - value)/slope
+
+	def errorRate(self, window=30*86400.0):
+		"""
+		Returns the number of compressor errors per day in the <window> seconds
+		before the last snapshot (of the kept ones)
+		"""
+		if self._lastTime is None:
+			return 0.0
+		now = self._lastTime
+		return sum(1 for t in self.errorTimes if now - t <= window)/(window/86400.0)
+
+	def report(self):
+		"""
+		Returns channel -> {value, slope_per_day, limit, limit_in_days, meaning}
+		of the channels with enough samples
+		"""
+		report = {}
+		for channel, trend in self.trends.items():
+			fit = trend.fit()
+			if fit is None:
+				continue
+			limit, direction, meaning = self.limits[channel]
+			when = self.forecast(channel)
+			report[channel] = {
+				'value': fit[0],
+				'slope_per_day': fit[1]*86400.0,
+				'limit': limit,
+				'limit_in_days': None if when is None else max(when - trend.last, 0.0)/86400.0,
+				'meaning': meaning,
+			}
+		return report
+
+	def due(self, within=14*86400.0):
+		"""
+		Returns [(channel, unix time, meaning)] of the limits that are expected
+		to be crossed within <within> seconds, the earliest first
+		"""
+		due = []
+		for channel in self.trends:
+			when = self.forecast(channel)
+			if when is not None and when - self.trends[channel].last <= within:
+				due.append((channel, when, self.limits[channel][2]))
+		return sorted(due, key=lambda item: item[1])
@@ -0,0 +1,157 @@
+# Helium circuit of the attoDRY2100.
+# The pressures, valves and reservoir values of one snapshot are combined into the state of the
+# circuit: the direction helium flows in (from the dump into the cryostat, from the cryostat into
+# the dump, circulating through the cryostat, or none), the fill state of the dump and the trend
+# of the dump pressure. Combinations of valves and pressures that cannot be consistent (e.g. an
+# open valve between two volumes whose pressures do not equalise) are reported as Alarms, in the
+# same way as AttoDRYalarms. Evaluating a snapshot only takes a few dictionary lookups, so it can
+# run on every poll.
+#
+# usage:
+#	circuit = Circuit(dumpFull=1000.0)
+#	circuit.subscribe(print)
+#	circuit.attach(poller)
+#	circuit.state.flow, circuit.state.dumpFill
+
+import collections
+import logging
+import math
+
+from AttoDRYalarms import Alarm
+
+log = logging.getLogger(__name__)
+
+# <flow>: 'to cryostat', 'to dump', 'circulating' or 'none'; <pressureDifference> drives the flow (mbar);
+# <dumpFill>: 0 (empty) .. 1 (full); <dumpTrend>: mbar per second; <problems>: messages of the active checks
+HeliumState = collections.namedtuple('HeliumState', ['time', 'flow', 'pressureDifference', 'dumpFill', 'dumpTrend', 'problems'])
+
+channels = (
+	'getCryostatInPressure', 'getCryostatOutPressure', 'getDumpPressure',
+	'getCryostatInValve', 'getCryostatOutValve', 'getDumpInValve', 'getDumpOutValve',
+	'getReservoirTemperature', 'getReservoirHeaterPower',
+)
+
+
+class Circuit:
+
+	def __init__(self, dumpFull=1000.0, dumpEmpty=0.0, maxPressure=5000.0, equalise=0.2, holdTime=60.0, leakRate=0.05, warmReservoir=20.0, tau=300.0):
+		"""
+		<dumpFull>/<dumpEmpty>: dump pressures (mbar) of a full and an empty dump
+		<maxPressure>: pressures above it (or below 0) are sensor faults
+		<equalise>: relative pressure difference that may remain across an open
+		valve; <holdTime>: seconds an inconsistency has to last to be reported
+		<leakRate>: mbar/s the dump pressure may change with its valves closed
+		<warmReservoir>: reservoir temperature (K) above which its heater should be off
+		<tau>: seconds over which the dump pressure trend is averaged
+		"""
+		self.dumpFull = dumpFull
+		self.dumpEmpty = dumpEmpty
+		self.maxPressure = maxPressure
+		self.equalise = equalise
+		self.holdTime = holdTime
+		self.leakRate = leakRate
+		self.warmReservoir = warmReservoir
+		self.tau = tau
+		self.state = None
+		# check name -> time since which it has been failing
+		self._since = {}
+		self._active = set()
+		self._subscribers = []
+		self._dump = None
+
+	def subscribe(self, callback):
+		"""
+		Calls <callback>(alarm) whenever a check is raised or cleared
+		"""
+		self._subscribers.append(callback)
+
+	def attach(self, poller):
+		poller.subscribe(self.process)
+
+	def _differs(self, a, b):
+		return abs(a - b) > self.equalise*max(abs(a), abs(b), 1.0)
+
+	def checks(self, v, trend):
+		"""
+		Returns name -> (message, held) of the failing checks for the values <v>;
+		held checks are only reported once they last <holdTime>
+		"""
+		failing = {}
+		pin, pout, pdump = v['getCryostatInPressure'], v['getCryostatOutPressure'], v['getDumpPressure']
+		cin, cout, din, dout = v['getCryostatInValve'] == 1, v['getCryostatOutValve'] == 1, v['getDumpInValve'] == 1, v['getDumpOutValve'] == 1
+		for name, p in (('cryostat in', pin), ('cryostat out', pout), ('dump', pdump)):
+			if not 0 <= p <= self.maxPressure:
+				failing['pressure sensor '+name] = ('the '+name+' pressure of '+str(p)+' mbar is out of range', False)
+		if din and dout:
+			failing['dump bypass'] = ('dump in and dump out valves are both open', False)
+		if dout and cin and self._differs(pdump, pin):
+			failing['dump to cryostat'] = ('dump out and cryostat in valves are open, but the dump (%g mbar) and inlet (%g mbar) pressures do not equalise' % (pdump, pin), True)
+		if cout and din and self._differs(pout, pdump):
+			failing['cryostat to dump'] = ('cryostat out and dump in valves are open, but the outlet (%g mbar) and dump (%g mbar) pressures do not equalise' % (pout, pdump), True)
+		if cin and cout and not (din or dout) and pin < pout:
+			failing['reverse circulation'] = ('circulating, but the inlet pressure (%g mbar) is below the outlet pressure (%g mbar)' % (pin, pout), True)
+		if not (din or dout) and trend is not None and abs(trend) > self.leakRate:
+			failing['dump leak'] = ('the dump pressure changes by %.3g mbar/s while the dump valves are closed' % trend, True)
+		reservoirT = v.get('getReservoirTemperature')
+		if reservoirT is not None and reservoirT > self.warmReservoir and v.get('getReservoirHeaterPower', 0) > 0:
+			failing['reservoir heater'] = ('the reservoir heater is on at %g K' % reservoirT, True)
+		return failing
+
+	def process(self, snapshot):
+		"""
+		Evaluates <snapshot>: updates Circuit.state and returns the Alarms that
+		were raised or cleared. Snapshots without the helium circuit channels
+		(or with failed reads) are skipped.
+		"""
+		v = snapshot.values
+		t = snapshot.time
+		try:
+			if any(math.isnan(v[name]) for name in channels[:7]):
+				return []
+		except KeyError:
+			return []
+		pin, pout, pdump = v['getCryostatInPressure'], v['getCryostatOutPressure'], v['getDumpPressure']
+		cin, cout, din, dout = v['getCryostatInValve'] == 1, v['getCryostatOutValve'] == 1, v['getDumpInValve'] == 1, v['getDumpOutValve'] == 1
+
+		# trend of the dump pressure, exponentially averaged over tau (readings out of range are left out)
+		trend = None if self._dump is None else self._dump[2]
+		if 0 <= pdump <= self.maxPressure:
+			if self._dump is None:
+				self._dump = (t, pdump, None)
+			elif t > self._dump[0]:
+				last, lastP, lastTrend = self._dump
+				rate = (pdump - lastP)/(t - last)
+				trend = rate if lastTrend is None else lastTrend + (1.0 - math.exp(-(t - last)/self.tau))*(rate - lastTrend)
+				self._dump = (t, pdump, trend)
+
+		flow, difference = 'none', 0.0
+		if dout and cin and pdump > pin:
+			flow, difference = 'to cryostat', pdump - pin
+		elif cout and din and pout > pdump:
+			flow, difference = 'to dump', pout - pdump
+		elif cin and cout:
+			flow, difference = 'circulating', pin - pout
+		fill = min(max((pdump - self.dumpEmpty)/(self.dumpFull - self.dumpEmpty), 0.0), 1.0)
+
+		failing = self.checks(v, trend)
+		alarms = []
+		for name in list(self._since):
+			if name not in failing:
+				del self._since[name]
+		for name, (message, held) in failing.items():
+			since = self._since.setdefault(name, t)
+			if name not in self._active and (not held or t - since >= self.holdTime):
+				self._active.add(name)
+				alarms.append(Alarm(t, name, 'helium circuit', pdump, True, message))
+		for name in list(self._active):
+			if name not in failing:
+				self._active.discard(name)
+				alarms.append(Alarm(t, name, 'helium circuit', pdump, False, name+' cleared'))
+		self.state = HeliumState(t, flow, difference, fill, trend, tuple(failing[name][0] for name in self._active))
+		for alarm in alarms:
+			for callback in list(self._subscribers):
+				try:
+					callback(alarm)
+				except Exception:
+					log.exception('helium circuit subscriber %r failed', callback)
+		return alarms
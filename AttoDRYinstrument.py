@@ -0,0 +1,232 @@
+# Opt-in instrumentation of the DLL calls.
+# enable() adds a hook to every AttoDRYlib function that records the number of calls, a latency
+# histogram, the returned error codes and the calling threads, and passes a span to the
+# registered span listeners (e.g. openTelemetryListener()). disable() removes the hook again;
+# while disabled the DLL functions are called directly, without any overhead.
+#
+# usage:
+#	import AttoDRYinstrument
+#	AttoDRYinstrument.enable()
+#	...
+#	AttoDRYinstrument.dump()
+
+import collections
+import logging
+import sys
+import threading
+import time
+
+import AttoDRYlib as ADRY
+
+log = logging.getLogger(__name__)
+
+# <start> and <end> are unix times in ns, <code> is the returned error code (None if the call raised)
+Span = collections.namedtuple('Span', ['name', 'export', 'start', 'end', 'thread', 'code'])
+
+SUB_BITS = 4		# 16 sub-buckets per power of two: at most 1/16 relative error
+MAX_BITS = 40		# values up to 2**40 ns (about 18 minutes); larger ones go to the last bucket
+
+
+class Histogram:
+	"""
+	Log-linear (HDR style) histogram of integer values with a fixed number of
+	buckets
+	"""
+
+	def __init__(self):
+		self.counts = [0]*((MAX_BITS - SUB_BITS + 1) << SUB_BITS)
+		self.count = 0
+		self.total = 0
+		self.min = None
+		self.max = 0
+
+	@staticmethod
+	def index(value):
+		if value < (2 << SUB_BITS):
+			return value
+		shift = value.bit_length() - SUB_BITS - 1
+		return ((shift + 1) << SUB_BITS) + (value >> shift) - (1 << SUB_BITS)
+
+	@staticmethod
+	def value(index):
+		# middle of the values in bucket <index>
+		if index < (2 << SUB_BITS):
+			return index
+		shift = (index >> SUB_BITS) - 1
+		sub = (index & ((1 << SUB_BITS) - 1)) + (1 << SUB_BITS)
+		return (sub << shift) + (1 << shift)//2
+
+	def record(self, value):
+		value = max(int(value), 0)
+		self.counts[min(self.index(value), len(self.counts) - 1)] += 1
+		self.count += 1
+		self.total += value
+		if self.min is None or value < self.min:
+			self.min = value
+		if value > self.max:
+			self.max = value
+
+	def percentile(self, p):
+		"""
+		Returns the value below which <p> percent of the recorded values are
+		"""
+		if not self.count:
+			return 0
+		rank = p/100.0*self.count
+		seen = 0
+		for index, count in enumerate(self.counts):
+			seen += count
+			if count and seen >= rank:
+				return min(self.value(index), self.max)
+		return self.max
+
+	def mean(self):
+		return self.total/self.count if self.count else 0
+
+
+class CallStats:
+
+	def __init__(self, name):
+		self.name = name
+		self.latency = Histogram()
+		self.errors = collections.Counter()
+		self.threads = collections.Counter()
+		self.lock = threading.Lock()
+
+	def record(self, ns, code, thread):
+		with self.lock:
+			self.latency.record(ns)
+			self.threads[thread] += 1
+			if code != 0:
+				self.errors[code] += 1
+
+	def summary(self):
+		h = self.latency
+		return {
+			'calls': h.count,
+			'total_ms': h.total/1e6,
+			'mean_us': h.mean()/1e3,
+			'p50_us': h.percentile(50)/1e3,
+			'p90_us': h.percentile(90)/1e3,
+			'p99_us': h.percentile(99)/1e3,
+			'max_us': h.max/1e3,
+			'errors': dict(self.errors),
+			'threads': dict(self.threads),
+		}
+
+
+_stats = {}
+_statsLock = threading.Lock()
+_listeners = []
+# offset between time.perf_counter_ns() and unix time in ns, for the spans
+_epoch = time.time_ns() - time.perf_counter_ns()
+enabled = False
+
+
+def _hook(name, export, func):
+	with _statsLock:
+		stats = _stats.get(name)
+		if stats is None:
+			stats = _stats[name] = CallStats(name)
+	clock = time.perf_counter_ns
+	currentThread = threading.current_thread
+
+	def instrumented(*args):
+		thread = currentThread().name
+		code = None
+		start = clock()
+		try:
+			code = func(*args)
+			return code
+		finally:
+			end = clock()
+			stats.record(end - start, code, thread)
+			if _listeners:
+				span = Span(name, export, start + _epoch, end + _epoch, thread, code)
+				for listener in list(_listeners):
+					# a failing listener must not replace the result or the exception of the call
+					try:
+						listener(span)
+					except Exception:
+						log.exception('span listener %r failed', listener)
+	instrumented.__name__ = export
+	return instrumented
+
+
+def enable():
+	"""
+	Starts recording all DLL calls
+	"""
+	global enabled
+	if not enabled:
+		ADRY.addHook(_hook)
+		enabled = True
+
+
+def disable():
+	"""
+	Stops recording; the statistics are kept until reset()
+	"""
+	global enabled
+	if enabled:
+		ADRY.removeHook(_hook)
+		enabled = False
+
+
+def reset():
+	with _statsLock:
+		_stats.clear()
+	# the hooked functions hold on to their CallStats; resolve them again
+	if enabled:
+		disable()
+		enable()
+
+
+def addSpanListener(listener):
+	"""
+	Calls <listener>(span) after every DLL call while enabled; exceptions of
+	<listener> are logged and do not reach the caller
+	"""
+	_listeners.append(listener)
+
+
+def removeSpanListener(listener):
+	_listeners.remove(listener)
+
+
+def openTelemetryListener(tracer=None):
+	"""
+	Returns a span listener that reports the DLL calls as OpenTelemetry spans.
+	Needs the opentelemetry-api package.
+	"""
+	from opentelemetry import trace
+	if tracer is None:
+		tracer = trace.get_tracer('AttoDRY')
+
+	def listener(span):
+		s = tracer.start_span(span.name, start_time=span.start, attributes={
+			'attodry.export': span.export, 'attodry.error_code': -1 if span.code is None else span.code, 'thread.name': span.thread})
+		if span.code != 0:
+			s.set_status(trace.Status(trace.StatusCode.ERROR))
+		s.end(end_time=span.end)
+	return listener
+
+
+def stats():
+	"""
+	Returns alias -> summary (calls, latency percentiles, error codes, threads) of
+	all DLL functions called so far
+	"""
+	with _statsLock:
+		items = list(_stats.items())
+	return dict((name, s.summary()) for name, s in items if s.latency.count)
+
+
+def dump(file=sys.stdout):
+	"""
+	Prints stats() as a table, the functions with the most time spent first
+	"""
+	rows = sorted(stats().items(), key=lambda item: -item[1]['total_ms'])
+	print('%-40s %8s %10s %9s %9s %9s %9s %9s  %s' % ('function', 'calls', 'total ms', 'mean us', 'p50 us', 'p90 us', 'p99 us', 'max us', 'errors'), file=file)
+	for name, s in rows:
+		print('%-40s %8d %10.1f %9.1f %9.1f %9.1f %9.1f %9.1f  %s' % (name, s['calls'], s['total_ms'], s['mean_us'], s['p50_us'], s['p90_us'], s['p99_us'], s['max_us'], s['errors'] or ''), file=file)
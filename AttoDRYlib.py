@@ -14,13 +14,13 @@
 # script started on 04-Sep-2020
 # inspired by the ANC350 scrips written by Rob Heath and Brian Schaefer (https://github.com/Laukei/pyanc350)
 
-# define the path to the AttoDRY DLL:
-dll_directory = 'C:\\Program Files (x86)\\National Instruments\\LabVIEW 2020\\user.lib\\attoDRYLib\\'
-
-
 import ctypes
 import os
-os.add_dll_directory(dll_directory)
+import threading
+
+# define the path to the AttoDRY DLL. It can also be set with the ATTODRY_DLL_DIR environment 
+# variable or by passing dll_directory to load() (or AttoDRY.begin()):
+dll_directory = os.environ.get('ATTODRY_DLL_DIR', 'C:\\Program Files (x86)\\National Instruments\\LabVIEW 2020\\user.lib\\attoDRYLib\\')
 
 
 
@@ -108,242 +108,302 @@ def checkError(code,func,args):
     return code
 
 
-# load attoDRYLib...
-attoDRYLib = ctypes.windll.attoDRYLib
+# attoDRYLib is loaded on the first call to a DLL function (this also starts the LabVIEW
+# runtime, which takes several seconds), so importing this module is cheap.
+attoDRYLib = None
+_loadLock = threading.Lock()
+
+def load(directory=None):
+    """
+    Loads attoDRYLib from <directory> (default: dll_directory) and returns it.
+    This happens automatically on the first DLL call; call it directly to use a
+    different directory or to pay the LabVIEW runtime startup at a known time.
+    """
+    global attoDRYLib, dll_directory
+    with _loadLock:
+        if attoDRYLib is None:
+            if directory is not None:
+                dll_directory = directory
+            if not hasattr(ctypes, 'windll'):
+                raise Exception('Error: attoDRYLib can only be loaded on Windows (32 bit python)')
+            os.add_dll_directory(dll_directory)
+            attoDRYLib = ctypes.windll.attoDRYLib
+    return attoDRYLib
+
+
+def useBackend(lib):
+    """
+    Uses <lib> instead of attoDRYLib. <lib> can be any object that has the 
+    exported functions as attributes and whose functions return the error code,
+    e.g. AttoDRYsim.SimulatedAttoDRYLib. With None, the DLL is loaded again on 
+    the next call.
+    """
+    global attoDRYLib
+    with _loadLock:
+        attoDRYLib = lib
+    _forget()
+
+
+# hooks wrap every DLL function when it is resolved: hook(alias, exported symbol, function) has
+# to return a function with the same arguments and return value (the error code). Without
+# hooks, the ctypes functions are used directly, so there is no overhead at all.
+_hooks = []
+
+def addHook(hook):
+    """
+    Adds <hook> to the DLL functions (e.g. AttoDRYinstrument, AttoDRYtrace). The 
+    aliases resolved so far are resolved again on their next use.
+    """
+    _hooks.append(hook)
+    _forget()
+
+
+def removeHook(hook):
+    _hooks.remove(hook)
+    _forget()
+
+
+def _forget():
+    # drops all resolved aliases; they are resolved again by __getattr__
+    for name in functions:
+        globals().pop(name, None)
+
+
 #############################################################################################################
-##### aliases for the DLL functions (only selected ones; we want to change field and temperature only):
+##### device profiles: setup_version as passed to begin()
 #############################################################################################################
 
-##### communication
-getActionMessage = getattr(attoDRYLib,'AttoDRY_Interface_getActionMessage')
-begin = getattr(attoDRYLib,'AttoDRY_Interface_begin')
-Cancel = getattr(attoDRYLib,'AttoDRY_Interface_Cancel')
-Confirm = getattr(attoDRYLib,'AttoDRY_Interface_Confirm')
-Connect = getattr(attoDRYLib,'AttoDRY_Interface_Connect')
-Main = getattr(attoDRYLib,'AttoDRY_Interface_Main')
-Disconnect = getattr(attoDRYLib,'AttoDRY_Interface_Disconnect')
-end = getattr(attoDRYLib,'AttoDRY_Interface_end')
-getAttodryErrorMessage = getattr(attoDRYLib,'AttoDRY_Interface_getAttodryErrorMessage')
-getAttodryErrorStatus = getattr(attoDRYLib,'AttoDRY_Interface_getAttodryErrorStatus')
-goToBaseTemperature = getattr(attoDRYLib,'AttoDRY_Interface_goToBaseTemperature')
-lowerError = getattr(attoDRYLib,'AttoDRY_Interface_lowerError')
-LVDLLStatus = getattr(attoDRYLib,'LVDLLStatus')
-startLogging = getattr(attoDRYLib,'AttoDRY_Interface_startLogging')
-startSampleExchange = getattr(attoDRYLib,'AttoDRY_Interface_startSampleExchange')
-stopLogging = getattr(attoDRYLib,'AttoDRY_Interface_stopLogging')
-sweepFieldToZero = getattr(attoDRYLib,'AttoDRY_Interface_sweepFieldToZero')
-downloadSampleTemperatureSensorCalibrationCurve = getattr(attoDRYLib,'AttoDRY_Interface_downloadSampleTemperatureSensorCalibrationCurve')
-downloadTemperatureSensorCalibrationCurve = getattr(attoDRYLib,'AttoDRY_Interface_downloadTemperatureSensorCalibrationCurve')
-uploadSampleTemperatureCalibrationCurve = getattr(attoDRYLib,'AttoDRY_Interface_uploadSampleTemperatureCalibrationCurve')
-uploadTemperatureCalibrationCurve = getattr(attoDRYLib,'AttoDRY_Interface_uploadTemperatureCalibrationCurve')
-
-##### asking questions
-isControllingField = getattr(attoDRYLib,'AttoDRY_Interface_isControllingField')
-isControllingTemperature = getattr(attoDRYLib,'AttoDRY_Interface_isControllingTemperature')
-isDeviceConnected = getattr(attoDRYLib,'AttoDRY_Interface_isDeviceConnected')
-isDeviceInitialised = getattr(attoDRYLib,'AttoDRY_Interface_isDeviceInitialised')
-isGoingToBaseTemperature = getattr(attoDRYLib,'AttoDRY_Interface_isGoingToBaseTemperature')
-isExchangeHeaterOn = getattr(attoDRYLib,'AttoDRY_Interface_isExchangeHeaterOn')
-isPersistentModeSet = getattr(attoDRYLib,'AttoDRY_Interface_isPersistentModeSet')
-isPumping = getattr(attoDRYLib,'AttoDRY_Interface_isPumping')
-isSampleExchangeInProgress = getattr(attoDRYLib,'AttoDRY_Interface_isSampleExchangeInProgress')
-isSampleHeaterOn = getattr(attoDRYLib,'AttoDRY_Interface_isSampleHeaterOn')
-isSampleReadyToExchange = getattr(attoDRYLib,'AttoDRY_Interface_isSampleReadyToExchange')
-isSystemRunning = getattr(attoDRYLib,'AttoDRY_Interface_isSystemRunning')
-isPumping = getattr(attoDRYLib,'AttoDRY_Interface_isPumping')
-isZeroingField = getattr(attoDRYLib,'AttoDRY_Interface_isZeroingField')
-
-##### queries
-queryReservoirTsetColdSample = getattr(attoDRYLib,'AttoDRY_Interface_queryReservoirTsetColdSample') 
-queryReservoirTsetWarmMagnet = getattr(attoDRYLib,'AttoDRY_Interface_queryReservoirTsetWarmMagnet')
-queryReservoirTsetWarmSample = getattr(attoDRYLib,'AttoDRY_Interface_queryReservoirTsetWarmSample')
-querySampleHeaterMaximumPower = getattr(attoDRYLib,'AttoDRY_Interface_querySampleHeaterMaximumPower')
-querySampleHeaterResistance = getattr(attoDRYLib,'AttoDRY_Interface_querySampleHeaterResistance')
-querySampleHeaterWireResistance = getattr(attoDRYLib,'AttoDRY_Interface_querySampleHeaterWireResistance')
-
-##### toggle commands
-toggleCryostatInValve = getattr(attoDRYLib,'AttoDRY_Interface_toggleCryostatInValve')
-toggleCryostatOutValve = getattr(attoDRYLib,'AttoDRY_Interface_toggleCryostatOutValve')
-toggleDumpInValve = getattr(attoDRYLib,'AttoDRY_Interface_toggleDumpInValve')
-toggleDumpOutValve = getattr(attoDRYLib,'AttoDRY_Interface_toggleDumpOutValve')
-toggleExchangeHeaterControl = getattr(attoDRYLib,'AttoDRY_Interface_toggleExchangeHeaterControl')
-toggleFullTemperatureControl = getattr(attoDRYLib,'AttoDRY_Interface_toggleFullTemperatureControl')
-toggleHeliumValve = getattr(attoDRYLib,'AttoDRY_Interface_toggleHeliumValve')
-toggleInnerVolumeValve = getattr(attoDRYLib,'AttoDRY_Interface_toggleInnerVolumeValve')
-toggleOuterVolumeValve = getattr(attoDRYLib,'AttoDRY_Interface_toggleOuterVolumeValve')
-toggleMagneticFieldControl = getattr(attoDRYLib,'AttoDRY_Interface_toggleMagneticFieldControl')
-togglePersistentMode = getattr(attoDRYLib,'AttoDRY_Interface_togglePersistentMode')
-togglePump = getattr(attoDRYLib,'AttoDRY_Interface_togglePump')
-togglePumpValve = getattr(attoDRYLib,'AttoDRY_Interface_togglePumpValve')
-toggleSampleTemperatureControl = getattr(attoDRYLib,'AttoDRY_Interface_toggleSampleTemperatureControl') 
-toggleStartUpShutdown = getattr(attoDRYLib,'AttoDRY_Interface_toggleStartUpShutdown') 
-
-##### get values
-getCryostatInPressure = getattr(attoDRYLib,'AttoDRY_Interface_getCryostatInPressure')
-getCryostatInValve = getattr(attoDRYLib,'AttoDRY_Interface_getCryostatInValve')
-getCryostatOutPressure = getattr(attoDRYLib,'AttoDRY_Interface_getCryostatOutPressure')
-getCryostatOutValve = getattr(attoDRYLib,'AttoDRY_Interface_getCryostatOutValve')
-getDumpInValve = getattr(attoDRYLib,'AttoDRY_Interface_getDumpInValve')
-getDumpOutValve = getattr(attoDRYLib,'AttoDRY_Interface_getDumpOutValve')
-getDumpPressure = getattr(attoDRYLib,'AttoDRY_Interface_getDumpPressure')
-getHeliumValve = getattr(attoDRYLib,'AttoDRY_Interface_getHeliumValve')
-getInnerVolumeValve = getattr(attoDRYLib,'AttoDRY_Interface_getInnerVolumeValve')
-getOuterVolumeValve = getattr(attoDRYLib,'AttoDRY_Interface_getOuterVolumeValve')
-getReservoirHeaterPower = getattr(attoDRYLib,'AttoDRY_Interface_getReservoirHeaterPower')
-getReservoirTemperature = getattr(attoDRYLib,'AttoDRY_Interface_getReservoirTemperature')
-getReservoirTsetColdSample = getattr(attoDRYLib,'AttoDRY_Interface_getReservoirTsetColdSample')
-getReservoirTsetWarmMagnet = getattr(attoDRYLib,'AttoDRY_Interface_getReservoirTsetWarmMagnet')
-getReservoirTsetWarmSample = getattr(attoDRYLib,'AttoDRY_Interface_getReservoirTsetWarmSample')
-getPressure = getattr(attoDRYLib,'AttoDRY_Interface_getPressure')
-get40KStageTemperature = getattr(attoDRYLib,'AttoDRY_Interface_get40KStageTemperature')
-get4KStageTemperature = getattr(attoDRYLib,'AttoDRY_Interface_get4KStageTemperature')
-getDerivativeGain = getattr(attoDRYLib,'AttoDRY_Interface_getDerivativeGain')
-getIntegralGain = getattr(attoDRYLib,'AttoDRY_Interface_getIntegralGain')
-getMagneticField = getattr(attoDRYLib,'AttoDRY_Interface_getMagneticField')
-getMagneticFieldSetPoint = getattr(attoDRYLib,'AttoDRY_Interface_getMagneticFieldSetPoint')
-getProportionalGain = getattr(attoDRYLib,'AttoDRY_Interface_getProportionalGain')
-getSampleHeaterMaximumPower = getattr(attoDRYLib,'AttoDRY_Interface_getSampleHeaterMaximumPower')
-getSampleHeaterPower = getattr(attoDRYLib,'AttoDRY_Interface_getSampleHeaterPower')
-getSampleHeaterResistance = getattr(attoDRYLib,'AttoDRY_Interface_getSampleHeaterResistance')
-getSampleHeaterWireResistance = getattr(attoDRYLib,'AttoDRY_Interface_getSampleHeaterWireResistance')
-getSampleTemperature = getattr(attoDRYLib,'AttoDRY_Interface_getSampleTemperature')
-getUserTemperature = getattr(attoDRYLib,'AttoDRY_Interface_getUserTemperature')
-getVtiHeaterPower = getattr(attoDRYLib,'AttoDRY_Interface_getVtiHeaterPower')
-getVtiTemperature = getattr(attoDRYLib,'AttoDRY_Interface_getVtiTemperature')
-getPumpValve = getattr(attoDRYLib,'AttoDRY_Interface_getPumpValve')
-getTurbopumpFrequency = getattr(attoDRYLib,'AttoDRY_Interface_getTurbopumpFrequency')
-
-##### set values
-setDerivativeGain = getattr(attoDRYLib,'AttoDRY_Interface_setDerivativeGain')
-setIntegralGain = getattr(attoDRYLib,'AttoDRY_Interface_setIntegralGain')
-setProportionalGain = getattr(attoDRYLib,'AttoDRY_Interface_setProportionalGain')
-setReservoirTsetColdSample = getattr(attoDRYLib,'AttoDRY_Interface_setReservoirTsetColdSample')
-setReservoirTsetWarmMagnet = getattr(attoDRYLib,'AttoDRY_Interface_setReservoirTsetWarmMagnet')
-setReservoirTsetWarmSample = getattr(attoDRYLib,'AttoDRY_Interface_setReservoirTsetWarmSample')
-setSampleHeaterMaximumPower = getattr(attoDRYLib,'AttoDRY_Interface_setSampleHeaterMaximumPower')
-setSampleHeaterPower = getattr(attoDRYLib,'AttoDRY_Interface_setSampleHeaterPower')
-setSampleHeaterResistance = getattr(attoDRYLib,'AttoDRY_Interface_setSampleHeaterResistance')
-setSampleHeaterWireResistance = getattr(attoDRYLib,'AttoDRY_Interface_setSampleHeaterWireResistance')
-setUserMagneticField = getattr(attoDRYLib,'AttoDRY_Interface_setUserMagneticField')
-setUserTemperature = getattr(attoDRYLib,'AttoDRY_Interface_setUserTemperature')
-setVTIHeaterPower = getattr(attoDRYLib,'AttoDRY_Interface_setVTIHeaterPower')
+ATTODRY1100 = 0
+ATTODRY2100 = 1
+ATTODRY800 = 2
 
+models = {ATTODRY1100: 'attoDRY1100', ATTODRY2100: 'attoDRY2100', ATTODRY800: 'attoDRY800'}
+
+ALL = (ATTODRY1100, ATTODRY2100, ATTODRY800)
+ONLY1100 = (ATTODRY1100,)
+ONLY2100 = (ATTODRY2100,)
+ONLY800 = (ATTODRY800,)
+# the 800 has its own pressure gauge and turbopump functions (getPressure800, GetTurbopumpFrequ800)
+NOT800 = (ATTODRY1100, ATTODRY2100)
+
+# the model selected by begin(); None means no model was selected yet and every alias may be used
+model = None
 
 
 #############################################################################################################
-##### error checking and handling...
+##### aliases for the DLL functions: alias -> (exported symbol, models the symbol is valid for)
+##### The symbols are only resolved (and get checkError attached) when they are used for the first time.
 #############################################################################################################
 
-##### communication
-getActionMessage.errcheck = checkError
-begin.errcheck = checkError
-Cancel.errcheck = checkError
-Confirm.errcheck = checkError
-Connect.errcheck = checkError
-Main.errcheck = checkError
-Disconnect.errcheck = checkError
-end.errcheck = checkError
-getAttodryErrorMessage.errcheck = checkError
-getAttodryErrorStatus.errcheck = checkError
-goToBaseTemperature.errcheck = checkError
-lowerError.errcheck = checkError
-startLogging.errcheck = checkError
-startSampleExchange.errcheck = checkError
-stopLogging.errcheck = checkError
-sweepFieldToZero.errcheck = checkError
-downloadSampleTemperatureSensorCalibrationCurve.errcheck = checkError
-downloadTemperatureSensorCalibrationCurve.errcheck = checkError
-uploadSampleTemperatureCalibrationCurve.errcheck = checkError
-uploadTemperatureCalibrationCurve.errcheck = checkError
-LVDLLStatus.errcheck = checkError
-
-##### asking questions
-isControllingField.errcheck = checkError
-isControllingTemperature.errcheck = checkError
-isDeviceConnected.errcheck = checkError
-isDeviceInitialised.errcheck = checkError
-isGoingToBaseTemperature.errcheck = checkError
-isExchangeHeaterOn.errcheck = checkError
-isPersistentModeSet.errcheck = checkError
-isPumping.errcheck = checkError
-isSampleExchangeInProgress.errcheck = checkError
-isSampleHeaterOn.errcheck = checkError
-isSampleReadyToExchange.errcheck = checkError
-isSystemRunning.errcheck = checkError
-isPumping.errcheck = checkError
-isZeroingField.errcheck = checkError
-
-##### queries
-queryReservoirTsetColdSample.errcheck = checkError 
-queryReservoirTsetWarmMagnet.errcheck = checkError
-queryReservoirTsetWarmSample.errcheck = checkError
-querySampleHeaterMaximumPower.errcheck = checkError
-querySampleHeaterResistance.errcheck = checkError
-querySampleHeaterWireResistance.errcheck = checkError
-
-##### toggle commands
-toggleCryostatInValve.errcheck = checkError
-toggleCryostatOutValve.errcheck = checkError
-toggleDumpInValve.errcheck = checkError
-toggleDumpOutValve.errcheck = checkError
-toggleExchangeHeaterControl.errcheck = checkError
-toggleFullTemperatureControl.errcheck = checkError
-toggleHeliumValve.errcheck = checkError
-toggleInnerVolumeValve.errcheck = checkError
-toggleOuterVolumeValve.errcheck = checkError
-toggleMagneticFieldControl.errcheck = checkError
-togglePersistentMode.errcheck = checkError
-togglePump.errcheck = checkError
-togglePumpValve.errcheck = checkError
-toggleSampleTemperatureControl.errcheck = checkError
-toggleStartUpShutdown.errcheck = checkError
-
-##### get values
-getCryostatInPressure.errcheck = checkError
-getCryostatInValve.errcheck = checkError
-getCryostatOutPressure.errcheck = checkError
-getCryostatOutValve.errcheck = checkError
-getDumpInValve.errcheck = checkError
-getDumpOutValve.errcheck = checkError
-getDumpPressure.errcheck = checkError
-getHeliumValve.errcheck = checkError
-getInnerVolumeValve.errcheck = checkError
-getOuterVolumeValve.errcheck = checkError
-getReservoirHeaterPower.errcheck = checkError
-getReservoirTemperature.errcheck = checkError
-getReservoirTsetColdSample.errcheck = checkError
-getReservoirTsetWarmMagnet.errcheck = checkError
-getReservoirTsetWarmSample.errcheck = checkError
-getPressure.errcheck = checkError
-get40KStageTemperature.errcheck = checkError
-get4KStageTemperature.errcheck = checkError
-getDerivativeGain.errcheck = checkError
-getIntegralGain.errcheck = checkError
-getMagneticField.errcheck = checkError
-getMagneticFieldSetPoint.errcheck = checkError
-getProportionalGain.errcheck = checkError
-getSampleHeaterMaximumPower.errcheck = checkError
-getSampleHeaterPower.errcheck = checkError
-getSampleHeaterResistance.errcheck = checkError
-getSampleHeaterWireResistance.errcheck = checkError
-getSampleTemperature.errcheck = checkError
-getUserTemperature.errcheck = checkError
-getVtiHeaterPower.errcheck = checkError
-getVtiTemperature.errcheck = checkError
-getPumpValve.errcheck = checkError
-getTurbopumpFrequency.errcheck = checkError
-
-##### set values
-setDerivativeGain.errcheck = checkError
-setIntegralGain.errcheck = checkError
-setProportionalGain.errcheck = checkError
-setReservoirTsetColdSample.errcheck = checkError
-setReservoirTsetWarmMagnet.errcheck = checkError
-setReservoirTsetWarmSample.errcheck = checkError
-setSampleHeaterMaximumPower.errcheck = checkError
-setSampleHeaterPower.errcheck = checkError
-setSampleHeaterResistance.errcheck = checkError
-setSampleHeaterWireResistance.errcheck = checkError
-setUserMagneticField.errcheck = checkError
-setUserTemperature.errcheck = checkError
-setVTIHeaterPower.errcheck = checkError
\ No newline at end of file
+functions = {
+    ##### communication
+    'getActionMessage': ('AttoDRY_Interface_getActionMessage', ALL),
+    'begin': ('AttoDRY_Interface_begin', ALL),
+    'Cancel': ('AttoDRY_Interface_Cancel', ALL),
+    'Confirm': ('AttoDRY_Interface_Confirm', ALL),
+    'Connect': ('AttoDRY_Interface_Connect', ALL),
+    'Main': ('AttoDRY_Interface_Main', ALL),
+    'Disconnect': ('AttoDRY_Interface_Disconnect', ALL),
+    'end': ('AttoDRY_Interface_end', ALL),
+    'getAttodryErrorMessage': ('AttoDRY_Interface_getAttodryErrorMessage', ALL),
+    'getAttodryErrorStatus': ('AttoDRY_Interface_getAttodryErrorStatus', ALL),
+    'goToBaseTemperature': ('AttoDRY_Interface_goToBaseTemperature', ALL),
+    'lowerError': ('AttoDRY_Interface_lowerError', ALL),
+    'LVDLLStatus': ('LVDLLStatus', ALL),
+    'startLogging': ('AttoDRY_Interface_startLogging', ALL),
+    'startSampleExchange': ('AttoDRY_Interface_startSampleExchange', ALL),
+    'stopLogging': ('AttoDRY_Interface_stopLogging', ALL),
+    'sweepFieldToZero': ('AttoDRY_Interface_sweepFieldToZero', ALL),
+    'downloadSampleTemperatureSensorCalibrationCurve': ('AttoDRY_Interface_downloadSampleTemperatureSensorCalibrationCurve', ALL),
+    'downloadTemperatureSensorCalibrationCurve': ('AttoDRY_Interface_downloadTemperatureSensorCalibrationCurve', ALL),
+    'uploadSampleTemperatureCalibrationCurve': ('AttoDRY_Interface_uploadSampleTemperatureCalibrationCurve', ALL),
+    'uploadTemperatureCalibrationCurve': ('AttoDRY_Interface_uploadTemperatureCalibrationCurve', ALL),
+
+    ##### asking questions
+    'isControllingField': ('AttoDRY_Interface_isControllingField', ALL),
+    'isControllingTemperature': ('AttoDRY_Interface_isControllingTemperature', ALL),
+    'isDeviceConnected': ('AttoDRY_Interface_isDeviceConnected', ALL),
+    'isDeviceInitialised': ('AttoDRY_Interface_isDeviceInitialised', ALL),
+    'isGoingToBaseTemperature': ('AttoDRY_Interface_isGoingToBaseTemperature', ALL),
+    'isExchangeHeaterOn': ('AttoDRY_Interface_isExchangeHeaterOn', ALL),
+    'isPersistentModeSet': ('AttoDRY_Interface_isPersistentModeSet', ALL),
+    'isPumping': ('AttoDRY_Interface_isPumping', ALL),
+    'isSampleExchangeInProgress': ('AttoDRY_Interface_isSampleExchangeInProgress', ALL),
+    'isSampleHeaterOn': ('AttoDRY_Interface_isSampleHeaterOn', ALL),
+    'isSampleReadyToExchange': ('AttoDRY_Interface_isSampleReadyToExchange', ALL),
+    'isSystemRunning': ('AttoDRY_Interface_isSystemRunning', ALL),
+    'isZeroingField': ('AttoDRY_Interface_isZeroingField', ALL),
+
+    ##### queries
+    'queryReservoirTsetColdSample': ('AttoDRY_Interface_queryReservoirTsetColdSample', ALL),
+    'queryReservoirTsetWarmMagnet': ('AttoDRY_Interface_queryReservoirTsetWarmMagnet', ALL),
+    'queryReservoirTsetWarmSample': ('AttoDRY_Interface_queryReservoirTsetWarmSample', ALL),
+    'querySampleHeaterMaximumPower': ('AttoDRY_Interface_querySampleHeaterMaximumPower', ALL),
+    'querySampleHeaterResistance': ('AttoDRY_Interface_querySampleHeaterResistance', ALL),
+    'querySampleHeaterWireResistance': ('AttoDRY_Interface_querySampleHeaterWireResistance', ALL),
+
+    ##### toggle commands
+    'toggleCryostatInValve': ('AttoDRY_Interface_toggleCryostatInValve', ONLY2100),
+    'toggleCryostatOutValve': ('AttoDRY_Interface_toggleCryostatOutValve', ONLY2100),
+    'toggleDumpInValve': ('AttoDRY_Interface_toggleDumpInValve', ONLY2100),
+    'toggleDumpOutValve': ('AttoDRY_Interface_toggleDumpOutValve', ONLY2100),
+    'toggleExchangeHeaterControl': ('AttoDRY_Interface_toggleExchangeHeaterControl', ALL),
+    'toggleFullTemperatureControl': ('AttoDRY_Interface_toggleFullTemperatureControl', ALL),
+    'toggleHeliumValve': ('AttoDRY_Interface_toggleHeliumValve', ONLY1100),
+    'toggleInnerVolumeValve': ('AttoDRY_Interface_toggleInnerVolumeValve', ONLY1100),
+    'toggleOuterVolumeValve': ('AttoDRY_Interface_toggleOuterVolumeValve', ONLY1100),
+    'toggleMagneticFieldControl': ('AttoDRY_Interface_toggleMagneticFieldControl', ALL),
+    'togglePersistentMode': ('AttoDRY_Interface_togglePersistentMode', ALL),
+    'togglePump': ('AttoDRY_Interface_togglePump', ALL),
+    'togglePumpValve': ('AttoDRY_Interface_togglePumpValve', ONLY1100),
+    'toggleSampleTemperatureControl': ('AttoDRY_Interface_toggleSampleTemperatureControl', ALL),
+    'toggleStartUpShutdown': ('AttoDRY_Interface_toggleStartUpShutdown', ALL),
+    'toggleSampleSpace800Valve': ('AttoDRY_Interface_toggleSampleSpace800Valve', ONLY800),
+    'togglePump800Valve': ('AttoDRY_Interface_togglePump800Valve', ONLY800),
+    'toggleBreakVac800Valve': ('AttoDRY_Interface_toggleBreakVac800Valve', ONLY800),
+
+    ##### get values
+    'getCryostatInPressure': ('AttoDRY_Interface_getCryostatInPressure', ONLY2100),
+    'getCryostatInValve': ('AttoDRY_Interface_getCryostatInValve', ONLY2100),
+    'getCryostatOutPressure': ('AttoDRY_Interface_getCryostatOutPressure', ONLY2100),
+    'getCryostatOutValve': ('AttoDRY_Interface_getCryostatOutValve', ONLY2100),
+    'getDumpInValve': ('AttoDRY_Interface_getDumpInValve', ONLY2100),
+    'getDumpOutValve': ('AttoDRY_Interface_getDumpOutValve', ONLY2100),
+    'getDumpPressure': ('AttoDRY_Interface_getDumpPressure', ONLY2100),
+    'getHeliumValve': ('AttoDRY_Interface_getHeliumValve', ONLY1100),
+    'getInnerVolumeValve': ('AttoDRY_Interface_getInnerVolumeValve', ONLY1100),
+    'getOuterVolumeValve': ('AttoDRY_Interface_getOuterVolumeValve', ONLY1100),
+    'getReservoirHeaterPower': ('AttoDRY_Interface_getReservoirHeaterPower', ONLY2100),
+    'getReservoirTemperature': ('AttoDRY_Interface_getReservoirTemperature', ONLY2100),
+    'getReservoirTsetColdSample': ('AttoDRY_Interface_getReservoirTsetColdSample', ALL),
+    'getReservoirTsetWarmMagnet': ('AttoDRY_Interface_getReservoirTsetWarmMagnet', ALL),
+    'getReservoirTsetWarmSample': ('AttoDRY_Interface_getReservoirTsetWarmSample', ALL),
+    'getPressure': ('AttoDRY_Interface_getPressure', NOT800),
+    'get40KStageTemperature': ('AttoDRY_Interface_get40KStageTemperature', ALL),
+    'get4KStageTemperature': ('AttoDRY_Interface_get4KStageTemperature', ALL),
+    'getDerivativeGain': ('AttoDRY_Interface_getDerivativeGain', ALL),
+    'getIntegralGain': ('AttoDRY_Interface_getIntegralGain', ALL),
+    'getMagneticField': ('AttoDRY_Interface_getMagneticField', ALL),
+    'getMagneticFieldSetPoint': ('AttoDRY_Interface_getMagneticFieldSetPoint', ALL),
+    'getProportionalGain': ('AttoDRY_Interface_getProportionalGain', ALL),
+    'getSampleHeaterMaximumPower': ('AttoDRY_Interface_getSampleHeaterMaximumPower', ALL),
+    'getSampleHeaterPower': ('AttoDRY_Interface_getSampleHeaterPower', ALL),
+    'getSampleHeaterResistance': ('AttoDRY_Interface_getSampleHeaterResistance', ALL),
+    'getSampleHeaterWireResistance': ('AttoDRY_Interface_getSampleHeaterWireResistance', ALL),
+    'getSampleTemperature': ('AttoDRY_Interface_getSampleTemperature', ALL),
+    'getUserTemperature': ('AttoDRY_Interface_getUserTemperature', ALL),
+    'getVtiHeaterPower': ('AttoDRY_Interface_getVtiHeaterPower', ALL),
+    'getVtiTemperature': ('AttoDRY_Interface_getVtiTemperature', ALL),
+    'getPumpValve': ('AttoDRY_Interface_getPumpValve', ONLY1100),
+    'getTurbopumpFrequency': ('AttoDRY_Interface_getTurbopumpFrequency', NOT800),
+    'getPressure800': ('AttoDRY_Interface_getPressure800', ONLY800),
+    'GetTurbopumpFrequ800': ('AttoDRY_Interface_GetTurbopumpFrequ800', ONLY800),
+    'getBreakVac800Valve': ('AttoDRY_Interface_getBreakVac800Valve', ONLY800),
+    'getPump800Valve': ('AttoDRY_Interface_getPump800Valve', ONLY800),
+    'getSampleSpace800Valve': ('AttoDRY_Interface_getSampleSpace800Valve', ONLY800),
+
+    ##### set values
+    'setDerivativeGain': ('AttoDRY_Interface_setDerivativeGain', ALL),
+    'setIntegralGain': ('AttoDRY_Interface_setIntegralGain', ALL),
+    'setProportionalGain': ('AttoDRY_Interface_setProportionalGain', ALL),
+    'setReservoirTsetColdSample': ('AttoDRY_Interface_setReservoirTsetColdSample', ALL),
+    'setReservoirTsetWarmMagnet': ('AttoDRY_Interface_setReservoirTsetWarmMagnet', ALL),
+    'setReservoirTsetWarmSample': ('AttoDRY_Interface_setReservoirTsetWarmSample', ALL),
+    'setSampleHeaterMaximumPower': ('AttoDRY_Interface_setSampleHeaterMaximumPower', ALL),
+    'setSampleHeaterPower': ('AttoDRY_Interface_setSampleHeaterPower', ALL),
+    'setSampleHeaterResistance': ('AttoDRY_Interface_setSampleHeaterResistance', ALL),
+    'setSampleHeaterWireResistance': ('AttoDRY_Interface_setSampleHeaterWireResistance', ALL),
+    'setUserMagneticField': ('AttoDRY_Interface_setUserMagneticField', ALL),
+    'setUserTemperature': ('AttoDRY_Interface_setUserTemperature', ALL),
+    'setVTIHeaterPower': ('AttoDRY_Interface_setVTIHeaterPower', ALL),
+}
+
+
+#############################################################################################################
+##### argument types of the exported functions, as declared in the header files. The functions that are
+##### not listed follow the naming rules in signature(). AttoDRYconformance checks the wrappers against them.
+#############################################################################################################
+
+arguments = {
+    'begin': (ctypes.c_uint16,),
+    'Connect': (ctypes.c_char_p,),
+    'LVDLLStatus': (ctypes.c_char_p, ctypes.c_int, ctypes.c_void_p),
+    'getActionMessage': (ctypes.c_char_p, ctypes.c_int),
+    'getAttodryErrorMessage': (ctypes.c_char_p, ctypes.c_int),
+    'getAttodryErrorStatus': (ctypes.POINTER(ctypes.c_int),),
+    'downloadSampleTemperatureSensorCalibrationCurve': (ctypes.c_char_p,),
+    'downloadTemperatureSensorCalibrationCurve': (ctypes.c_int, ctypes.c_char_p),
+    'uploadSampleTemperatureCalibrationCurve': (ctypes.c_char_p,),
+    'uploadTemperatureCalibrationCurve': (ctypes.c_int, ctypes.c_char_p),
+    'startLogging': (ctypes.c_char_p, ctypes.c_int, ctypes.c_int),
+}
+
+
+def signature(name):
+    """
+    Returns the argument types of the alias <name>: the entry in arguments, or
+    by its name: is.../get...Valve return an int, other get... a float
+    (through a pointer), set... take a float, everything else takes nothing
+    """
+    if name in arguments:
+        return arguments[name]
+    if name.startswith('is') or (name.startswith('get') and name.endswith('Valve')):
+        return (ctypes.POINTER(ctypes.c_int),)
+    if name.lower().startswith('get'):
+        return (ctypes.POINTER(ctypes.c_float),)
+    if name.startswith('set'):
+        return (ctypes.c_float,)
+    return ()
+
+
+def available(name):
+    """
+    Returns True if the alias <name> may be used with the selected model
+    """
+    if name not in functions:
+        return False
+    return model is None or model in functions[name][1]
+
+
+def setModel(setup_version):
+    """
+    Selects the profile for the given setup version (0: attoDRY1100, 1: attoDRY2100,
+    2: attoDRY800). Aliases that were already resolved but are not valid for this
+    model are dropped again, so that calling them fails before reaching the DLL.
+    """
+    global model
+    if setup_version is not None and setup_version not in models:
+        raise Exception('Error: unknown setup version: '+str(setup_version))
+    model = setup_version
+    for name in functions:
+        if name in globals() and not available(name):
+            del globals()[name]
+
+
+def __getattr__(name):
+    # only called for aliases that have not been resolved yet (or were dropped by setModel/useBackend)
+    if name not in functions:
+        raise AttributeError("module 'AttoDRYlib' has no attribute '"+name+"'")
+    if not available(name):
+        raise AttributeError(name+' is not available on the '+models[model])
+    export = functions[name][0]
+    lib = load()
+    if isinstance(lib, ctypes.CDLL) and not _hooks:
+        func = getattr(lib, export)
+        func.errcheck = checkError
+    else:
+        # lib[export] is a new function pointer without the errcheck of getattr(lib, export)
+        func = lib[export] if isinstance(lib, ctypes.CDLL) else getattr(lib, export)
+        for hook in _hooks:
+            func = hook(name, export, func)
+        func = _checked(func, export)
+    globals()[name] = func
+    return func
+
+
+def _checked(func, export):
+    # does what errcheck does for the ctypes functions, for hooked functions and backends set with useBackend()
+    def checked(*args):
+        return checkError(func(*args), checked, args)
+    checked.__name__ = export
+    return checked
@@ -0,0 +1,147 @@
+# Managed field changes, with and without persistent mode.
+# Magnet.setField runs the sequence of DLL calls for a field change (wait for a running sweep to
+# zero, set point, persistent mode flag, field control) and then waits for the completion on the
+# flags and the field reading instead of a fixed worst-case delay. The whole change has one time
+# budget; if it runs out, an Exception names the step that did not complete. The duration of
+# every step is kept in Magnet.steps, e.g. to learn the ramp rates of the magnet.
+# Magnet.leavePersistent ramps the supply to the persistent field before the switch heater is
+# turned on again, so the magnet current does not jump.
+#
+# usage:
+#	magnet = Magnet(tolerance=0.001)
+#	magnet.setField(0.5, persistent=True, timeout=600)	# ramp to 0.5 T and stay persistent
+#	magnet.leavePersistent()
+#	magnet.zero()
+
+import logging
+
+import AttoDRYclock
+import PyAttoDRY
+
+log = logging.getLogger(__name__)
+
+
+class Magnet:
+
+	def __init__(self, dev=None, tolerance=0.001, stable=5.0, interval=0.5, switchTime=0.0, timeout=3600.0):
+		"""
+		Controls the magnet of the AttoDRY <dev> (default: the running one).
+		The field is reached when it stays within <tolerance> (Tesla) of the set
+		point for <stable> seconds; the flags and the field are read every
+		<interval> seconds. <switchTime> is the time the persistent switch needs
+		to cool down after the field is reached in persistent mode, or to warm
+		up when persistent mode is left (the DLL has no flag for it). <timeout>
+		is the default time budget of a change.
+		"""
+		self.dev = PyAttoDRY.device(dev)
+		self.tolerance = tolerance
+		self.stable = stable
+		self.interval = interval
+		self.switchTime = switchTime
+		self.timeout = timeout
+		# (step, seconds) of the last change
+		self.steps = []
+		self._deadline = None
+
+	def _remaining(self, step):
+		remaining = self._deadline - AttoDRYclock.monotonic()
+		if remaining <= 0:
+			raise Exception('Error: the field change ran out of time before '+step)
+		return remaining
+
+	def _step(self, step, predicate):
+		start = AttoDRYclock.monotonic()
+		try:
+			AttoDRYclock.waitUntil(predicate, self._remaining(step), self.interval)
+		except Exception:
+			if AttoDRYclock.monotonic() < self._deadline:
+				raise
+			raise Exception('Error: the field change ran out of time while waiting for '+step)
+		self.steps.append((step, AttoDRYclock.monotonic() - start))
+		log.debug('%s took %.1f s', step, self.steps[-1][1])
+
+	def _setFlag(self, step, getter, toggle, value):
+		# toggles the flag read by <getter> to <value> and waits until the device reports it
+		if (getter() == 1) != value:
+			toggle()
+			self._step(step, lambda: (getter() == 1) == value)
+
+	def _begin(self, timeout):
+		self.steps = []
+		self._deadline = AttoDRYclock.monotonic() + (self.timeout if timeout is None else timeout)
+
+	def setField(self, field, persistent=None, timeout=None):
+		"""
+		Ramps to <field> (Tesla) with field control and waits until it is reached.
+		With <persistent> True the magnet is left in persistent mode, with False
+		persistent mode is switched off first, with None it is left as it is.
+		Returns the field.
+		"""
+		dev = self.dev
+		self._begin(timeout)
+		if dev.isZeroingField() == 1:
+			self._step('the sweep to zero', lambda: dev.isZeroingField() != 1)
+		dev.setUserMagneticField(field)
+		if persistent is not None:
+			# the switch heater is turned off once the field is reached, so the flag has to be set before the ramp
+			self._setFlag('persistent mode '+('on' if persistent else 'off'), dev.isPersistentModeSet, dev.togglePersistentMode, persistent)
+		value = self._ramp(field)
+		if persistent:
+			self._switch()
+		return value
+
+	def _ramp(self, field):
+		# field control on, then waits for the set point and until the field is stable at <field>
+		dev = self.dev
+		self._setFlag('field control on', dev.isControllingField, dev.toggleMagneticFieldControl, True)
+		self._step('the set point', lambda: abs(dev.getMagneticFieldSetPoint() - field) <= self.tolerance)
+		start = AttoDRYclock.monotonic()
+		try:
+			value = AttoDRYclock.waitStable(dev.getMagneticField, field, self.tolerance, self.stable, self._remaining('the ramp'), self.interval)
+		except Exception:
+			if AttoDRYclock.monotonic() < self._deadline:
+				raise
+			raise Exception('Error: the field did not reach '+str(field)+' T within the time budget (now '+str(dev.getMagneticField())+' T)')
+		self.steps.append(('the ramp', AttoDRYclock.monotonic() - start))
+		return value
+
+	def _switch(self):
+		# waits <switchTime> for the persistent switch to close or open
+		if self.switchTime > 0:
+			AttoDRYclock.sleep(min(self.switchTime, self._remaining('the persistent switch')))
+			self.steps.append(('the persistent switch', self.switchTime))
+
+	def enterPersistent(self, field, timeout=None):
+		return self.setField(field, persistent=True, timeout=timeout)
+
+	def leavePersistent(self, field=None, timeout=None):
+		"""
+		Switches persistent mode off. The steps, in this order:
+		1. the supply is ramped to the persistent <field> (Tesla, default: the
+		   last set point) and the field has to be stable there
+		2. the persistent mode flag is cleared (the switch heater is turned on)
+		3. <switchTime> for the switch to open
+		Only then does the supply drive the magnet again, with the current the
+		magnet already carries. Returns the field.
+		"""
+		dev = self.dev
+		self._begin(timeout)
+		if dev.isPersistentModeSet() != 1:
+			return dev.getMagneticField()
+		if field is None:
+			field = dev.getMagneticFieldSetPoint()
+		dev.setUserMagneticField(field)
+		value = self._ramp(field)
+		self._setFlag('persistent mode off', dev.isPersistentModeSet, dev.togglePersistentMode, False)
+		self._switch()
+		return value
+
+	def zero(self, timeout=None):
+		"""
+		Sweeps the field to zero and waits until the sweep is completed
+		"""
+		dev = self.dev
+		self._begin(timeout)
+		dev.sweepFieldToZero()
+		self._step('the sweep to zero', lambda: dev.isZeroingField() != 1 and abs(dev.getMagneticField()) <= self.tolerance)
+		return dev.getMagneticField()
@@ -0,0 +1,231 @@
+# Field-temperature (B-T) maps.
+# plan() orders the points of a map so that the slow temperature changes happen as rarely as
+# possible: the points are grouped by temperature, the temperatures are visited in one direction
+# and the fields of every temperature are swept in a serpentine (each sweep starts at the end
+# nearest to the field of the previous point). Both temperature directions are costed with a
+# CostModel and the cheaper plan is used. The CostModel starts with typical ramp rates and learns
+# the rates of this cryostat from the transitions of every run. MapRun executes a plan, waits
+# until temperature and field are stable at every point, calls the measurement and keeps a
+# checkpoint file, so an interrupted map continues where it stopped.
+#
+# usage:
+#	cost = CostModel.load('cost.json')
+#	points = plan([(T, B) for T in (2, 5, 10, 20) for B in (-1, -0.5, 0, 0.5, 1)], cost)
+#	run = MapRun(points, measure, cost=cost, checkpoint='map.json')
+#	run.run()		# again after an interruption: the points that are done are skipped
+#	cost.save('cost.json')
+
+import json
+import logging
+import os
+
+import AttoDRYclock
+from AttoDRYmagnet import Magnet
+import PyAttoDRY
+
+log = logging.getLogger(__name__)
+
+
+class CostModel:
+	"""
+	Time in seconds of a change of temperature (per direction) or field:
+	offset + |change|/rate, fitted by least squares to the observed changes
+	"""
+
+	# kind -> (offset in s, rate in K/s or T/s, typical change in K or T) before anything was observed
+	defaults = {
+		'warm': (120.0, 0.05, 10.0),
+		'cool': (300.0, 0.01, 10.0),
+		'field': (10.0, 0.01, 1.0),
+	}
+
+	def __init__(self, persistentOverhead=0.0):
+		# kind -> [n, sum x, sum y, sum x*x, sum x*y] of the observations (x: |change|, y: seconds),
+		# starting with two changes of the default model, which the observations soon outweigh
+		self.sums = {}
+		for kind, (offset, rate, change) in self.defaults.items():
+			self.sums[kind] = [0, 0.0, 0.0, 0.0, 0.0]
+			for x in (change/10, change):
+				self._add(self.sums[kind], x, offset + x/rate)
+		self.persistentOverhead = persistentOverhead
+
+	@staticmethod
+	def kind(quantity, start, end):
+		if quantity == 'field':
+			return 'field'
+		return 'warm' if end > start else 'cool'
+
+	@staticmethod
+	def _add(s, x, y):
+		s[0] += 1
+		s[1] += x
+		s[2] += y
+		s[3] += x*x
+		s[4] += x*y
+
+	def observe(self, quantity, start, end, seconds):
+		"""
+		Adds a change of <quantity> ('temperature' or 'field') from <start> to
+		<end> that took <seconds>
+		"""
+		self._add(self.sums[self.kind(quantity, start, end)], abs(end - start), seconds)
+
+	def coefficients(self, kind):
+		"""
+		Returns (offset in s, seconds per K or T) of <kind>
+		"""
+		n, sx, sy, sxx, sxy = self.sums[kind]
+		slope = max((n*sxy - sx*sy)/(n*sxx - sx*sx), 0.0)
+		return max((sy - slope*sx)/n, 0.0), slope
+
+	def cost(self, quantity, start, end, persistent=False):
+		if start == end:
+			return 0.0
+		offset, slope = self.coefficients(self.kind(quantity, start, end))
+		cost = offset + slope*abs(end - start)
+		if persistent and quantity == 'field':
+			cost += self.persistentOverhead
+		return cost
+
+	def save(self, path):
+		with open(path, 'w') as f:
+			json.dump({'sums': self.sums, 'persistentOverhead': self.persistentOverhead}, f)
+
+	@classmethod
+	def load(cls, path):
+		"""
+		Returns the CostModel saved at <path> (a new one if there is no file)
+		"""
+		model = cls()
+		if os.path.exists(path):
+			with open(path) as f:
+				data = json.load(f)
+			model.sums.update(data['sums'])
+			model.persistentOverhead = data['persistentOverhead']
+		return model
+
+
+def planCost(points, cost, start=None, persistent=False):
+	"""
+	Returns the estimated time in seconds to visit <points> (T, B) in order,
+	starting at <start> (T, B)
+	"""
+	total = 0.0
+	previous = start if start is not None else points[0]
+	for T, B in points:
+		total += cost.cost('temperature', previous[0], T) + cost.cost('field', previous[1], B, persistent)
+		previous = (T, B)
+	return total
+
+
+def plan(points, cost=None, start=None, persistent=False):
+	"""
+	Returns <points> (T, B) in the order with the lowest estimated time: the
+	temperatures ascending or descending, the fields of every temperature
+	as a serpentine. <start> is the current (T, B) of the cryostat.
+	"""
+	cost = cost or CostModel()
+	groups = {}
+	for T, B in points:
+		groups.setdefault(T, set()).add(B)
+	best = None
+	for descending in (False, True):
+		order = []
+		field = start[1] if start is not None else None
+		for T in sorted(groups, reverse=descending):
+			fields = sorted(groups[T])
+			if field is not None and abs(fields[-1] - field) < abs(fields[0] - field):
+				fields.reverse()
+			order.extend((T, B) for B in fields)
+			field = fields[-1]
+		total = planCost(order, cost, start, persistent)
+		if best is None or total < best[0]:
+			best = (total, order)
+	return best[1]
+
+
+class MapRun:
+
+	def __init__(self, points, measure, dev=None, cost=None, checkpoint=None, persistent=False,
+			temperatureTolerance=0.05, temperatureStable=120.0, fieldTolerance=0.001, timeout=6*3600.0, interval=1.0):
+		"""
+		Visits <points> (T, B) in order and calls <measure>(T, B) at each of them
+		once the temperature has stayed within <temperatureTolerance> for
+		<temperatureStable> seconds and the field is reached (with persistent
+		mode if <persistent>). <checkpoint> is a JSON file that records the
+		points that are done. <timeout> is the time budget of every change.
+		<dev> is the AttoDRY to use (default: the running one).
+		"""
+		self.points = [tuple(p) for p in points]
+		self.measure = measure
+		self.dev = dev = PyAttoDRY.device(dev)
+		self.cost = cost or CostModel()
+		self.checkpoint = checkpoint
+		self.persistent = persistent
+		self.temperatureTolerance = temperatureTolerance
+		self.temperatureStable = temperatureStable
+		self.timeout = timeout
+		self.interval = interval
+		self.magnet = Magnet(dev, tolerance=fieldTolerance, interval=interval, timeout=timeout)
+		self.done = set()
+		self._loadCheckpoint()
+
+	def _loadCheckpoint(self):
+		if self.checkpoint is None or not os.path.exists(self.checkpoint):
+			return
+		with open(self.checkpoint) as f:
+			data = json.load(f)
+		if [tuple(p) for p in data['points']] != self.points:
+			raise Exception('Error: the checkpoint '+self.checkpoint+' belongs to a different map')
+		self.done = set(data['done'])
+
+	def _saveCheckpoint(self):
+		if self.checkpoint is None:
+			return
+		# write and rename, so an interruption never leaves a broken checkpoint
+		temporary = self.checkpoint + '.tmp'
+		with open(temporary, 'w') as f:
+			json.dump({'points': self.points, 'done': sorted(self.done)}, f)
+		os.replace(temporary, self.checkpoint)
+
+	def remaining(self):
+		"""
+		Returns the estimated time in seconds for the points that are not done
+		"""
+		points = [p for i, p in enumerate(self.points) if i not in self.done]
+		if not points:
+			return 0.0
+		return planCost(points, self.cost, (self.dev.getUserTemperature(), self.dev.getMagneticField()), self.persistent)
+
+	def setTemperature(self, T):
+		dev = self.dev
+		start = dev.getSampleTemperature()
+		began = AttoDRYclock.monotonic()
+		dev.setUserTemperature(T)
+		if dev.isControllingTemperature() != 1:
+			dev.toggleFullTemperatureControl()
+		AttoDRYclock.waitStable(dev.getSampleTemperature, T, self.temperatureTolerance, self.temperatureStable, self.timeout, self.interval)
+		# the stabilisation time is part of every change and is learned with it
+		self.cost.observe('temperature', start, T, AttoDRYclock.monotonic() - began)
+
+	def setField(self, B):
+		start = self.dev.getMagneticField()
+		began = AttoDRYclock.monotonic()
+		self.magnet.setField(B, persistent=self.persistent or None)
+		self.cost.observe('field', start, B, AttoDRYclock.monotonic() - began)
+
+	def run(self):
+		"""
+		Visits all points that are not done yet
+		"""
+		for i, (T, B) in enumerate(self.points):
+			if i in self.done:
+				continue
+			if abs(self.dev.getUserTemperature() - T) > 1e-3 or abs(self.dev.getSampleTemperature() - T) > self.temperatureTolerance:
+				self.setTemperature(T)
+			if abs(self.dev.getMagneticField() - B) > self.magnet.tolerance:
+				self.setField(B)
+			log.info('point %d of %d: T = %g K, B = %g T', i + 1, len(self.points), T, B)
+			self.measure(T, B)
+			self.done.add(i)
+			self._saveCheckpoint()
@@ -0,0 +1,94 @@
+# Feed of the action and error messages of the attoDRY.
+# MessageFeed reads both messages into two string buffers that are allocated once and reused, and
+# only publishes a MessageEvent when a message changed, so a message that stays on the display
+# for an hour is reported once (and once more when it disappears, with an empty text). The last
+# events are kept in a bounded history for UIs and logs that start later. The feed reads the
+# messages with every snapshot of a Poller, or with pollOnce().
+#
+# usage:
+#	feed = MessageFeed(history=200)
+#	feed.subscribe(lambda e: print(e.kind, e.text))
+#	feed.attach(poller)
+#	feed.since(t)		# the events after unix time t
+
+import collections
+import ctypes
+import logging
+
+import AttoDRYclock
+import PyAttoDRY
+
+log = logging.getLogger(__name__)
+
+# <kind>: 'action' or 'error'; <text>: the new message ('' when it was cleared); <previous>: the message before
+MessageEvent = collections.namedtuple('MessageEvent', ['time', 'kind', 'text', 'previous'])
+
+
+class MessageFeed:
+
+	def __init__(self, dev=None, history=100, length=500):
+		"""
+		Reads the messages of the AttoDRY <dev> (default: the running one) into
+		buffers of <length> bytes and keeps the last <history> events
+		"""
+		self.dev = dev = PyAttoDRY.device(dev)
+		self.history = collections.deque(maxlen=history)
+		self.errors = 0
+		# kind -> (getter, buffer)
+		self._readers = {
+			'action': (dev.getActionMessage, ctypes.create_string_buffer(length)),
+			'error': (dev.getAttodryErrorMessage, ctypes.create_string_buffer(length)),
+		}
+		self._messages = dict((kind, '') for kind in self._readers)
+		self._subscribers = []
+
+	def subscribe(self, callback):
+		"""
+		Calls <callback>(event) for every change of a message
+		"""
+		self._subscribers.append(callback)
+
+	def unsubscribe(self, callback):
+		self._subscribers.remove(callback)
+
+	def attach(self, poller):
+		poller.subscribe(lambda snapshot: self.pollOnce(snapshot.time))
+
+	def message(self, kind):
+		"""
+		Returns the current 'action' or 'error' message
+		"""
+		return self._messages[kind]
+
+	def pollOnce(self, time=None):
+		"""
+		Reads both messages and publishes and returns the events of the ones
+		that changed; <time> defaults to AttoDRYclock.now()
+		"""
+		time = AttoDRYclock.now() if time is None else time
+		events = []
+		for kind, (getter, buffer) in self._readers.items():
+			try:
+				text = getter(buffer=buffer)
+			except Exception as e:
+				self.errors += 1
+				log.debug('reading the %s message failed: %s', kind, e)
+				continue
+			previous = self._messages[kind]
+			if text != previous:
+				self._messages[kind] = text
+				events.append(MessageEvent(time, kind, text, previous))
+		for event in events:
+			self.history.append(event)
+			for callback in list(self._subscribers):
+				try:
+					callback(event)
+				except Exception:
+					log.exception('message subscriber %r failed', callback)
+		return events
+
+	def since(self, time):
+		"""
+		Returns the kept events after unix time <time>
+		"""
+		return [event for event in self.history if event.time > time]
@@ -0,0 +1,98 @@
+# Prometheus/OpenMetrics exporter for the attoDRY telemetry.
+# The exposition text is rendered once per Poller snapshot and every scrape returns the same
+# cached bytes, so scrapes never call the DLL and take the same time no matter how many
+# scrapers there are.
+#
+# usage:
+#	poller = Poller(interval=5.0)
+#	MetricsServer(poller, port=9101).start()
+#	poller.start()
+
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import AttoDRYchannels
+
+# channel -> (metric name, help text). The channels of different models that measure the same
+# quantity (e.g. getPressure and getPressure800) share a metric name, so dashboards work for
+# all models; a model has at most one channel per metric name.
+metrics = dict((c.name, (c.metric, c.description)) for c in AttoDRYchannels.registry)
+
+
+def render(snapshot, polls=None):
+	"""
+	Returns the Prometheus text exposition of <snapshot> as bytes
+	"""
+	# metric name -> (help text, values), HELP and TYPE are written once per metric
+	families = {}
+	for channel, value in snapshot.values.items():
+		if channel not in metrics:
+			continue
+		name, description = metrics[channel]
+		if isinstance(value, float) and math.isnan(value):
+			value = 'NaN'
+		families.setdefault(name, (description, []))[1].append(value)
+	lines = []
+	for name, (description, values) in families.items():
+		lines.append('# HELP '+name+' '+description)
+		lines.append('# TYPE '+name+' gauge')
+		lines.extend(name+' '+str(value) for value in values)
+	lines.append('# HELP attodry_snapshot_timestamp_seconds Unix time of the last readout')
+	lines.append('# TYPE attodry_snapshot_timestamp_seconds gauge')
+	lines.append('attodry_snapshot_timestamp_seconds '+repr(snapshot.time))
+	if polls is not None:
+		lines.append('# HELP attodry_polls_total Number of readouts')
+		lines.append('# TYPE attodry_polls_total counter')
+		lines.append('attodry_polls_total '+str(polls))
+	return ('\n'.join(lines)+'\n').encode('utf-8')
+
+
+class MetricsServer:
+
+	def __init__(self, poller, port=9101, host=''):
+		"""
+		Serves the snapshots of <poller> on http://<host>:<port>/metrics
+		"""
+		self.poller = poller
+		self.body = None
+		server = self
+
+		class Handler(BaseHTTPRequestHandler):
+			def do_GET(self):
+				body = server.body
+				if self.path.split('?')[0] not in ('/', '/metrics'):
+					self.send_error(404)
+				elif body is None:
+					self.send_error(503, 'no readout yet')
+				else:
+					self.send_response(200)
+					self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+					self.send_header('Content-Length', str(len(body)))
+					self.end_headers()
+					self.wfile.write(body)
+
+			def log_message(self, *args):
+				pass
+
+		self.httpd = ThreadingHTTPServer((host, port), Handler)
+		self.httpd.daemon_threads = True
+		self._thread = None
+		if poller.snapshot is not None:
+			self.update(poller.snapshot)
+		poller.subscribe(self.update)
+
+	def update(self, snapshot):
+		self.body = render(snapshot, self.poller.polls)
+
+	def start(self):
+		self._thread = threading.Thread(target=self.httpd.serve_forever, name='AttoDRYmetrics', daemon=True)
+		self._thread.start()
+
+	def stop(self):
+		self.poller.unsubscribe(self.update)
+		self.httpd.shutdown()
+		self.httpd.server_close()
+		if self._thread is not None:
+			self._thread.join()
+			self._thread = None
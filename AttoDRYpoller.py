@@ -0,0 +1,101 @@
+# Periodic readout of the attoDRY channels.
+# The Poller reads every channel of the selected model once per interval and keeps the last
+# Snapshot, so that any number of consumers (metrics exporter, alarms, UIs, ...) can use the
+# same values without calling the DLL themselves. Consumers either read Poller.snapshot or
+# subscribe a callback that is called with every new snapshot.
+
+import collections
+import logging
+import threading
+
+import AttoDRYclock
+import PyAttoDRY
+
+log = logging.getLogger(__name__)
+
+# <time> is the unix time of the readout (AttoDRYclock.now()), <values> maps channel name -> value (nan if the read failed),
+# <monotonic> is the middle of the readout on AttoDRYclock.monotonic() (None for snapshots read from files)
+Snapshot = collections.namedtuple('Snapshot', ['time', 'values', 'monotonic'], defaults=(None,))
+
+
+class Poller:
+
+	def __init__(self, dev=None, channels=None, interval=1.0, gate=None):
+		"""
+		Reads <channels> (default: dev.channels(), i.e. all channels of the model
+		selected with begin) of the AttoDRY <dev> (default: the running one) every
+		<interval> seconds. If <gate> (a threading.Event, e.g. Session.ready) is
+		given, polling is skipped while it is not set.
+		"""
+		self.dev = dev = PyAttoDRY.device(dev)
+		self.channels = tuple(channels) if channels is not None else dev.channels()
+		self.interval = interval
+		self.gate = gate
+		self.snapshot = None
+		self.polls = 0
+		self.errors = 0
+		self._getters = [(name, getattr(dev, name)) for name in self.channels]
+		self._subscribers = []
+		self._stop = threading.Event()
+		self._thread = None
+
+	def subscribe(self, callback):
+		"""
+		Calls <callback>(snapshot) after every poll (from the polling thread)
+		"""
+		self._subscribers.append(callback)
+
+	def unsubscribe(self, callback):
+		self._subscribers.remove(callback)
+
+	def pollOnce(self):
+		"""
+		Reads all channels, stores and publishes the snapshot and returns it
+		"""
+		values = {}
+		start = AttoDRYclock.monotonic()
+		for name, getter in self._getters:
+			try:
+				values[name] = getter()
+			except Exception as e:
+				self.errors += 1
+				log.debug('reading %s failed: %s', name, e)
+				values[name] = float('nan')
+		end = AttoDRYclock.monotonic()
+		snapshot = Snapshot(AttoDRYclock.now(), values, (start + end)/2)
+		self.snapshot = snapshot
+		self.polls += 1
+		for callback in list(self._subscribers):
+			try:
+				callback(snapshot)
+			except Exception:
+				log.exception('snapshot subscriber %r failed', callback)
+		return snapshot
+
+	def start(self):
+		"""
+		Starts polling in a background thread
+		"""
+		self._stop.clear()
+		self._thread = threading.Thread(target=self._run, name='AttoDRYpoller', daemon=True)
+		self._thread.start()
+
+	def stop(self):
+		self._stop.set()
+		if self._thread is not None:
+			self._thread.join()
+			self._thread = None
+
+	def _run(self):
+		# fixed rate: the next poll is scheduled relative to the previous deadline, not to the end of the poll
+		deadline = AttoDRYclock.monotonic()
+		while not self._stop.is_set():
+			if self.gate is None or self.gate.is_set():
+				self.pollOnce()
+			deadline += self.interval
+			delay = deadline - AttoDRYclock.monotonic()
+			if delay < 0:
+				# the poll took longer than the interval; skip the missed deadlines
+				deadline -= delay
+				delay = 0
+			AttoDRYclock.wait(self._stop, delay)
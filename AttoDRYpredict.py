@@ -0,0 +1,198 @@
+# Settle time prediction learned from the telemetry.
+# RampPredictor finds the temperature and field changes in recorded snapshots (a change of the
+# set point, until the reading stays within a tolerance of it) and fits the time they took by
+# least squares, separately per direction (warming, cooling, field) and temperature range:
+#	temperature: seconds = a + b |T_to - T_from| + c |ln(T_to/T_from)|
+#	field:       seconds = a + b |B_to - B_from|
+# predict_settle_time(from, to) then estimates new changes, and timeout() adds a margin of a few
+# standard deviations of the fit, for waits that are tight but safe. The predictor can be used
+# as the cost model of AttoDRYmap.plan and MapRun. numpy is used for the fits if it is installed.
+#
+# usage:
+#	p = RampPredictor()
+#	p.learn('run1.adtel'); p.learn('run2.adtel')
+#	p.predict_settle_time(1.8, 10.0)					# seconds
+#	p.predict_settle_time(0.0, 1.0, 'field')
+#	AttoDRYclock.waitStable(..., timeout=p.timeout(1.8, 10.0))
+
+import bisect
+import math
+
+import AttoDRYtelemetry
+from AttoDRYmap import CostModel
+
+# upper limits of the temperature ranges in K (by the target temperature)
+ranges = (5.0, 20.0, 80.0, math.inf)
+
+# quantity -> (set point channel, reading channel, default tolerance, default stable time in s)
+quantities = {
+	'temperature': ('getUserTemperature', 'getSampleTemperature', 0.05, 60.0),
+	'field': ('getMagneticFieldSetPoint', 'getMagneticField', 0.001, 10.0),
+}
+
+
+def features(quantity, start, end):
+	if quantity == 'field':
+		return [1.0, abs(end - start)]
+	return [1.0, abs(end - start), abs(math.log(max(end, 0.01)/max(start, 0.01)))]
+
+
+def group(quantity, start, end):
+	"""
+	Returns the (direction, range) that a change is fitted with
+	"""
+	if quantity == 'field':
+		return ('field', None)
+	return ('warm' if end > start else 'cool', bisect.bisect_left(ranges, end))
+
+
+def lstsq(X, y):
+	"""
+	Returns the least squares coefficients of X c = y and the standard
+	deviation of the residuals
+	"""
+	try:
+		import numpy
+	except ImportError:
+		numpy = None
+	if numpy is not None:
+		X = numpy.asarray(X, dtype=float)
+		y = numpy.asarray(y, dtype=float)
+		c = numpy.linalg.lstsq(X, y, rcond=None)[0]
+		residuals = y - X @ c
+		return list(c), float(numpy.sqrt(numpy.mean(residuals**2)))
+	# normal equations, solved by Gaussian elimination with partial pivoting
+	n = len(X[0])
+	A = [[sum(row[i]*row[j] for row in X) for j in range(n)] + [sum(row[i]*v for row, v in zip(X, y))] for i in range(n)]
+	for i in range(n):
+		pivot = max(range(i, n), key=lambda k: abs(A[k][i]))
+		A[i], A[pivot] = A[pivot], A[i]
+		if abs(A[i][i]) < 1e-12:
+			A[i][i] = 1e-12
+		for k in range(i + 1, n):
+			f = A[k][i]/A[i][i]
+			for j in range(i, n + 1):
+				A[k][j] -= f*A[i][j]
+	c = [0.0]*n
+	for i in reversed(range(n)):
+		c[i] = (A[i][n] - sum(A[i][j]*c[j] for j in range(i + 1, n)))/A[i][i]
+	residuals = [v - sum(a*b for a, b in zip(row, c)) for row, v in zip(X, y)]
+	return c, math.sqrt(sum(r*r for r in residuals)/len(residuals))
+
+
+class RampPredictor:
+
+	def __init__(self, tolerances=None, stable=None):
+		"""
+		A change is complete when the reading stays within the tolerance of the
+		set point for the stable time; <tolerances> and <stable> map the quantity
+		to them (defaults: 0.05 K / 60 s and 0.001 T / 10 s)
+		"""
+		self.tolerances = dict((q, v[2]) for q, v in quantities.items())
+		self.tolerances.update(tolerances or {})
+		self.stable = dict((q, v[3]) for q, v in quantities.items())
+		self.stable.update(stable or {})
+		# (quantity, start, end, seconds) of all changes
+		self.changes = []
+		self.fallback = CostModel()
+		self._fits = None
+
+	def observe(self, quantity, start, end, seconds):
+		"""
+		Adds a change of <quantity> from <start> to <end> that settled after
+		<seconds>
+		"""
+		self.changes.append((quantity, start, end, seconds))
+		self._fits = None
+
+	def fit(self, snapshots):
+		"""
+		Finds the set point changes in <snapshots> (in time order) and adds them
+		"""
+		active = {}		# quantity -> [start time, from, to, time since the reading is within the tolerance]
+		last = {}		# quantity -> (set point, reading, time) of the previous snapshot
+		found = 0
+		for snapshot in snapshots:
+			for quantity, (setpointChannel, readingChannel, tolerance, stable) in quantities.items():
+				setpoint = snapshot.values.get(setpointChannel)
+				reading = snapshot.values.get(readingChannel)
+				if setpoint is None or reading is None or math.isnan(setpoint) or math.isnan(reading):
+					continue
+				previous = last.get(quantity)
+				last[quantity] = (setpoint, reading, snapshot.time)
+				if previous is not None and abs(setpoint - previous[0]) > 1e-4:
+					# the set point changed some time since the previous snapshot
+					active[quantity] = [(previous[2] + snapshot.time)/2, previous[1], setpoint, None]
+				change = active.get(quantity)
+				if change is None:
+					continue
+				if abs(reading - change[2]) > self.tolerances[quantity]:
+					change[3] = None
+				elif change[3] is None:
+					change[3] = snapshot.time
+				elif snapshot.time - change[3] >= self.stable[quantity]:
+					self.observe(quantity, change[1], change[2], change[3] - change[0])
+					del active[quantity]
+					found += 1
+		return found
+
+	def learn(self, path):
+		"""
+		Adds the changes in the AttoDRYtelemetry file at <path>; returns their
+		number
+		"""
+		return self.fit(AttoDRYtelemetry.iterate(path))
+
+	def _fit(self):
+		# group -> (coefficients, residual deviation); a range needs two changes per coefficient, otherwise the fit
+		# of all ranges of the direction is used
+		fits = {}
+		groups = {}
+		for quantity, start, end, seconds in self.changes:
+			key = group(quantity, start, end)
+			x = features(quantity, start, end)
+			for k in set((key, (key[0], None))):
+				groups.setdefault(k, ([], []))
+				groups[k][0].append(x)
+				groups[k][1].append(seconds)
+		for key, (X, y) in groups.items():
+			if len(y) >= 2*len(X[0]) or (key[1] is None and len(y) > len(X[0])):
+				fits[key] = lstsq(X, y)
+		self._fits = fits
+
+	def _model(self, quantity, start, end):
+		if self._fits is None:
+			self._fit()
+		key = group(quantity, start, end)
+		return self._fits.get(key) or self._fits.get((key[0], None))
+
+	def predict_settle_time(self, start, end, quantity='temperature'):
+		"""
+		Returns the estimated time in seconds until <quantity> ('temperature' or
+		'field') settles at <end> after a set point change from <start>
+		"""
+		if start == end:
+			return 0.0
+		model = self._model(quantity, start, end)
+		if model is None:
+			return self.fallback.cost(quantity, start, end)
+		c = model[0]
+		return max(sum(a*b for a, b in zip(c, features(quantity, start, end))), 0.0)
+
+	predictSettleTime = predict_settle_time
+
+	def timeout(self, start, end, quantity='temperature', sigmas=3.0, minimum=60.0):
+		"""
+		Returns a timeout for the change: the prediction plus <sigmas> standard
+		deviations of the fit (at least <minimum> more seconds)
+		"""
+		model = self._model(quantity, start, end)
+		margin = sigmas*model[1] if model is not None else self.predict_settle_time(start, end, quantity)
+		return self.predict_settle_time(start, end, quantity) + max(margin, minimum)
+
+	def cost(self, quantity, start, end, persistent=False):
+		# the interface of AttoDRYmap.CostModel
+		cost = self.predict_settle_time(start, end, quantity)
+		if persistent and quantity == 'field':
+			cost += self.fallback.persistentOverhead
+		return cost
@@ -0,0 +1,161 @@
+# Multi-resolution telemetry store for long-term trends.
+# Every snapshot updates min/max/mean rollups of each channel at several resolutions (1 s, 1 min
+# and 1 h by default) as it arrives; only finished buckets are written. A query for a time range
+# and a number of points (e.g. the width of a plot in pixels) reads the coarsest resolution that
+# still gives that many points, so plotting months of data reads a few thousand rows instead of
+# every sample. The rollups are kept in an SQLite database.
+#
+# usage:
+#	store = Store('attodry.rollup')
+#	poller.subscribe(store.add)
+#	resolution, rows = store.query('getSampleTemperature', start, end, points=1000)
+#	for t, lo, hi, mean in rows: ...
+
+import math
+import sqlite3
+import threading
+
+import AttoDRYtelemetry
+
+levels = (1, 60, 3600)	# bucket widths in seconds, finest first
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS channels (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS rollups (
+	level INTEGER NOT NULL, channel INTEGER NOT NULL, t INTEGER NOT NULL,
+	min REAL NOT NULL, max REAL NOT NULL, sum REAL NOT NULL, count INTEGER NOT NULL,
+	PRIMARY KEY (level, channel, t)) WITHOUT ROWID;
+'''
+
+
+class Store:
+
+	def __init__(self, path=':memory:', levels=levels, retention=None):
+		"""
+		Keeps rollups of the widths <levels> (seconds) in the SQLite database at
+		<path>. <retention> maps a level to the number of seconds its buckets
+		are kept (default: forever), e.g. {1: 30*86400} to keep the 1 s buckets
+		for a month.
+		"""
+		self.levels = tuple(sorted(levels))
+		self.retention = dict(retention or {})
+		self._db = sqlite3.connect(path, check_same_thread=False)
+		self._db.execute('PRAGMA journal_mode=WAL')
+		self._db.execute('PRAGMA synchronous=NORMAL')
+		self._db.executescript(SCHEMA)
+		self._channels = dict(self._db.execute('SELECT name, id FROM channels'))
+		# (level, channel id) -> [level, channel id, bucket start, min, max, sum, count] of the bucket that is still filling
+		self._open = {}
+		self._lock = threading.Lock()
+		self._pruned = 0
+		self._time = None
+
+	def close(self):
+		with self._lock:
+			self._flush(self._open.values())
+			self._open = {}
+			self._db.commit()
+			self._db.close()
+
+	def _channel(self, name):
+		channel = self._channels.get(name)
+		if channel is None:
+			channel = self._channels[name] = self._db.execute('INSERT INTO channels (name) VALUES (?)', (name,)).lastrowid
+		return channel
+
+	def _flush(self, buckets):
+		# a bucket can already be stored partly (close() writes the buckets that are still filling)
+		self._db.executemany('INSERT INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (level, channel, t) DO UPDATE SET '
+			'min = min(min, excluded.min), max = max(max, excluded.max), sum = sum + excluded.sum, count = count + excluded.count',
+			[tuple(b) for b in buckets])
+
+	def add(self, snapshot):
+		"""
+		Adds <snapshot> to the rollups (can be used as a Poller subscriber).
+		Snapshots have to arrive in time order; nan values are ignored.
+		"""
+		with self._lock:
+			self._time = snapshot.time
+			finished = []
+			for name, value in snapshot.values.items():
+				try:
+					value = float(value)
+				except (TypeError, ValueError):
+					continue
+				if math.isnan(value):
+					continue
+				channel = self._channel(name)
+				for level in self.levels:
+					t = int(snapshot.time//level)*level
+					bucket = self._open.get((level, channel))
+					if bucket is None or bucket[2] != t:
+						if bucket is not None:
+							finished.append(bucket)
+						self._open[(level, channel)] = [level, channel, t, value, value, value, 1]
+					else:
+						if value < bucket[3]:
+							bucket[3] = value
+						if value > bucket[4]:
+							bucket[4] = value
+						bucket[5] += value
+						bucket[6] += 1
+			if finished:
+				self._flush(finished)
+				self._prune(snapshot.time)
+				self._db.commit()
+
+	def _prune(self, now):
+		# at most once per hour
+		if not self.retention or now - self._pruned < 3600:
+			return
+		self._pruned = now
+		for level, seconds in self.retention.items():
+			self._db.execute('DELETE FROM rollups WHERE level = ? AND t < ?', (level, now - seconds))
+
+	def importTelemetry(self, path):
+		"""
+		Adds all snapshots of the AttoDRYtelemetry file at <path>
+		"""
+		for snapshot in AttoDRYtelemetry.iterate(path):
+			self.add(snapshot)
+
+	def channels(self):
+		with self._lock:
+			return sorted(self._channels)
+
+	def level(self, start, end, points):
+		"""
+		Returns the coarsest level that gives at least <points> buckets between
+		<start> and <end> (the finest level if none does). Levels whose buckets
+		at <start> were already removed (see retention) are not used.
+		"""
+		kept = [level for level in self.levels if level not in self.retention or self._time is None or start >= self._time - self.retention[level]]
+		kept = kept or [self.levels[-1]]
+		for level in reversed(kept):
+			if (end - start)/level >= points:
+				return level
+		return kept[0]
+
+	def query(self, name, start, end, points=1000, level=None):
+		"""
+		Returns the bucket width and a list of (bucket start, min, max, mean) of
+		the channel <name> between the unix times <start> and <end>, at the
+		coarsest resolution that gives at least <points> points (or at <level>)
+		"""
+		if level is None:
+			level = self.level(start, end, points)
+		with self._lock:
+			channel = self._channels.get(name)
+			if channel is None:
+				return level, []
+			first = int(start//level)*level
+			rows = self._db.execute('SELECT t, min, max, sum, count FROM rollups WHERE level = ? AND channel = ? AND t BETWEEN ? AND ? ORDER BY t',
+				(level, channel, first, end)).fetchall()
+			bucket = self._open.get((level, channel))
+			if bucket is not None and first <= bucket[2] <= end:
+				if rows and rows[-1][0] == bucket[2]:
+					# the bucket was partly written before the store was reopened
+					t, lo, hi, total, count = rows.pop()
+					bucket = (None, None, t, min(lo, bucket[3]), max(hi, bucket[4]), total + bucket[5], count + bucket[6])
+				rows.append(tuple(bucket[2:]))
+		return level, [(t, lo, hi, total/count) for t, lo, hi, total, count in rows]
@@ -0,0 +1,229 @@
+# Managed connection to the attoDRY.
+# Session runs the begin -> Connect -> wait for initialisation -> ... -> Disconnect -> end
+# sequence of example.py, and only passes commands to the device once it reports to be
+# initialised and connected (sending commands too early drops the connection). A watchdog
+# thread checks the connection and reconnects after a silent disconnect; commands that are
+# queued in the meantime are kept and sent once the device is ready again. A command that
+# failed because of the disconnect is only sent again if it is idempotent (a getter or a
+# setter); a toggle may have been executed before the reply was lost, so it fails instead and
+# the caller has to read the state again.
+#
+# usage:
+#	with Session(setup_version=1, COMPort='COM4') as s:
+#		s.call('setUserTemperature', 1.9)
+#		T = s.call('getSampleTemperature')
+
+import collections
+import logging
+import threading
+from concurrent.futures import Future
+
+import AttoDRYclock
+from PyAttoDRY import AttoDRY
+
+log = logging.getLogger(__name__)
+
+# prefixes of the AttoDRY methods that can be sent again after a lost reply
+idempotent = ('get', 'Get', 'is', 'query', 'set')
+
+
+class Session:
+
+	def __init__(self, setup_version=1, COMPort='COM4', dev=None, timeout=60.0, watchdogInterval=5.0):
+		"""
+		<dev> is the AttoDRY instance to use (default: a new one, Session.dev).
+		<timeout> is the time in seconds the device may take to report it is
+		initialised and connected after Connect; <watchdogInterval> is the time
+		between two connection checks.
+		"""
+		self.dev = dev if dev is not None else AttoDRY(setup_version, COMPort)
+		self.setup_version = setup_version
+		self.COMPort = COMPort
+		self.timeout = timeout
+		self.watchdogInterval = watchdogInterval
+		# set while commands may be sent to the device
+		self.ready = threading.Event()
+		self.reconnects = 0
+		self._lock = threading.RLock()
+		self._queue = collections.deque()
+		self._queued = threading.Condition()
+		self._wake = threading.Event()
+		self._stop = threading.Event()
+		self._threads = []
+
+	def __enter__(self):
+		self.start()
+		return self
+
+	def __exit__(self, *exc):
+		self.stop()
+
+	def start(self):
+		"""
+		Starts the server, connects and waits until the device is ready. Then the
+		command worker and the watchdog are started.
+		"""
+		self._stop.clear()
+		self.dev.begin(setup_version=self.setup_version)
+		try:
+			self._connect()
+		except BaseException:
+			# leave no server running, or no later AttoDRY could begin
+			try:
+				self.dev.Disconnect()
+			except Exception as e:
+				log.debug('Disconnect failed: %s', e)
+			finally:
+				self.dev.end()
+			raise
+		for target in (self._worker, self._watchdog):
+			thread = threading.Thread(target=target, name='AttoDRY'+target.__name__, daemon=True)
+			thread.start()
+			self._threads.append(thread)
+
+	def stop(self):
+		"""
+		Stops the worker and the watchdog, then disconnects and stops the server.
+		Commands that are still queued are cancelled.
+		"""
+		self._stop.set()
+		self._wake.set()
+		with self._queued:
+			self._queued.notify_all()
+		for thread in self._threads:
+			thread.join()
+		self._threads = []
+		with self._queued:
+			while self._queue:
+				name, args, future, running = self._queue.popleft()
+				if running:
+					future.set_exception(Exception('Error: the session was stopped before '+name+' was sent'))
+				else:
+					future.cancel()
+		self.ready.clear()
+		with self._lock:
+			try:
+				self.dev.Disconnect()
+			finally:
+				self.dev.end()
+
+	def submit(self, name, *args):
+		"""
+		Queues the AttoDRY method <name> to be called with <args> once the device
+		is ready and returns a concurrent.futures.Future for its result.
+		"""
+		future = Future()
+		with self._queued:
+			self._queue.append((name, args, future, False))
+			self._queued.notify()
+		return future
+
+	def call(self, name, *args, timeout=None):
+		"""
+		Like submit, but waits for the result (at most <timeout> seconds)
+		"""
+		return self.submit(name, *args).result(timeout)
+
+	def isReady(self):
+		"""
+		Returns True if the device is initialised and connected
+		"""
+		with self._lock:
+			return self.dev.isDeviceInitialised() == 1 and self.dev.isDeviceConnected() == 1
+
+	def _connect(self):
+		# Connect and poll for the device with an increasing delay (0.5 s, 1 s, 2 s, ... at most 5 s)
+		with self._lock:
+			self.dev.Connect(COMPort=self.COMPort)
+			start = AttoDRYclock.monotonic()
+			delay = 0.5
+			while not self._stop.is_set():
+				try:
+					if self.isReady():
+						self.ready.set()
+						return
+				except Exception as e:
+					log.debug('device not ready yet: %s', e)
+				if AttoDRYclock.monotonic() - start > self.timeout:
+					raise Exception('Error: the attoDRY was not ready '+str(self.timeout)+' s after connecting to '+self.COMPort)
+				AttoDRYclock.wait(self._stop, delay)
+				delay = min(2*delay, 5.0)
+			# stopped while waiting: not connected, so start() cleans up
+			raise Exception('Error: the session was stopped before the attoDRY was ready')
+
+	def reconnect(self):
+		"""
+		Disconnects and connects again; retries until it succeeds or the session
+		is stopped. Queued commands are sent afterwards.
+		"""
+		self.ready.clear()
+		while not self._stop.is_set():
+			start = AttoDRYclock.monotonic()
+			try:
+				with self._lock:
+					try:
+						self.dev.Disconnect()
+					except Exception as e:
+						log.debug('Disconnect failed: %s', e)
+					self._connect()
+			except Exception as e:
+				if self._stop.is_set():
+					return
+				log.warning('reconnecting to the attoDRY failed: %s', e)
+				AttoDRYclock.wait(self._stop, self.watchdogInterval)
+				continue
+			self.reconnects += 1
+			log.info('reconnected to the attoDRY after %.1f s', AttoDRYclock.monotonic() - start)
+			with self._queued:
+				self._queued.notify()
+			return
+
+	def _watchdog(self):
+		while not self._stop.is_set():
+			AttoDRYclock.wait(self._wake, self.watchdogInterval)
+			self._wake.clear()
+			if self._stop.is_set():
+				return
+			if self.ready.is_set():
+				try:
+					if self.isReady():
+						continue
+				except Exception as e:
+					log.debug('connection check failed: %s', e)
+				log.warning('lost the connection to the attoDRY')
+			self.reconnect()
+
+	def _worker(self):
+		while True:
+			with self._queued:
+				while not self._stop.is_set() and not (self._queue and self.ready.is_set()):
+					self._queued.wait()
+				if self._stop.is_set():
+					return
+				name, args, future, running = self._queue.popleft()
+			if not running and not future.set_running_or_notify_cancel():
+				continue
+			with self._lock:
+				try:
+					result = getattr(self.dev, name)(*args)
+				except Exception as e:
+					connected = self._stillConnected()
+					if connected or not name.startswith(idempotent):
+						future.set_exception(e)
+					else:
+						# the command was lost with the connection: send it again after reconnecting
+						with self._queued:
+							self._queue.appendleft((name, args, future, True))
+					if connected:
+						continue
+					self.ready.clear()
+					self._wake.set()
+					continue
+			future.set_result(result)
+
+	def _stillConnected(self):
+		try:
+			return self.isReady()
+		except Exception:
+			return False
+
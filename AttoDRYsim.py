@@ -0,0 +1,664 @@
+# Simulated attoDRY backend.
+# SimulatedAttoDRYLib offers the same functions as attoDRYLib (AttoDRY_Interface_*), takes the
+# same arguments and returns the same error codes, so PyAttoDRY, the poller and all tools built
+# on top can run without the LabVIEW runtime and without hardware (e.g. on Linux).
+# The temperatures of sample, VTI, reservoir, 4K and 40K stage follow a lumped thermal model
+# (heat capacities, thermal links, cold heads while the system is running, heaters and the
+# sample temperature controller), the field ramps linearly. Time is taken from AttoDRYclock, so
+# with a VirtualClock a cooldown of several hours is simulated in seconds.
+#
+# usage:
+#	import AttoDRYsim
+#	sim = AttoDRYsim.install()				# warm and switched off, or
+#	sim = AttoDRYsim.install(state=AttoDRYsim.cold)	# running at base temperature
+#	with AttoDRY(1, 'COM4') as dev:
+#		dev.getSampleTemperature()
+
+import ctypes
+import math
+import random
+import threading
+
+import AttoDRYclock
+import AttoDRYlib as ADRY
+
+PREFIX = 'AttoDRY_Interface_'
+
+# state of the simulated cryostat after power-up
+defaults = {
+	'sampleTemperature': 290.0,
+	'userTemperature': 1.8,
+	'vtiTemperature': 290.0,
+	'stage4KTemperature': 290.0,
+	'stage40KTemperature': 290.0,
+	'magneticField': 0.0,
+	'magneticFieldSetPoint': 0.0,
+	'sampleHeaterPower': 0.0,
+	'vtiHeaterPower': 0.0,
+	'sampleHeaterMaximumPower': 1.0,
+	'sampleHeaterResistance': 100.0,
+	'sampleHeaterWireResistance': 10.0,
+	'proportionalGain': 1.0,
+	'integralGain': 0.1,
+	'derivativeGain': 0.0,
+	'reservoirTsetColdSample': 4.0,
+	'reservoirTsetWarmSample': 10.0,
+	'reservoirTsetWarmMagnet': 20.0,
+	'reservoirTemperature': 290.0,
+	'reservoirHeaterPower': 0.0,
+	'pressure': 1e-3,
+	'cryostatInPressure': 1e-3,
+	'cryostatOutPressure': 1e-3,
+	'dumpPressure': 800.0,
+	'turbopumpFrequency': 1500.0,
+	'errorStatus': 0,
+	'errorMessage': '',
+	'actionMessage': '',
+	'controllingField': 0,
+	'controllingTemperature': 0,
+	'controllingSample': 0,
+	'persistentMode': 0,
+	'zeroingField': 0,
+	'goingToBaseTemperature': 0,
+	'pumping': 0,
+	'sampleHeaterOn': 0,
+	'exchangeHeaterOn': 0,
+	'sampleExchangeInProgress': 0,
+	'sampleReadyToExchange': 0,
+	'systemRunning': 0,
+	'cryostatInValve': 0,
+	'cryostatOutValve': 0,
+	'dumpInValve': 0,
+	'dumpOutValve': 0,
+	'heliumValve': 0,
+	'innerVolumeValve': 0,
+	'outerVolumeValve': 0,
+	'pumpValve': 0,
+	'breakVac800Valve': 0,
+	'pump800Valve': 0,
+	'sampleSpace800Valve': 0,
+}
+
+# exported function (without PREFIX) -> state key
+getters = {
+	'getSampleTemperature': 'sampleTemperature',
+	'getUserTemperature': 'userTemperature',
+	'getVtiTemperature': 'vtiTemperature',
+	'get4KStageTemperature': 'stage4KTemperature',
+	'get40KStageTemperature': 'stage40KTemperature',
+	'getMagneticField': 'magneticField',
+	'getMagneticFieldSetPoint': 'magneticFieldSetPoint',
+	'getSampleHeaterPower': 'sampleHeaterPower',
+	'getVtiHeaterPower': 'vtiHeaterPower',
+	'getSampleHeaterMaximumPower': 'sampleHeaterMaximumPower',
+	'getSampleHeaterResistance': 'sampleHeaterResistance',
+	'getSampleHeaterWireResistance': 'sampleHeaterWireResistance',
+	'getProportionalGain': 'proportionalGain',
+	'getIntegralGain': 'integralGain',
+	'getDerivativeGain': 'derivativeGain',
+	'getReservoirTsetColdSample': 'reservoirTsetColdSample',
+	'getReservoirTsetWarmSample': 'reservoirTsetWarmSample',
+	'getReservoirTsetWarmMagnet': 'reservoirTsetWarmMagnet',
+	'getReservoirTemperature': 'reservoirTemperature',
+	'getReservoirHeaterPower': 'reservoirHeaterPower',
+	'getPressure': 'pressure',
+	'getPressure800': 'pressure',
+	'getCryostatInPressure': 'cryostatInPressure',
+	'getCryostatOutPressure': 'cryostatOutPressure',
+	'getDumpPressure': 'dumpPressure',
+	'getTurbopumpFrequency': 'turbopumpFrequency',
+	'GetTurbopumpFrequ800': 'turbopumpFrequency',
+	'getAttodryErrorStatus': 'errorStatus',
+	'isControllingField': 'controllingField',
+	'isControllingTemperature': 'controllingTemperature',
+	'isPersistentModeSet': 'persistentMode',
+	'isZeroingField': 'zeroingField',
+	'isGoingToBaseTemperature': 'goingToBaseTemperature',
+	'isPumping': 'pumping',
+	'isSampleHeaterOn': 'sampleHeaterOn',
+	'isExchangeHeaterOn': 'exchangeHeaterOn',
+	'isSampleExchangeInProgress': 'sampleExchangeInProgress',
+	'isSampleReadyToExchange': 'sampleReadyToExchange',
+	'isSystemRunning': 'systemRunning',
+	'getCryostatInValve': 'cryostatInValve',
+	'getCryostatOutValve': 'cryostatOutValve',
+	'getDumpInValve': 'dumpInValve',
+	'getDumpOutValve': 'dumpOutValve',
+	'getHeliumValve': 'heliumValve',
+	'getInnerVolumeValve': 'innerVolumeValve',
+	'getOuterVolumeValve': 'outerVolumeValve',
+	'getPumpValve': 'pumpValve',
+	'getBreakVac800Valve': 'breakVac800Valve',
+	'getPump800Valve': 'pump800Valve',
+	'getSampleSpace800Valve': 'sampleSpace800Valve',
+}
+
+setters = {
+	'setUserTemperature': 'userTemperature',
+	'setUserMagneticField': 'magneticFieldSetPoint',
+	'setSampleHeaterPower': 'sampleHeaterPower',
+	'setVTIHeaterPower': 'vtiHeaterPower',
+	'setSampleHeaterMaximumPower': 'sampleHeaterMaximumPower',
+	'setSampleHeaterResistance': 'sampleHeaterResistance',
+	'setSampleHeaterWireResistance': 'sampleHeaterWireResistance',
+	'setProportionalGain': 'proportionalGain',
+	'setIntegralGain': 'integralGain',
+	'setDerivativeGain': 'derivativeGain',
+	'setReservoirTsetColdSample': 'reservoirTsetColdSample',
+	'setReservoirTsetWarmSample': 'reservoirTsetWarmSample',
+	'setReservoirTsetWarmMagnet': 'reservoirTsetWarmMagnet',
+}
+
+toggles = {
+	'toggleMagneticFieldControl': 'controllingField',
+	'toggleExchangeHeaterControl': 'exchangeHeaterOn',
+	'togglePersistentMode': 'persistentMode',
+	'togglePump': 'pumping',
+	'toggleStartUpShutdown': 'systemRunning',
+	'toggleCryostatInValve': 'cryostatInValve',
+	'toggleCryostatOutValve': 'cryostatOutValve',
+	'toggleDumpInValve': 'dumpInValve',
+	'toggleDumpOutValve': 'dumpOutValve',
+	'toggleHeliumValve': 'heliumValve',
+	'toggleInnerVolumeValve': 'innerVolumeValve',
+	'toggleOuterVolumeValve': 'outerVolumeValve',
+	'togglePumpValve': 'pumpValve',
+	'toggleBreakVac800Valve': 'breakVac800Valve',
+	'togglePump800Valve': 'pump800Valve',
+	'toggleSampleSpace800Valve': 'sampleSpace800Valve',
+}
+
+# commands that are accepted and have no effect on the simulated state
+noops = (
+	'Main', 'Cancel', 'Confirm', 'startLogging', 'stopLogging', 'startSampleExchange',
+	'downloadSampleTemperatureSensorCalibrationCurve', 'downloadTemperatureSensorCalibrationCurve',
+	'uploadSampleTemperatureCalibrationCurve', 'uploadTemperatureCalibrationCurve',
+	'queryReservoirTsetColdSample', 'queryReservoirTsetWarmSample', 'queryReservoirTsetWarmMagnet',
+	'querySampleHeaterMaximumPower', 'querySampleHeaterResistance', 'querySampleHeaterWireResistance',
+)
+
+# all error codes handled by checkError (and -1, unspecific)
+errorCodes = (-1, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 17, 19, 20, 21, 22, 23, 24, 29, 30, 31, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41, 42)
+
+# these may be called while the device is not connected
+offline = ('begin', 'end', 'Connect', 'Disconnect', 'isDeviceConnected', 'isDeviceInitialised')
+
+##### thermal model: C_i dT_i/dt = sum of G (T_other - T_i) over the links of stage i + heater power
+stages = ('sampleTemperature', 'vtiTemperature', 'reservoirTemperature', 'stage4KTemperature', 'stage40KTemperature')
+capacity = (1.0, 5.0, 50.0, 200.0, 400.0)	# J/K
+# (stage, stage, G in W/K)
+links = ((0, 1, 0.01), (1, 2, 0.05), (2, 3, 0.05), (3, 4, 0.0005))
+# (stage, fixed temperature in K, G in W/K): cold heads and helium flow while the system is running
+coldLinks = ((4, 30.0, 0.05), (3, 2.6, 0.05), (1, 1.5, 0.05))
+# while the system is switched off, all stages are warmed up to room temperature
+roomTemperature = 295.0
+warmLink = 0.02		# W/K, per stage
+ambientLink = 0.00001	# W/K, per stage, always
+controlGain = 0.5		# W/K, proportional gain of the sample temperature controller
+# the base temperature process ends when the sample cools slower than this
+baseRate = 1e-4		# K/s
+# the thermal model advances in whole multiples of this, so the few step lengths that occur
+# are factored once (the matrix of a step depends only on its length and the system state)
+thermalTick = 0.01	# s
+
+fieldRate = 0.01	# T/s
+
+# the state of a cryostat that is running at base temperature
+cold = {
+	'systemRunning': 1,
+	'pumping': 1,
+	'sampleTemperature': 2.3,
+	'vtiTemperature': 2.0,
+	'reservoirTemperature': 2.3,
+	'stage4KTemperature': 2.6,
+	'stage40KTemperature': 30.0,
+}
+
+
+def _value(arg):
+	# plain python value of an argument as passed by PyAttoDRY
+	return arg.value if hasattr(arg, 'value') else arg
+
+
+def _store(ref, value):
+	# writes <value> into an output argument (ctypes.byref or pointer)
+	obj = ref._obj if hasattr(ref, '_obj') else ref.contents
+	if isinstance(obj, ctypes.Array):
+		obj.value = value.encode('utf-8')[:len(obj)-1]
+	else:
+		obj.value = value
+
+
+class SimulatedAttoDRYLib:
+
+	def __init__(self, initDelay=0.0, state=None, faults=None):
+		"""
+		<initDelay> is the time in seconds between Connect and the device
+		reporting to be initialised; <state> overrides entries of defaults;
+		<faults> is a Faults instance to inject errors.
+		"""
+		self.initDelay = initDelay
+		self.faults = faults
+		self.state = dict(defaults)
+		if state:
+			self.state.update(state)
+		self.setup_version = None
+		self.running = False
+		self.connected = False
+		self.connectTime = None
+		self.calls = 0
+		self.lock = threading.RLock()
+		self._delay = 0.0
+		self._t = AttoDRYclock.monotonic()
+		self._thermalT = self._t
+		self._solvers = {}
+
+	def __getattr__(self, export):
+		# builds the simulated function for <export> on first use
+		if not export.startswith(PREFIX):
+			raise AttributeError(export)
+		name = export[len(PREFIX):]
+		if name in getters:
+			key = getters[name]
+			def func(ref):
+				ref = self._enter(name, ref)
+				_store(ref, self.state[key])
+				return 0
+		elif name in setters:
+			key = setters[name]
+			def func(value):
+				self._enter(name)
+				self.state[key] = float(_value(value))
+				return 0
+		elif name in toggles:
+			key = toggles[name]
+			def func():
+				self._enter(name)
+				if self.faults is not None and key in self.faults.stuckValves:
+					# the command is accepted, but the valve does not move
+					return 0
+				self.state[key] = 1 - self.state[key]
+				return 0
+		elif name in noops:
+			def func(*args):
+				self._enter(name)
+				return 0
+		elif hasattr(self, '_'+name):
+			impl = getattr(self, '_'+name)
+			def func(*args):
+				self._enter(name)
+				return impl(*args)
+		else:
+			raise AttributeError(export)
+		func = self._guarded(func, name)
+		func.__name__ = export
+		self.__dict__[export] = func
+		return func
+
+	def _guarded(self, func, name):
+		# error codes instead of exceptions, like the DLL. A latency fault delays the reply
+		# after the call was executed, without holding the lock (the other threads go on).
+		def guarded(*args):
+			with self.lock:
+				self._delay = 0.0
+				try:
+					code = func(*args)
+					if code == 0 and self.faults is not None and name not in offline:
+						code = self.faults.afterCall(self, name)
+				except _Refused as e:
+					code = e.code
+				delay = self._delay
+			if delay:
+				AttoDRYclock.sleep(delay)
+			return code
+		return guarded
+
+	def _enter(self, name, ref=None):
+		# common to all calls: checks the connection and advances the simulation
+		self.calls += 1
+		if not self.running and name != 'begin':
+			raise _Refused(-1)
+		if name not in offline:
+			if not self.connected:
+				raise _Refused(-1)
+			if not self._initialised() and name[:3] in ('set', 'tog'):
+				# like the real device: commands sent before initialisation drop the connection
+				self.connected = False
+				raise _Refused(-1)
+			if self.faults is not None:
+				self.faults.inject(self, name)
+		self._advance()
+		return ref
+
+	def _initialised(self):
+		return self.connected and AttoDRYclock.monotonic() - self.connectTime >= self.initDelay
+
+	def _advance(self):
+		now = AttoDRYclock.monotonic()
+		dt = now - self._t
+		self._t = now
+		if dt <= 0:
+			return
+		state = self.state
+		ticks = math.floor((now - self._thermalT)/thermalTick)
+		if ticks > 0:
+			h = ticks*thermalTick
+			self._thermalT += h
+			sample = state['sampleTemperature']
+			self._thermalStep(h)
+			if state['goingToBaseTemperature'] and state['systemRunning'] and (sample - state['sampleTemperature'])/h < baseRate:
+				state['goingToBaseTemperature'] = 0
+		if state['zeroingField']:
+			target = 0.0
+		elif state['controllingField']:
+			target = state['magneticFieldSetPoint']
+		else:
+			target = state['magneticField']
+		step = target - state['magneticField']
+		if abs(step) > fieldRate*dt:
+			step = math.copysign(fieldRate*dt, step)
+		state['magneticField'] += step
+		if self.faults is not None and self.faults.quenchField is not None and step != 0 and abs(state['magneticField']) >= self.faults.quenchField:
+			self.quench()
+		if state['zeroingField'] and state['magneticField'] == 0.0:
+			state['zeroingField'] = 0
+
+	def _thermalStep(self, dt):
+		# one implicit (backward) Euler step of the thermal model: stable for any dt, which is
+		# needed as the steps get long with a fast VirtualClock. The sample heater is part of
+		# the linear system while the controller is active:
+		#   P = controlGain (T_user - T_sample) + G_sampleVTI (T_user - T_VTI)
+		# and is fixed at its limit if the solution exceeds 0 .. maximum power.
+		# Only the right-hand side depends on the temperatures and heater powers.
+		state = self.state
+		running = bool(state['systemRunning'])
+		n = len(stages)
+		v = [capacity[i]/dt*state[stages[i]] + ambientLink*roomTemperature for i in range(n)]
+		if running:
+			for i, T, G in coldLinks:
+				v[i] += G*T
+		else:
+			for i in range(n):
+				v[i] += warmLink*roomTemperature
+		v[1] += state['vtiHeaterPower']
+		power = state['sampleHeaterPower']
+		if self._controlling():
+			Tuser = state['userTemperature']
+			G = links[0][2]
+			controlled = v[:]
+			controlled[0] += (controlGain + G)*Tuser
+			T = self._solver(dt, running, True)(controlled)
+			power = controlGain*(Tuser - T[0]) + G*(Tuser - T[1])
+			if 0.0 <= power <= state['sampleHeaterMaximumPower']:
+				self._setTemperatures(T, power)
+				return
+			power = min(max(power, 0.0), state['sampleHeaterMaximumPower'])
+		v[0] += power
+		self._setTemperatures(self._solver(dt, running, False)(v), power)
+
+	def _solver(self, dt, running, controlled):
+		# the factored matrix of a step of <dt>, with the sample heater in the system if <controlled>
+		key = (dt, running, controlled)
+		solve = self._solvers.get(key)
+		if solve is None:
+			n = len(stages)
+			M = [[0.0]*n for i in range(n)]
+			def link(i, j, G):
+				M[i][i] += G
+				M[i][j] -= G
+			for i in range(n):
+				M[i][i] = capacity[i]/dt + ambientLink
+			for i, j, G in links:
+				link(i, j, G)
+				link(j, i, G)
+			if running:
+				for i, T, G in coldLinks:
+					M[i][i] += G
+			else:
+				for i in range(n):
+					M[i][i] += warmLink
+			if controlled:
+				M[0][0] += controlGain
+				M[0][1] += links[0][2]
+			if len(self._solvers) >= 64:
+				self._solvers.clear()
+			solve = self._solvers[key] = _factor(M)
+		return solve
+
+	def _controlling(self):
+		# the sample temperature controller runs with the full temperature control or on its own
+		return self.state['controllingTemperature'] or self.state['controllingSample']
+
+	def _setTemperatures(self, T, power):
+		for key, value in zip(stages, T):
+			self.state[key] = value
+		self.state['sampleHeaterPower'] = power
+		self.state['sampleHeaterOn'] = int(power > 0 or self._controlling())
+
+	##### functions with their own behaviour (called with the lock held, after _enter)
+
+	def _begin(self, setup_version):
+		self.setup_version = _value(setup_version)
+		self.running = True
+		return 0
+
+	def _end(self):
+		self.running = False
+		self.connected = False
+		return 0
+
+	def _Connect(self, COMPort):
+		if not self.running:
+			return -1
+		self.connected = True
+		self.connectTime = AttoDRYclock.monotonic()
+		if self.faults is not None:
+			self.faults.recovered('drop')
+			self.faults.recovered('lost')
+		return 0
+
+	def _Disconnect(self):
+		self.connected = False
+		return 0
+
+	def _isDeviceConnected(self, ref):
+		_store(ref, int(self.connected))
+		return 0
+
+	def _isDeviceInitialised(self, ref):
+		_store(ref, int(self._initialised()))
+		return 0
+
+	def _getActionMessage(self, ref, length):
+		_store(ref, self.state['actionMessage'])
+		return 0
+
+	def _getAttodryErrorMessage(self, ref, length):
+		_store(ref, self.state['errorMessage'])
+		return 0
+
+	def _lowerError(self):
+		self.state['errorStatus'] = 0
+		self.state['errorMessage'] = ''
+		if self.faults is not None:
+			self.faults.recovered('error')
+		return 0
+
+	def _toggleFullTemperatureControl(self):
+		state = self.state
+		state['controllingTemperature'] = 1 - state['controllingTemperature']
+		if state['controllingTemperature']:
+			# taking control ends the base temperature process
+			state['goingToBaseTemperature'] = 0
+		else:
+			state['controllingSample'] = 0
+			state['sampleHeaterPower'] = 0.0
+		state['sampleHeaterOn'] = int(state['sampleHeaterPower'] > 0 or self._controlling())
+		return 0
+
+	def _toggleSampleTemperatureControl(self):
+		# only the sample heater controller; isControllingTemperature does not change
+		state = self.state
+		state['controllingSample'] = 1 - state['controllingSample']
+		if state['controllingSample']:
+			state['goingToBaseTemperature'] = 0
+		elif not state['controllingTemperature']:
+			state['sampleHeaterPower'] = 0.0
+		state['sampleHeaterOn'] = int(state['sampleHeaterPower'] > 0 or self._controlling())
+		return 0
+
+	def _goToBaseTemperature(self):
+		state = self.state
+		state['goingToBaseTemperature'] = 1
+		state['controllingTemperature'] = 0
+		state['controllingSample'] = 0
+		state['sampleHeaterPower'] = 0.0
+		state['sampleHeaterOn'] = 0
+		return 0
+
+	def _sweepFieldToZero(self):
+		self.state['zeroingField'] = 1
+		return 0
+
+	def LVDLLStatus(self, *args):
+		return 0
+
+	def quench(self):
+		"""
+		Quenches the magnet: the field drops to zero, field control and persistent
+		mode are lost and error 37 is raised
+		"""
+		with self.lock:
+			state = self.state
+			state['magneticField'] = 0.0
+			state['controllingField'] = 0
+			state['persistentMode'] = 0
+			state['zeroingField'] = 0
+			state['errorStatus'] = 37
+			state['errorMessage'] = 'Magnet quenched'
+			if self.faults is not None:
+				self.faults.log('error', 'quench')
+
+
+class Faults:
+
+	def __init__(self, seed=None, errorRate=0.0, errorCodes=errorCodes, latencyRate=0.0, latency=(0.1, 1.0), dropRate=0.0, stuckValves=(), quenchField=None, lostReplyRate=0.0):
+		"""
+		Faults injected into the simulated calls (all rates are probabilities per
+		call, drawn from a random generator seeded with <seed>):
+		<errorRate>: the call returns one of <errorCodes> (and the error status is set)
+		<latencyRate>: the reply comes a uniformly drawn time in <latency> seconds later
+		<dropRate>: the connection is lost (until the next Connect) before the call is executed
+		<lostReplyRate>: the call is executed, then the connection is lost and the reply with it
+		<stuckValves>: state keys (see toggles) of valves that do not react to toggling
+		<quenchField>: the magnet quenches when a sweep reaches this field in Tesla
+		"""
+		self.random = random.Random(seed)
+		self.errorRate = errorRate
+		self.errorCodes = tuple(errorCodes)
+		self.latencyRate = latencyRate
+		self.latency = latency
+		self.dropRate = dropRate
+		self.lostReplyRate = lostReplyRate
+		self.stuckValves = tuple(stuckValves)
+		self.quenchField = quenchField
+		# (AttoDRYclock.monotonic(), kind, detail) of all injected faults and recoveries
+		self.events = []
+		self._pending = {}
+
+	def log(self, kind, detail):
+		self.events.append((AttoDRYclock.monotonic(), kind, detail))
+		self._pending.setdefault(kind, self.events[-1][0])
+
+	def recovered(self, kind):
+		if kind in self._pending:
+			self.events.append((AttoDRYclock.monotonic(), 'recovered', kind))
+			del self._pending[kind]
+
+	def inject(self, sim, name):
+		# called for every call on a connected device before it is executed, may raise _Refused
+		rand = self.random.random
+		if self.latencyRate and rand() < self.latencyRate:
+			# the simulator sleeps after the call, outside its lock
+			sim._delay = self.random.uniform(*self.latency)
+			self.log('latency', name)
+		if self.dropRate and rand() < self.dropRate:
+			sim.connected = False
+			self.log('drop', name)
+			raise _Refused(-1)
+		if self.errorRate and rand() < self.errorRate:
+			code = self.random.choice(self.errorCodes)
+			if code > 0:
+				sim.state['errorStatus'] = code
+			self.log('error', name)
+			raise _Refused(code)
+
+	def afterCall(self, sim, name):
+		# called after a call was executed successfully; returns the error code of the reply
+		if self.lostReplyRate and self.random.random() < self.lostReplyRate:
+			sim.connected = False
+			self.log('lost', name)
+			return -1
+		return 0
+
+	def recoveryTimes(self, kind='drop'):
+		"""
+		Returns the times in seconds from each fault of <kind> ('drop', 'lost' or 'error')
+		to the following recovery (Connect or lowerError)
+		"""
+		times = []
+		start = None
+		for t, event, detail in self.events:
+			if event == kind and start is None:
+				start = t
+			elif event == 'recovered' and detail == kind and start is not None:
+				times.append(t - start)
+				start = None
+		return times
+
+
+def _factor(M):
+	# returns a function that solves M x = v for x: with numpy by the inverse of M, otherwise
+	# by an LU decomposition with partial pivoting (M is modified)
+	try:
+		import numpy
+	except ImportError:
+		numpy = None
+	if numpy is not None:
+		inverse = numpy.linalg.inv(numpy.array(M, dtype=float))
+		return lambda v: inverse.dot(v).tolist()
+	n = len(M)
+	order = list(range(n))
+	for k in range(n):
+		p = max(range(k, n), key=lambda i: abs(M[i][k]))
+		M[k], M[p] = M[p], M[k]
+		order[k], order[p] = order[p], order[k]
+		for i in range(k+1, n):
+			f = M[i][k] = M[i][k]/M[k][k]
+			if f:
+				for j in range(k+1, n):
+					M[i][j] -= f*M[k][j]
+	def solve(v):
+		x = [v[i] for i in order]
+		for i in range(n):
+			x[i] -= sum(M[i][j]*x[j] for j in range(i))
+		for i in range(n-1, -1, -1):
+			x[i] = (x[i] - sum(M[i][j]*x[j] for j in range(i+1, n)))/M[i][i]
+		return x
+	return solve
+
+
+class _Refused(Exception):
+	# raised inside the simulation to return <code> from a call
+	def __init__(self, code):
+		self.code = code
+
+
+def install(**kwargs):
+	"""
+	Creates a SimulatedAttoDRYLib (with <kwargs>) and makes AttoDRYlib use it
+	instead of the DLL. Returns the simulator.
+	"""
+	sim = SimulatedAttoDRYLib(**kwargs)
+	ADRY.useBackend(sim)
+	return sim
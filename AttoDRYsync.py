@@ -0,0 +1,150 @@
+# Synchronisation of the cryostat readings with other instruments.
+# Every reading is timestamped with AttoDRYclock.monotonic() (a high resolution monotonic clock,
+# time.perf_counter() unless a VirtualClock is used) at the middle of its DLL call. Other
+# instruments stamp their samples with stamp(), i.e. the same clock, and align() interpolates
+# the cryostat channels onto their timebase in one pass. trigger() samples the cryostat right
+# now, e.g. from the acquisition loop of a lock-in; attach() adds the snapshots of a Poller.
+#
+# usage:
+#	sync = SyncRecorder(channels=('getSampleTemperature', 'getMagneticField'))
+#	sync.attach(poller)							# and/or sync.trigger() whenever needed
+#	t = []; x = []
+#	for i in range(n):
+#		x.append(lockin.read()); t.append(AttoDRYsync.stamp())
+#	columns = sync.align(t)					# {'getSampleTemperature': [...], 'getMagneticField': [...]}
+
+import array
+import bisect
+import math
+import threading
+
+import AttoDRYclock
+import PyAttoDRY
+
+stamp = AttoDRYclock.monotonic
+
+
+def toUnixTime(t):
+	"""
+	Converts the stamp <t> to unix time
+	"""
+	return t + (AttoDRYclock.now() - AttoDRYclock.monotonic())
+
+
+def interpolate(times, values, at):
+	"""
+	Linear interpolation of the samples (<times>, <values>) (times ascending) at
+	the times <at>; nan outside of the samples. Uses numpy if it is installed.
+	"""
+	if len(times) == 0:
+		return [math.nan]*len(at)
+	try:
+		import numpy
+	except ImportError:
+		numpy = None
+	if numpy is not None:
+		return numpy.interp(at, numpy.frombuffer(times, 'd'), numpy.frombuffer(values, 'd'), left=math.nan, right=math.nan)
+	result = []
+	last = len(times) - 1
+	for t in at:
+		i = bisect.bisect_right(times, t)
+		if i == 0:
+			result.append(values[0] if t == times[0] else math.nan)
+		elif i > last:
+			result.append(values[last] if t == times[last] else math.nan)
+		else:
+			t0, t1 = times[i-1], times[i]
+			result.append(values[i-1] + (values[i] - values[i-1])*(t - t0)/(t1 - t0))
+	return result
+
+
+class SyncRecorder:
+
+	def __init__(self, dev=None, channels=('getSampleTemperature', 'getMagneticField'), maxSamples=None):
+		"""
+		Keeps the timestamped readings of <channels> of the AttoDRY <dev>
+		(default: the running one); with <maxSamples> only the newest ones
+		"""
+		self.dev = dev = PyAttoDRY.device(dev)
+		self.channels = tuple(channels)
+		self.maxSamples = maxSamples
+		self._getters = [(name, getattr(dev, name)) for name in self.channels]
+		self._times = dict((name, array.array('d')) for name in self.channels)
+		self._values = dict((name, array.array('d')) for name in self.channels)
+		self._lock = threading.Lock()
+		self._poller = None
+
+	def _append(self, name, t, value):
+		times = self._times[name]
+		if times and t < times[-1]:
+			# a trigger and a poll overlapped; keep the samples in time order
+			i = bisect.bisect_right(times, t)
+			times.insert(i, t)
+			self._values[name].insert(i, value)
+		else:
+			times.append(t)
+			self._values[name].append(value)
+		if self.maxSamples is not None and len(times) > 2*self.maxSamples:
+			del times[:-self.maxSamples]
+			del self._values[name][:-self.maxSamples]
+
+	def trigger(self):
+		"""
+		Reads the channels now; returns channel -> (stamp, value)
+		"""
+		readings = {}
+		for name, getter in self._getters:
+			start = stamp()
+			try:
+				value = float(getter())
+			except Exception:
+				value = math.nan
+			readings[name] = ((start + stamp())/2, value)
+		with self._lock:
+			for name, (t, value) in readings.items():
+				self._append(name, t, value)
+		return readings
+
+	def add(self, snapshot):
+		"""
+		Adds the channels of the Poller <snapshot> (can be used as a subscriber)
+		"""
+		if snapshot.monotonic is None:
+			return
+		with self._lock:
+			for name in self.channels:
+				if name in snapshot.values:
+					self._append(name, snapshot.monotonic, float(snapshot.values[name]))
+
+	def attach(self, poller):
+		self._poller = poller
+		poller.subscribe(self.add)
+
+	def detach(self):
+		if self._poller is not None:
+			self._poller.unsubscribe(self.add)
+			self._poller = None
+
+	def samples(self, name):
+		"""
+		Returns copies of the stamps and values of the channel <name>
+		"""
+		with self._lock:
+			return array.array('d', self._times[name]), array.array('d', self._values[name])
+
+	def align(self, at, channels=None):
+		"""
+		Returns channel -> values of <channels> (default: all) interpolated at the
+		stamps <at> (ascending)
+		"""
+		columns = {}
+		for name in (self.channels if channels is None else channels):
+			times, values = self.samples(name)
+			columns[name] = interpolate(times, values, at)
+		return columns
+
+	def clear(self):
+		with self._lock:
+			for name in self.channels:
+				del self._times[name][:]
+				del self._values[name][:]
@@ -0,0 +1,162 @@
+# Binary telemetry files.
+# A Writer stores Poller snapshots as fixed size records of doubles, which is about 10 times
+# smaller than CSV and can be read back without parsing (read() / iterate()). Booleans and
+# error codes are stored as doubles as well, channels that could not be read as nan.
+#
+# usage:
+#	with Writer('run.adtel', poller.channels) as w:
+#		poller.subscribe(w.write)
+#		...
+#	channels, snapshots = AttoDRYtelemetry.read('run.adtel')
+#	records = AttoDRYtelemetry.array('run.adtel')		# numpy, records['getSampleTemperature']
+#
+# file format (little endian): b'ADRYTEL2', start time (double, unix time), setup version of the
+# recorded model (int16, -1: unknown), number of channels (uint16), for every channel: name
+# length (uint16) and name; then one record per snapshot: time (double, unix time) and the
+# value of every channel (double). Files of the first version (b'ADRYTEL1') have no setup
+# version and are still read.
+
+import collections
+import math
+import struct
+import threading
+
+import AttoDRYclock
+import AttoDRYlib as ADRY
+from AttoDRYpoller import Snapshot
+
+MAGIC = b'ADRYTEL2'
+MAGIC1 = b'ADRYTEL1'
+
+# <setup_version>: the model the file was recorded on, None if unknown
+Header = collections.namedtuple('Header', ['start', 'channels', 'setup_version'])
+
+_magic = struct.Struct('<8s')
+_header = struct.Struct('<dhH')
+_header1 = struct.Struct('<dH')
+_length = struct.Struct('<H')
+
+
+def toFloat(value):
+	try:
+		return float(value)
+	except (TypeError, ValueError):
+		return math.nan
+
+
+class Writer:
+
+	def __init__(self, path, channels, flushEvery=10, setup_version=None):
+		"""
+		Writes snapshots of <channels> to <path>; the file is flushed every
+		<flushEvery> records. <setup_version> is the recorded model (default:
+		the one selected with begin()).
+		"""
+		self.path = path
+		self.channels = tuple(channels)
+		self.flushEvery = flushEvery
+		self.setup_version = setup_version
+		self.records = 0
+		self._record = struct.Struct('<%dd' % (len(self.channels) + 1))
+		self._lock = threading.Lock()
+		self._file = None
+
+	def __enter__(self):
+		self.open()
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def open(self):
+		setup_version = ADRY.model if self.setup_version is None else self.setup_version
+		self._file = open(self.path, 'wb')
+		self._file.write(MAGIC + _header.pack(AttoDRYclock.now(), -1 if setup_version is None else setup_version, len(self.channels)))
+		for name in self.channels:
+			name = name.encode('utf-8')
+			self._file.write(_length.pack(len(name)) + name)
+
+	def close(self):
+		with self._lock:
+			if self._file is not None:
+				self._file.close()
+				self._file = None
+
+	def write(self, snapshot):
+		"""
+		Appends <snapshot> (can be used as a Poller subscriber)
+		"""
+		values = snapshot.values
+		data = self._record.pack(snapshot.time, *[toFloat(values.get(name)) for name in self.channels])
+		with self._lock:
+			if self._file is None:
+				return
+			self._file.write(data)
+			self.records += 1
+			if self.records % self.flushEvery == 0:
+				self._file.flush()
+
+
+def header(f):
+	"""
+	Reads the header from the open file <f>; returns a Header
+	"""
+	magic = _magic.unpack(f.read(_magic.size))[0]
+	if magic == MAGIC:
+		start, setup_version, n = _header.unpack(f.read(_header.size))
+	elif magic == MAGIC1:
+		start, n = _header1.unpack(f.read(_header1.size))
+		setup_version = -1
+	else:
+		raise Exception('Error: '+str(getattr(f, 'name', f))+' is not an attoDRY telemetry file')
+	channels = []
+	for i in range(n):
+		length = _length.unpack(f.read(_length.size))[0]
+		channels.append(f.read(length).decode('utf-8'))
+	return Header(start, tuple(channels), None if setup_version < 0 else setup_version)
+
+
+def iterate(path):
+	"""
+	Yields the Snapshots stored in the telemetry file at <path>
+	"""
+	with open(path, 'rb') as f:
+		channels = header(f).channels
+		record = struct.Struct('<%dd' % (len(channels) + 1))
+		while True:
+			data = f.read(record.size*1024)
+			# a record that was only partly written (e.g. the writer was killed) is ignored
+			data = data[:len(data) - len(data) % record.size]
+			if not data:
+				return
+			for row in record.iter_unpack(data):
+				yield Snapshot(row[0], dict(zip(channels, row[1:])))
+
+
+def read(path):
+	"""
+	Returns the channels and the list of Snapshots stored in the telemetry file
+	at <path>
+	"""
+	with open(path, 'rb') as f:
+		channels = header(f).channels
+	return channels, list(iterate(path))
+
+
+def array(path):
+	"""
+	Returns the records of the telemetry file at <path> as a read-only numpy
+	record array that maps the file (nothing is copied or parsed); its dtype is
+	AttoDRYchannels.dtype(channels, native=False)
+	"""
+	import numpy
+	import AttoDRYchannels
+	with open(path, 'rb') as f:
+		channels = header(f).channels
+		offset = f.tell()
+		f.seek(0, 2)
+		size = f.tell() - offset
+	layout = AttoDRYchannels.dtype(channels, native=False)
+	if size < layout.itemsize:
+		return numpy.zeros(0, dtype=layout)
+	return numpy.memmap(path, dtype=layout, mode='r', offset=offset, shape=(size//layout.itemsize,))
@@ -0,0 +1,267 @@
+# Recording and replaying of the DLL call traffic.
+# Recorder hooks every AttoDRYlib function and writes each call (exported symbol, arguments,
+# values returned through pointer arguments, error code, start time and duration) into a compact
+# binary trace. ReplayLib is a backend for AttoDRYlib.useBackend() that answers the calls from
+# such a trace, either as fast as possible or at the original speed, so a recorded session can
+# be reproduced without hardware (e.g. on Linux). Times are taken from AttoDRYclock. The trace
+# is flushed every few calls; read() stops at the last complete record of a trace that was not
+# closed (e.g. when the program crashed).
+#
+# usage:
+#	rec = Recorder('session.adtrace'); rec.start()	# on the control PC
+#	... ; rec.stop()
+#	AttoDRYtrace.install('session.adtrace')			# anywhere else
+#
+# file format (little endian): b'ADRYTRC1', start time (double, unix time), then records:
+#	0, symbol id (uint16), name length (uint16), name			defines a symbol
+#	1, symbol id (uint16), start (double, s after the trace start), duration (double, s),
+#	   error code (int32), number of arguments (uint8), arguments, then for every pointer
+#	   argument the value it returned
+# values are a tag byte and the value: 'i' int64, 'f' double, 's' length (uint16) and bytes,
+# 'n' no value. Pointer arguments use the upper case tags for their input value.
+
+import collections
+import ctypes
+import struct
+import threading
+
+import AttoDRYclock
+import AttoDRYlib as ADRY
+
+MAGIC = b'ADRYTRC1'
+
+_header = struct.Struct('<8sd')
+_symbol = struct.Struct('<BHH')
+_call = struct.Struct('<BHddiB')
+_int = struct.Struct('<q')
+_float = struct.Struct('<d')
+_length = struct.Struct('<H')
+
+# <args> is a list of (is pointer, value), <outputs> the values returned through the pointer arguments
+Call = collections.namedtuple('Call', ['export', 'start', 'duration', 'code', 'args', 'outputs'])
+
+
+def _unwrap(arg):
+	# (is pointer, ctypes object or python value) of an argument
+	if hasattr(arg, '_obj'):
+		return True, arg._obj
+	if isinstance(arg, ctypes._Pointer):
+		return True, arg.contents
+	return False, arg
+
+
+def _encode(value, pointer=False):
+	if hasattr(value, 'value'):
+		value = value.value
+	if isinstance(value, str):
+		value = value.encode('utf-8')
+	if isinstance(value, bool) or isinstance(value, int):
+		tag, data = b'i', _int.pack(value)
+	elif isinstance(value, float):
+		tag, data = b'f', _float.pack(value)
+	elif isinstance(value, bytes):
+		value = value[:0xffff]
+		tag, data = b's', _length.pack(len(value)) + value
+	else:
+		tag, data = b'n', b''
+	return (tag.upper() if pointer else tag) + data
+
+
+def _decode(data, offset):
+	# returns (is pointer, value, next offset)
+	tag = bytes(data[offset:offset+1])
+	offset += 1
+	pointer = tag.isupper()
+	tag = tag.lower()
+	if tag == b'i':
+		return pointer, _int.unpack_from(data, offset)[0], offset + 8
+	if tag == b'f':
+		return pointer, _float.unpack_from(data, offset)[0], offset + 8
+	if tag == b's':
+		n = _length.unpack_from(data, offset)[0]
+		return pointer, bytes(data[offset+2:offset+2+n]), offset + 2 + n
+	return pointer, None, offset
+
+
+class Recorder:
+
+	def __init__(self, path, flushEvery=100):
+		"""
+		Records the DLL calls into the trace at <path>, flushing it every
+		<flushEvery> calls
+		"""
+		self.path = path
+		self.flushEvery = flushEvery
+		self.calls = 0
+		self._file = None
+		self._symbols = {}
+		self._lock = threading.Lock()
+		self._t0 = None
+
+	def __enter__(self):
+		self.start()
+		return self
+
+	def __exit__(self, *exc):
+		self.stop()
+
+	def start(self):
+		"""
+		Starts recording all DLL calls into the trace file
+		"""
+		self._file = open(self.path, 'wb')
+		self._t0 = AttoDRYclock.monotonic()
+		self._file.write(_header.pack(MAGIC, AttoDRYclock.now()))
+		self._file.flush()
+		ADRY.addHook(self.hook)
+
+	def stop(self):
+		ADRY.removeHook(self.hook)
+		with self._lock:
+			self._file.close()
+			self._file = None
+
+	def hook(self, name, export, func):
+		clock = AttoDRYclock.monotonic
+
+		def recorded(*args):
+			start = clock()
+			code = func(*args)
+			end = clock()
+			self._write(export, start, end, code, args)
+			return code
+		recorded.__name__ = export
+		return recorded
+
+	def _write(self, export, start, end, code, args):
+		parts = []
+		outputs = []
+		for arg in args:
+			pointer, obj = _unwrap(arg)
+			parts.append(_encode(obj, pointer))
+			if pointer:
+				outputs.append(_encode(obj))
+		with self._lock:
+			if self._file is None:
+				return
+			symbol = self._symbols.get(export)
+			if symbol is None:
+				symbol = self._symbols[export] = len(self._symbols)
+				name = export.encode('utf-8')
+				self._file.write(_symbol.pack(0, symbol, len(name)) + name)
+			self._file.write(_call.pack(1, symbol, start - self._t0, end - start, code, len(args)) + b''.join(parts) + b''.join(outputs))
+			self.calls += 1
+			if self.calls % self.flushEvery == 0:
+				self._file.flush()
+
+
+def read(path):
+	"""
+	Returns the start time and the list of Calls stored in the trace at <path>
+	(up to the last complete record)
+	"""
+	with open(path, 'rb') as f:
+		data = memoryview(f.read())
+	magic, t0 = _header.unpack_from(data, 0)
+	if magic != MAGIC:
+		raise Exception('Error: '+str(path)+' is not an attoDRY trace')
+	symbols = {}
+	calls = []
+	offset = _header.size
+	while offset < len(data):
+		# a record is only used if it is complete: the end of a trace that was not closed
+		# can be a partly written record
+		try:
+			if data[offset] == 0:
+				kind, symbol, n = _symbol.unpack_from(data, offset)
+				end = offset + _symbol.size + n
+				if end > len(data):
+					break
+				symbols[symbol] = bytes(data[offset+_symbol.size:end]).decode('utf-8')
+				offset = end
+				continue
+			kind, symbol, start, duration, code, n = _call.unpack_from(data, offset)
+			end = offset + _call.size
+			args = []
+			for i in range(n):
+				pointer, value, end = _decode(data, end)
+				args.append((pointer, value))
+			outputs = []
+			for pointer, value in args:
+				if pointer:
+					output = _decode(data, end)
+					outputs.append(output[1])
+					end = output[2]
+		except struct.error:
+			break
+		if end > len(data):
+			break
+		calls.append(Call(symbols[symbol], start, duration, code, args, outputs))
+		offset = end
+	return t0, calls
+
+
+class ReplayLib:
+
+	def __init__(self, path, realtime=False, loop=False):
+		"""
+		Answers the DLL calls from the trace at <path>: every exported function
+		returns its recorded calls in order. With <realtime>, calls take as long
+		as they did originally (relative to the first call); with <loop>, the
+		calls of a function start over once they are used up.
+		"""
+		self.t0, calls = read(path)
+		self.realtime = realtime
+		self.loop = loop
+		self._calls = collections.defaultdict(list)
+		for call in calls:
+			self._calls[call.export].append(call)
+		self._next = collections.Counter()
+		self._lock = threading.Lock()
+		self._start = None
+
+	def __getattr__(self, export):
+		if export.startswith('_') or export not in self._calls:
+			raise AttributeError(export)
+		calls = self._calls[export]
+
+		def replayed(*args):
+			with self._lock:
+				i = self._next[export]
+				if i >= len(calls):
+					if not self.loop:
+						raise Exception('Error: the trace has no more calls of '+export)
+					i = 0
+				self._next[export] = i + 1
+				if self._start is None:
+					self._start = AttoDRYclock.monotonic() - calls[i].start
+			call = calls[i]
+			outputs = iter(call.outputs)
+			for arg in args:
+				pointer, obj = _unwrap(arg)
+				if pointer:
+					value = next(outputs, None)
+					if value is None:
+						continue
+					if isinstance(obj, ctypes.Array):
+						obj.value = value[:len(obj)-1]
+					else:
+						obj.value = value
+			if self.realtime:
+				delay = self._start + call.start + call.duration - AttoDRYclock.monotonic()
+				if delay > 0:
+					AttoDRYclock.sleep(delay)
+			return call.code
+		replayed.__name__ = export
+		self.__dict__[export] = replayed
+		return replayed
+
+
+def install(path, **kwargs):
+	"""
+	Creates a ReplayLib for the trace at <path> (with <kwargs>) and makes
+	AttoDRYlib use it instead of the DLL. Returns the ReplayLib.
+	"""
+	lib = ReplayLib(path, **kwargs)
+	ADRY.useBackend(lib)
+	return lib
@@ -14,21 +14,96 @@
 # script started on 04-Sep-2020
 # inspired by the ANC350 scrips written by Rob Heath and Brian Schaefer (https://github.com/Laukei/pyanc350)
 
+import AttoDRYchannels
 import AttoDRYlib as ADRY
 # other import items:
 import os
 import ctypes
+import threading
 
 # look at the header file to find the structure of a given function. This is just the implementation 
 # of temperature and field control without any further functionalities. All function descriptions are 
 # copied from the header files. 
 
-class AttoDRY:
+# readable values (getters without arguments) that snapshots and pollers can use, from the registry in
+# AttoDRYchannels; the ones that are not available on the selected model are filtered out by AttoDRY.channels()
+channels = AttoDRYchannels.names()
+
+class _Buffers(threading.local):
+	# output arguments of the DLL functions, allocated once per instance and thread (so an
+	# instance can be shared by several threads, e.g. a Session and a Poller)
 
 	def __init__(self):
-		self.begin()
+		self.int = ctypes.c_int()
+		self.intRef = ctypes.byref(self.int)
+		self.float = ctypes.c_float()
+		self.floatRef = ctypes.byref(self.float)
+		self.strings = {}
+
+	def string(self, length):
+		if length not in self.strings:
+			self.strings[length] = ctypes.create_string_buffer(length)
+		return self.strings[length]
+
+
+def device(dev=None):
+	"""
+	Returns <dev>, or the AttoDRY instance that is running (begun and not
+	ended) if <dev> is None; the other modules use this as their default
+	"""
+	if dev is not None:
+		return dev
+	if AttoDRY.running is None:
+		raise Exception('Error: no AttoDRY is running; call begin() on an AttoDRY instance or pass one')
+	return AttoDRY.running
+
+
+class AttoDRY:
 
-	def begin(setup_version=1):
+	# the instance that has begun the server; attoDRYLib runs one server per process, so only one
+	# instance can be running at a time (one after the other is fine)
+	running = None
+	_lock = threading.Lock()
+
+	def __init__(self, setup_version=1, COMPort=None, dll_directory=None):
+		"""
+		A session with the attoDRY. Used as a context manager, the server is
+		started for <setup_version> (and connected to <COMPort> if given) and is
+		always disconnected and stopped at the end of the block, also after an
+		exception:
+			with AttoDRY(1, 'COM4') as dev:
+				dev.getSampleTemperature()
+		The device still needs a few seconds to initialise after Connect (see
+		AttoDRYsession.Session, which waits for it).
+		"""
+		self.setup_version = setup_version
+		self.COMPort = COMPort
+		self.dll_directory = dll_directory
+		self.begun = False
+		self.connected = False
+		self._buffers = _Buffers()
+		self._channels = None
+
+	def __enter__(self):
+		if not self.begun:
+			self.begin(self.setup_version, self.dll_directory)
+		try:
+			if self.COMPort is not None and not self.connected:
+				self.Connect(self.COMPort)
+		except BaseException:
+			self.end()
+			raise
+		return self
+
+	def __exit__(self, *exc):
+		try:
+			if self.connected:
+				self.Disconnect()
+		finally:
+			if self.begun:
+				self.end()
+
+	def begin(self, setup_version=None, dll_directory=None):
 		"""
 		Starts the server that communicates with the attoDRY and loads the software 
 		for the device specified by <B> Device </B>. This VI needs to be run before 
@@ -39,41 +114,75 @@ class AttoDRY:
 		0: attoDRY1100
 		1: attoDRY2100
 		2: attoDRY800
-		"""
-		c = ctypes.c_uint16(setup_version)
-		ADRY.begin(c.value)
-
-	def Connect(COMPort='COM4'):
+		(default: the setup version the instance was created with)
+		The DLL is loaded from <dll_directory> if given, otherwise from 
+		AttoDRYlib.dll_directory (or the ATTODRY_DLL_DIR environment variable).
+		"""
+		if setup_version is None:
+			setup_version = self.setup_version
+		with AttoDRY._lock:
+			if AttoDRY.running is not None and AttoDRY.running is not self:
+				raise Exception('Error: attoDRYLib runs one server per process and another AttoDRY instance ('+ADRY.models[AttoDRY.running.setup_version]+') is running; end() it before begin()')
+			ADRY.load(dll_directory if dll_directory is not None else self.dll_directory)
+			c = ctypes.c_uint16(setup_version)
+			ADRY.begin(c.value)
+			# only the DLL functions of this model can be used from now on
+			ADRY.setModel(setup_version)
+			self.setup_version = setup_version
+			self.begun = True
+			self._channels = None
+			AttoDRY.running = self
+
+	def channels(self):
+		"""
+		Returns the names of the readable values (see channels above) that are 
+		available on the model selected with begin()
+		"""
+		if self._channels is None or not self.begun:
+			self._channels = tuple(name for name in channels if ADRY.available(name))
+		return self._channels
+
+	def Connect(self, COMPort='COM4'):
 		"""
 		Connects to the attoDRY using the specified COM Port
 		"""
 		COMPort = COMPort.encode('utf-8')
 		ADRY.Connect(ctypes.c_char_p(COMPort).value)
+		self.connected = True
 
 	"""
-	def Main():
+	def Main(self):
 		#AttoDRY_Interface_Main
 		ADRY.Main()
 	"""
 		
-	def Disconnect():
+	def Disconnect(self):
 		"""
 		Disconnects from the attoDRY, if already connected. This should be run 
 		before the <B>end.vi</B>
 		"""
+		self.connected = False
 		ADRY.Disconnect()
 
 
-	def end():
+	def end(self):
 		"""
 		Stops the server that is communicating with the attoDRY. The 
 		<B>Disconnect.vi</B> should be run before this. This VI should be run 
 		before closing your program.
 		"""
-		ADRY.end()
+		with AttoDRY._lock:
+			self.begun = False
+			if AttoDRY.running is self:
+				AttoDRY.running = None
+			try:
+				ADRY.end()
+			finally:
+				# no model is selected until the next begin()
+				ADRY.setModel(None)
 
 
-	def Cancel():
+	def Cancel(self):
 		"""
 		Sends a 'Cancel' Command to the attoDRY. Use this when you want to cancel 
 		an action or respond negatively to a pop up.
@@ -81,7 +190,7 @@ class AttoDRY:
 		ADRY.Cancel()
 
 
-	def Confirm():
+	def Confirm(self):
 		"""
 		Sends a 'Confirm' command to the attoDRY. Use this when you want to respond 
 		positively to a pop up.
@@ -89,91 +198,94 @@ class AttoDRY:
 		ADRY.Confirm()
 
 
-	def getActionMessage(length=500):
+	def getActionMessage(self, length=500, buffer=None):
 		"""
 		Gets the current action message. If an action is being performed, it will 
 		be shown here. It is similar to the pop ups on the display.
+		The message is read into a buffer of <length> bytes that the instance
+		reuses, or into <buffer> (ctypes.create_string_buffer) if given.
  		"""
-		ActionMessage = ctypes.create_string_buffer(length)
-		l = ctypes.c_int(length)
-		ADRY.getAttodryErrorMessage(ctypes.byref(ActionMessage), l)
+		ActionMessage = buffer if buffer is not None else self._buffers.string(length)
+		l = ctypes.c_int(len(ActionMessage))
+		ADRY.getActionMessage(ctypes.byref(ActionMessage), l)
 		return ActionMessage.value.decode('utf-8')
 
 
-	def getAttodryErrorMessage(length=500):
+	def getAttodryErrorMessage(self, length=500, buffer=None):
 		"""
 		Returns the current error message with length 500; Change that if characters are missing
 		Too long should not be a problem(?)
+		The buffer is reused like in getActionMessage.
 		"""
-		ErrorStatus = ctypes.create_string_buffer(length)
-		l = ctypes.c_int(length)
+		ErrorStatus = buffer if buffer is not None else self._buffers.string(length)
+		l = ctypes.c_int(len(ErrorStatus))
 		ADRY.getAttodryErrorMessage(ctypes.byref(ErrorStatus), l)
 		return ErrorStatus.value.decode('utf-8')
 
 
-	def getAttodryErrorStatus():
+	def getAttodryErrorStatus(self):
 		"""
 		Returns the current error code
 		"""
-		ErrorCode = ctypes.c_int()
-		ADRY.getAttodryErrorStatus(ctypes.byref(ErrorCode))
-		return ErrorCode.value
+		out = self._buffers
+		ADRY.getAttodryErrorStatus(out.intRef)
+		return out.int.value
 
 
-	def isControllingField():
+	def isControllingField(self):
 		"""
 		Returns 'True' if magnetic filed control is active. This is true when the 
 		magnetic field control icon on the touch screen is orange, and false when 
 		the icon is white.
 		"""
-		ControllingField = ctypes.c_int()
-		ADRY.isControllingField(ctypes.byref(ControllingField))
-		return ControllingField.value
+		out = self._buffers
+		ADRY.isControllingField(out.intRef)
+		return out.int.value
 
 
-	def isControllingTemperature():
+	def isControllingTemperature(self):
 		"""
 		Returns 'True' if temperature control is active. This is true when the 
 		temperature control icon on the touch screen is orange, and false when the 
 		icon is white.
 		"""
-		ControllingTemperature = ctypes.c_int()
-		ADRY.isControllingTemperature(ctypes.byref(ControllingTemperature))
-		return ControllingTemperature.value
+		out = self._buffers
+		ADRY.isControllingTemperature(out.intRef)
+		return out.int.value
 
 
-	def isPersistentModeSet():
+	def isPersistentModeSet(self):
 		"""
 		Checks to see if persistant mode is set for the magnet. Note: this shows if 
 		persistant mode is set, it does not show if the persistant switch heater is 
 		on. The heater may be on during persistant mode when, for example, changing 
 		the field.
 		"""
-		PersistentMode = ctypes.c_int()
-		ADRY.isPersistentModeSet(ctypes.byref(PersistentMode))
-		return PersistentMode.value
+		out = self._buffers
+		ADRY.isPersistentModeSet(out.intRef)
+		return out.int.value
 
 
-	def isDeviceInitialised():
+	def isDeviceInitialised(self):
 		"""
 		Checks to see if the attoDRY has initialised. Use this VI after you have 
 		connected and before sending any commands or getting any data from the 
 		attoDRY
 		"""
-		DeviceInitialised = ctypes.c_int()
-		ADRY.isDeviceInitialised(ctypes.byref(DeviceInitialised))
-		return DeviceInitialised.value
+		out = self._buffers
+		ADRY.isDeviceInitialised(out.intRef)
+		return out.int.value
 
-	def isDeviceConnected():
+	def isDeviceConnected(self):
 		"""
 		Checks to see if the attoDRY is connected. Returns True if connected.
 		"""
-		DeviceConnected = ctypes.c_int()
-		ADRY.isDeviceConnected(ctypes.byref(DeviceConnected))
-		return DeviceConnected.value
+		out = self._buffers
+		ADRY.isDeviceConnected(out.intRef)
+		return out.int.value
 
 
-	def toggleMagneticFieldControl():
+	def toggleMagneticFieldControl(self):
 		"""
 		Toggles persistant mode for magnet control. If it is enabled, the switch 
 		heater will be turned off once the desired field is reached. If it is not, 
@@ -182,7 +294,7 @@ class AttoDRY:
 		ADRY.toggleMagneticFieldControl()
 
 
-	def togglePersistentMode():
+	def togglePersistentMode(self):
 		"""
 		Starts and stops the pump. If the pump is running, it will stop it. If the 
 		pump is not running, it will be started.
@@ -190,7 +302,7 @@ class AttoDRY:
 		ADRY.togglePersistentMode()
 
 
-	def toggleSampleTemperatureControl():
+	def toggleSampleTemperatureControl(self):
 		"""
 		This command only toggles the sample temperature controller. It does not 
 		pump the volumes etc. Use  <B>toggleFullTemperatureControl.vi</B> for 
@@ -199,7 +311,7 @@ class AttoDRY:
 		ADRY.toggleSampleTemperatureControl()
 
 
-	def toggleFullTemperatureControl():
+	def toggleFullTemperatureControl(self):
 		"""
 		This command only toggles the sample temperature controller. It does not 
 		pump the volumes etc. Use  <B>toggleFullTemperatureControl.vi</B> for 
@@ -208,61 +320,61 @@ class AttoDRY:
 		ADRY.toggleFullTemperatureControl()
 
 
-	def goToBaseTemperature():
+	def goToBaseTemperature(self):
 		"""
 		Initiates the "Base Temperature" command, as on the touch screen
  		"""
 		ADRY.goToBaseTemperature()
 
 
-	def get4KStageTemperature():
+	def get4KStageTemperature(self):
 		"""
 		Gets the current magnetic fiel
 		"""
-		StageTemperature = ctypes.c_float()
-		ADRY.get4KStageTemperature(ctypes.byref(StageTemperature))
-		return StageTemperature.value
+		out = self._buffers
+		ADRY.get4KStageTemperature(out.floatRef)
+		return out.float.value
 		
 
-	def getMagneticField():
+	def getMagneticField(self):
 		"""
 		Gets the current magnetic fiel
 		"""
-		MagneticField = ctypes.c_float()
-		ADRY.getMagneticField(ctypes.byref(MagneticField))
-		return MagneticField.value
+		out = self._buffers
+		ADRY.getMagneticField(out.floatRef)
+		return out.float.value
 
 
-	def getMagneticFieldSetPoint():
+	def getMagneticFieldSetPoint(self):
 		"""
 		Gets the current magnetic field set point
 		"""
-		MagneticField = ctypes.c_float()
-		ADRY.getMagneticFieldSetPoint(ctypes.byref(MagneticField))
-		return MagneticField.value
+		out = self._buffers
+		ADRY.getMagneticFieldSetPoint(out.floatRef)
+		return out.float.value
 
 
-	def getSampleTemperature():
+	def getSampleTemperature(self):
 		"""
 		Gets the sample temperature in Kelvin. This value is updated whenever a 
 		status message is received from the attoDRY.
 		"""
-		Temperature = ctypes.c_float()
-		ADRY.getSampleTemperature(ctypes.byref(Temperature))
-		return Temperature.value
+		out = self._buffers
+		ADRY.getSampleTemperature(out.floatRef)
+		return out.float.value
 
 
-	def getUserTemperature():
+	def getUserTemperature(self):
 		"""
 		Gets the user set point temperature, in Kelvin. This value is updated 
 		whenever a status message is received from the attoDRY.
 		"""
-		Temperature = ctypes.c_float()
-		ADRY.getUserTemperature(ctypes.byref(Temperature))
-		return Temperature.value
+		out = self._buffers
+		ADRY.getUserTemperature(out.floatRef)
+		return out.float.value
 
 
-	def setUserMagneticField(MagneticField):
+	def setUserMagneticField(self, MagneticField):
 		"""
 		Sets the user magntic field. This is used as the set point when field 
 		control is active
@@ -270,7 +382,7 @@ class AttoDRY:
 		ADRY.setUserMagneticField(ctypes.c_float(MagneticField))
 
 
-	def setUserTemperature(Temperature):
+	def setUserTemperature(self, Temperature):
 		"""
 		Sets the user temperature. This is the temperature used when temperature 
 		control is enabled.
@@ -282,7 +394,7 @@ class AttoDRY:
 ##### TODO: test the following functions
 ##################################################################################
 
-	def downloadSampleTemperatureSensorCalibrationCurve(savepath):
+	def downloadSampleTemperatureSensorCalibrationCurve(self, savepath):
 		"""
 		Starts the download of the <B>Sample Temperature Sensor Calibration 
 		Curve</B>. The curve will be saved to <B>Save Path</B>
@@ -291,7 +403,7 @@ class AttoDRY:
 		ADRY.downloadSampleTemperatureSensorCalibrationCurve(ctypes.c_char_p(Savepath).value)
 
 
-	def downloadTemperatureSensorCalibrationCurve(UserCurveNumber,savepath):
+	def downloadTemperatureSensorCalibrationCurve(self, UserCurveNumber,savepath):
 		"""
 		Starts the download of the Temperature Sensor Calibration Curve at <b>User 
 		Curve Number</B> on the temperature monitor. The curve will be saved to 
@@ -301,7 +413,7 @@ class AttoDRY:
 		ADRY.downloadTemperatureSensorCalibrationCurve(ctypes.c_int(UserCurveNumber),ctypes.c_char_p(Savepath).value)
 
 
-	def getDerivativeGain():
+	def getDerivativeGain(self):
 		"""
 		Gets the Derivative gain. The gain retrieved depends on which heater is 
 		active:
@@ -312,12 +424,12 @@ class AttoDRY:
 		- If the VTI heater is on and no sample temperature sensor is connected, 
 		the <B>Exchange Heater</B> gain is returned
 		 """
-		DerivativeGain = ctypes.c_float()
-		ADRY.getDerivativeGain(ctypes.byref(DerivativeGain))
-		return DerivativeGain.value
+		out = self._buffers
+		ADRY.getDerivativeGain(out.floatRef)
+		return out.float.value
 
 
-	def getIntegralGain():
+	def getIntegralGain(self):
 		"""
 		Gets the Integral gain. The gain retrieved depends on which heater is 
 		active:
@@ -328,12 +440,12 @@ class AttoDRY:
 		- If the VTI heater is on and no sample temperature sensor is connected, 
 		the <B>Exchange Heater</B> gain is returned
 		"""
-		IntegralGain = ctypes.c_float()
-		ADRY.getIntegralGain(ctypes.byref(IntegralGain))
-		return IntegralGain.value
+		out = self._buffers
+		ADRY.getIntegralGain(out.floatRef)
+		return out.float.value
 
 
-	def getProportionalGain():
+	def getProportionalGain(self):
 		"""
 		Gets the Proportional gain. The gain retrieved depends on which heater is 
 		active:
@@ -344,12 +456,12 @@ class AttoDRY:
 		- If the VTI heater is on and no sample temperature sensor is connected, 
 		the <B>Exchange Heater</B> gain is returned
 		"""
-		ProportionalGain = ctypes.c_float()
-		ADRY.getProportionalGain(ctypes.byref(ProportionalGain))
-		return ProportionalGain.value
+		out = self._buffers
+		ADRY.getProportionalGain(out.floatRef)
+		return out.float.value
 
 
-	def getSampleHeaterMaximumPower():
+	def getSampleHeaterMaximumPower(self):
 		"""
 		Gets the maximum power limit of the sample heater in Watts. This value, is 
 		the one stored in memory on the computer, not the one on the attoDRY. You 
@@ -360,21 +472,21 @@ class AttoDRY:
 		non-volatile memory, this means that the value will not be lost, even if 
 		the attoDRY is turned off.
 		"""
-		SampleHeaterMaximumPower = ctypes.c_float()
-		ADRY.getSampleHeaterMaximumPower(ctypes.byref(SampleHeaterMaximumPower))
-		return SampleHeaterMaximumPower.value
+		out = self._buffers
+		ADRY.getSampleHeaterMaximumPower(out.floatRef)
+		return out.float.value
 
 
-	def getSampleHeaterPower():
+	def getSampleHeaterPower(self):
 		"""
 		Gets the current Sample Heater power, in Watts
 		"""
-		SampleHeaterPower = ctypes.c_float()
-		ADRY.getSampleHeaterPower(ctypes.byref(SampleHeaterPower))
-		return SampleHeaterPower.value
+		out = self._buffers
+		ADRY.getSampleHeaterPower(out.floatRef)
+		return out.float.value
 
 
-	def getSampleHeaterResistance():
+	def getSampleHeaterResistance(self):
 		"""
 		Gets the resistance of the sample heater in Ohms. This value, is the one 
 		stored in memory on the computer, not the one on the attoDRY. You should 
@@ -388,12 +500,12 @@ class AttoDRY:
 		Power = Voltage^2/((HeaterResistance + WireResistance)^2) * 
 		HeaterResistance
 		"""
-		SampleHeaterResistance = ctypes.c_float()
-		ADRY.getSampleHeaterResistance(ctypes.byref(SampleHeaterResistance))
-		return SampleHeaterResistance.value
+		out = self._buffers
+		ADRY.getSampleHeaterResistance(out.floatRef)
+		return out.float.value
 
 
-	def getSampleHeaterWireResistance():
+	def getSampleHeaterWireResistance(self):
 		"""
 		Gets the resistance of the sample heater wires in Ohms. This value, is the 
 		one stored in memory on the computer, not the one on the attoDRY. You 
@@ -407,110 +519,110 @@ class AttoDRY:
 		Power = Voltage^2/((HeaterResistance + WireResistance)^2) * 
 		HeaterResistance
  		"""
-		SampleHeaterWireResistance = ctypes.c_float()
-		ADRY.getSampleHeaterWireResistance(ctypes.byref(SampleHeaterWireResistance))
-		return SampleHeaterWireResistance.value
+		out = self._buffers
+		ADRY.getSampleHeaterWireResistance(out.floatRef)
+		return out.float.value
 
 
-	def getVtiHeaterPower():
+	def getVtiHeaterPower(self):
 		"""
 		Returns the VTI Heater power, in Watts
 		"""
-		VtiHeaterPower = ctypes.c_float()
-		ADRY.getVtiHeaterPower(ctypes.byref(VtiHeaterPower))
-		return VtiHeaterPower.value
+		out = self._buffers
+		ADRY.getVtiHeaterPower(out.floatRef)
+		return out.float.value
 
 
 
-	def getVtiTemperature():
+	def getVtiTemperature(self):
 		"""
 		Returns the temperature of the VTI
 		"""
-		VtiTemperature = ctypes.c_float()
-		ADRY.getVtiTemperature(ctypes.byref(VtiTemperature))
-		return VtiTemperature.value
+		out = self._buffers
+		ADRY.getVtiTemperature(out.floatRef)
+		return out.float.value
 
 
-	def isGoingToBaseTemperature():
+	def isGoingToBaseTemperature(self):
 		"""
 		Returns 'True' if the base temperature process is active. This is true when 
 		the base temperature button on the touch screen is orange, and false when 
 		the button is white.
 		"""
-		GoingToBaseTemperature = ctypes.c_int()
-		ADRY.isGoingToBaseTemperature(ctypes.byref(GoingToBaseTemperature))
-		return GoingToBaseTemperature.value
+		out = self._buffers
+		ADRY.isGoingToBaseTemperature(out.intRef)
+		return out.int.value
 
 
-	def isPumping():
+	def isPumping(self):
 		"""
 		Returns true if the pump is running
 		"""
-		Pumping = ctypes.c_int()
-		ADRY.isPumping(ctypes.byref(Pumping))
-		return Pumping.value
+		out = self._buffers
+		ADRY.isPumping(out.intRef)
+		return out.int.value
 
 
-	def isSampleExchangeInProgress():
+	def isSampleExchangeInProgress(self):
 		"""
 		Returns 'True' if the sample exchange process is active. This is true when 
 		the sample exchange button on the touch screen is orange, and false when 
 		the button is white.
 		"""
-		SampleExchangeInProgress = ctypes.c_int()
-		ADRY.isSampleExchangeInProgress(ctypes.byref(SampleExchangeInProgress))
-		return SampleExchangeInProgress.value
+		out = self._buffers
+		ADRY.isSampleExchangeInProgress(out.intRef)
+		return out.int.value
 
 
 
-	def isSampleHeaterOn():
+	def isSampleHeaterOn(self):
 		"""
 		Checks to see if the sample heater is on. 'On' is defined as PID control is 
 		active or a contant heater power is set. 
 		"""
-		SampleHeaterOn = ctypes.c_int()
-		ADRY.isSampleHeaterOn(ctypes.byref(SampleHeaterOn))
-		return SampleHeaterOn.value
+		out = self._buffers
+		ADRY.isSampleHeaterOn(out.intRef)
+		return out.int.value
 
 
-	def isSampleReadyToExchange():
+	def isSampleReadyToExchange(self):
 		"""
 		This will return true when the sample stick is ready to be removed or 
 		inserted.
 		"""
-		SampleReadyToExchange = ctypes.c_int()
-		ADRY.isSampleReadyToExchange(ctypes.byref(SampleReadyToExchange))
-		return SampleReadyToExchange.value
+		out = self._buffers
+		ADRY.isSampleReadyToExchange(out.intRef)
+		return out.int.value
 
 
-	def isSystemRunning():
+	def isSystemRunning(self):
 		"""
 		This will return true when the sample stick is ready to be removed or 
 		inserted.
 		"""
-		SystemRunning = ctypes.c_int()
-		ADRY.isSystemRunning(ctypes.byref(SystemRunning))
-		return SystemRunning.value
+		out = self._buffers
+		ADRY.isSystemRunning(out.intRef)
+		return out.int.value
 
 
-	def isZeroingField():
+	def isZeroingField(self):
 		"""
 		This will return true when the sample stick is ready to be removed or 
 		inserted.
 		"""
-		ZeroingField = ctypes.c_int()
-		ADRY.isZeroingField(ctypes.byref(ZeroingField))
-		return ZeroingField.value
+		out = self._buffers
+		ADRY.isZeroingField(out.intRef)
+		return out.int.value
 
 
-	def lowerError():
+	def lowerError(self):
 		"""
 		Lowers any raised errors
 		"""
 		ADRY.lowerError()
 
 
-	def querySampleHeaterMaximumPower():
+	def querySampleHeaterMaximumPower(self):
 		"""
 		Requests the maximum power limit of the sample heater in Watts from the 
 		attoDRY. After running this command, use the appropriate <B>get VI</B> to 
@@ -524,7 +636,7 @@ class AttoDRY:
 
 
 
-	def querySampleHeaterResistance():
+	def querySampleHeaterResistance(self):
 		"""
 		Requests the  resistance of the sample heater in Ohms from the attoDRY. 
 		After running this command, use the appropriate <B>get VI</B> to get the 
@@ -540,7 +652,7 @@ class AttoDRY:
 		ADRY.querySampleHeaterResistance()
 
 
-	def querySampleHeaterWireResistance():
+	def querySampleHeaterWireResistance(self):
 		"""
 		Requests the  resistance of the sample wires heater in Ohms from the 
 		attoDRY. After running this command, use the appropriate <B>get VI</B> to 
@@ -556,7 +668,7 @@ class AttoDRY:
 		ADRY.querySampleHeaterWireResistance()
 
 
-	def setDerivativeGain(DerivativeGain):
+	def setDerivativeGain(self, DerivativeGain):
 		"""
 		Sets the Derivative gain. The controller that is updated depends on which 
 		heater is active:
@@ -570,7 +682,7 @@ class AttoDRY:
 		ADRY.setDerivativeGain(ctypes.c_float(DerivativeGain))
 
 
-	def setIntegralGain(IntegralGain):
+	def setIntegralGain(self, IntegralGain):
 		"""
 		Sets the Integral gain. The controller that is updated depends on which 
 		heater is active:
@@ -584,7 +696,7 @@ class AttoDRY:
 		ADRY.setIntegralGain(ctypes.c_float(IntegralGain))
 
 
-	def setProportionalGain(ProportionalGain):
+	def setProportionalGain(self, ProportionalGain):
 		"""
 		Sets the Proportional gain. The controller that is updated depends on which 
 		heater is active:
@@ -598,7 +710,7 @@ class AttoDRY:
 		ADRY.setProportionalGain(ctypes.c_float(ProportionalGain))
 
 
-	def setSampleHeaterMaximumPower(MaximumPower):
+	def setSampleHeaterMaximumPower(self, MaximumPower):
 		"""
 		Sets the maximum power limit of the sample heater in Watts. After running 
 		this command, use the appropriate <B>request</B> and <B>get</B> VIs to 
@@ -614,7 +726,7 @@ class AttoDRY:
 		ADRY.setSampleHeaterMaximumPower(ctypes.c_float(MaximumPower))
 
 
-	def setSampleHeaterWireResistance(WireResistance):
+	def setSampleHeaterWireResistance(self, WireResistance):
 		"""
 		Sets the resistance of the sample heater wires in Ohms. After running this 
 		command, use the appropriate <B>request</B> and <B>get</B> VIs to check the 
@@ -635,14 +747,14 @@ class AttoDRY:
 		ADRY.setSampleHeaterWireResistance(ctypes.c_float(WireResistance))
 
 
-	def setSampleHeaterPower(HeaterPowerW):
+	def setSampleHeaterPower(self, HeaterPowerW):
 		"""
 		Sets the sample heater value to the specified value
 		"""
 		ADRY.setSampleHeaterPower(ctypes.c_float(HeaterPowerW))
 
 
-	def setSampleHeaterResistance(HeaterResistance):
+	def setSampleHeaterResistance(self, HeaterResistance):
 		"""
 		Sets the resistance of the sample heater in Ohms. After running this 
 		command, use the appropriate <B>request</B> and <B>get</B> VIs to check the 
@@ -663,7 +775,7 @@ class AttoDRY:
 		ADRY.setSampleHeaterResistance(ctypes.c_float(HeaterResistance))
 
 
-	def startLogging(savepath,TimeSelection,Append):
+	def startLogging(self, savepath,TimeSelection,Append):
 		"""
 		Starts logging data to the file specifed by <B>Path</B>. 
 
@@ -679,28 +791,28 @@ class AttoDRY:
 		ADRY.startLogging(ctypes.c_char_p(Savepath).value,ctypes.c_int(TimeSelection).value,ctypes.c_int(Append).value)
 
 
-	def startSampleExchange():
+	def startSampleExchange(self):
 		"""
 		Starts the sample exchange procedure
 		"""
 		ADRY.startSampleExchange()
 
 
-	def stopLogging():
+	def stopLogging(self):
 		"""
 		Stops logging data
 		"""
 		ADRY.stopLogging()
 
 
-	def sweepFieldToZero():
+	def sweepFieldToZero(self):
 		"""
 		Initiates the "Zero Field" command, as on the touch screen
 		"""
 		ADRY.sweepFieldToZero()
 
 
-	def togglePump():
+	def togglePump(self):
 		"""
 		Starts and stops the pump. If the pump is running, it will stop it. If the 
 		pump is not running, it will be started.
@@ -708,7 +820,7 @@ class AttoDRY:
 		ADRY.togglePump()
 
 
-	def toggleStartUpShutdown():
+	def toggleStartUpShutdown(self):
 		"""
 		Toggles the start up/shutdown procedure. If the attoDRY is started up, the 
 		shut down procedure will be run and vice versa
@@ -716,7 +828,7 @@ class AttoDRY:
 		ADRY.toggleStartUpShutdown()
 
 
-	def uploadSampleTemperatureCalibrationCurve(loadpath):
+	def uploadSampleTemperatureCalibrationCurve(self, loadpath):
 		"""
 		Starts the upload of a <B>.crv calibration curve file</B> to the <B>sample 
 		temperature sensor</B>
@@ -725,7 +837,7 @@ class AttoDRY:
 		ADRY.uploadSampleTemperatureCalibrationCurve(ctypes.c_char_p(Loadpath).value)
 
 
-	def uploadTemperatureCalibrationCurve(loadpath,UserCurveNumber):
+	def uploadTemperatureCalibrationCurve(self, loadpath,UserCurveNumber):
 		"""
 		Starts the upload of a <B>.crv calibration curve file</B> to the specified 
 		<B>User Curve Number</B> on the temperature monitor. Use a curve number of 
@@ -735,164 +847,164 @@ class AttoDRY:
 		ADRY.uploadTemperatureCalibrationCurve(ctypes.c_int(UserCurveNumber).value,ctypes.c_char_p(Loadpath).value)
 
 
-	def setVTIHeaterPower(VTIHeaterPowerW):
+	def setVTIHeaterPower(self, VTIHeaterPowerW):
 		"""
 		AttoDRY_Interface_setVTIHeaterPower
 		"""
 		ADRY.setVTIHeaterPower(ctypes.c_float(VTIHeaterPowerW))
 
 
-	def queryReservoirTsetColdSample():
+	def queryReservoirTsetColdSample(self):
 		"""
 		AttoDRY_Interface_queryReservoirTsetColdSample
 		"""
 		ADRY.queryReservoirTsetColdSample()
 
 
-	def getReservoirTsetColdSample():
+	def getReservoirTsetColdSample(self):
 		"""
 		AttoDRY_Interface_getReservoirTsetColdSample
 		"""
-		ReservoirTsetColdSampleK = ctypes.c_float()
-		ADRY.getReservoirTsetColdSample(ctypes.byref(ReservoirTsetColdSampleK))
-		return ReservoirTsetColdSampleK.value
+		out = self._buffers
+		ADRY.getReservoirTsetColdSample(out.floatRef)
+		return out.float.value
 
 
-	def setReservoirTsetWarmMagnet(ReservoirTsetWarmMagnetW):
+	def setReservoirTsetWarmMagnet(self, ReservoirTsetWarmMagnetW):
 		"""
 		AttoDRY_Interface_setReservoirTsetWarmMagnet
 		"""
 		ADRY.setReservoirTsetWarmMagnet(ctypes.c_float(ReservoirTsetWarmMagnetW))
 
 
-	def setReservoirTsetColdSample(SetReservoirTsetColdSampleK):
+	def setReservoirTsetColdSample(self, SetReservoirTsetColdSampleK):
 		"""
 		AttoDRY_Interface_setReservoirTsetColdSample
 		"""
 		ADRY.setReservoirTsetColdSample(ctypes.c_float(SetReservoirTsetColdSampleK))
 
 
-	def setReservoirTsetWarmSample(ReservoirTsetWarmSampleW):
+	def setReservoirTsetWarmSample(self, ReservoirTsetWarmSampleW):
 		"""
 		AttoDRY_Interface_setReservoirTsetWarmSample
 		"""
 		ADRY.setReservoirTsetWarmSample(ctypes.c_float(ReservoirTsetWarmSampleW))
 
 
-	def queryReservoirTsetWarmSample():
+	def queryReservoirTsetWarmSample(self):
 		"""
 		AttoDRY_Interface_queryReservoirTsetWarmSample
 		"""
 		ADRY.queryReservoirTsetWarmSample()
 
 
-	def queryReservoirTsetWarmMagnet():
+	def queryReservoirTsetWarmMagnet(self):
 		"""
 		AttoDRY_Interface_queryReservoirTsetWarmMagnet
 		"""
 		ADRY.queryReservoirTsetWarmMagnet()
 
 
-	def getReservoirTsetWarmSample():
+	def getReservoirTsetWarmSample(self):
 		"""
 		AttoDRY_Interface_getReservoirTsetWarmSample
 		"""
-		ReservoirTsetWarmSampleK = ctypes.c_float()
-		ADRY.getReservoirTsetWarmSample(ctypes.byref(ReservoirTsetWarmSampleK))
-		return ReservoirTsetWarmSampleK.value
+		out = self._buffers
+		ADRY.getReservoirTsetWarmSample(out.floatRef)
+		return out.float.value
 
 
-	def getReservoirTsetWarmMagnet():
+	def getReservoirTsetWarmMagnet(self):
 		"""
 		AttoDRY_Interface_getReservoirTsetWarmMagnet
 		"""
-		ReservoirTsetWarmMagnetK = ctypes.c_float()
-		ADRY.getReservoirTsetWarmMagnet(ctypes.byref(ReservoirTsetWarmMagnetK))
-		return ReservoirTsetWarmMagnetK.value
+		out = self._buffers
+		ADRY.getReservoirTsetWarmMagnet(out.floatRef)
+		return out.float.value
 
 
-	def getCryostatInPressure():
+	def getCryostatInPressure(self):
 		"""
 		ATTODRY2100 ONLY. Gets the pressure at the Cryostat Inlet
 		"""
-		CryostatInPressureMbar = ctypes.c_float()
-		ADRY.getCryostatInPressure(ctypes.byref(CryostatInPressureMbar))
-		return CryostatInPressureMbar.value
+		out = self._buffers
+		ADRY.getCryostatInPressure(out.floatRef)
+		return out.float.value
 
 
-	def getCryostatInValve():
+	def getCryostatInValve(self):
 		"""
 		ATTODRY2100 ONLY. Gets the current status of the Cryostat In valve.
 		"""
-		valveStatus = ctypes.c_int()
-		ADRY.getCryostatInValve(ctypes.byref(valveStatus))
-		return valveStatus.value
+		out = self._buffers
+		ADRY.getCryostatInValve(out.intRef)
+		return out.int.value
 
 
-	def getCryostatOutPressure():
+	def getCryostatOutPressure(self):
 		"""
 		Gets the Cryostat Outlet pressure
 		"""
-		CryostatOutPressureMbar = ctypes.c_float()
-		ADRY.getCryostatOutPressure(ctypes.byref(CryostatOutPressureMbar))
-		return CryostatOutPressureMbar.value
+		out = self._buffers
+		ADRY.getCryostatOutPressure(out.floatRef)
+		return out.float.value
 
 
-	def getCryostatOutValve():
+	def getCryostatOutValve(self):
 		"""
 		ATTODRY2100 ONLY. Gets the current status of the Cryostat Out valve.
 		"""
-		valveStatus = ctypes.c_int()
-		ADRY.getCryostatOutValve(ctypes.byref(valveStatus))
-		return valveStatus.value
+		out = self._buffers
+		ADRY.getCryostatOutValve(out.intRef)
+		return out.int.value
 
 
-	def getDumpInValve():
+	def getDumpInValve(self):
 		"""
 		ATTODRY2100 ONLY. Gets the current status of the Dump In volume valve. 
 		"""
-		valveStatus = ctypes.c_int()
-		ADRY.getDumpInValve(ctypes.byref(valveStatus))
-		return valveStatus.value
+		out = self._buffers
+		ADRY.getDumpInValve(out.intRef)
+		return out.int.value
 
 
-	def getDumpOutValve():
+	def getDumpOutValve(self):
 		"""
 		ATTODRY2100 ONLY. Gets the current status of the outer volume valve. 
 		"""
-		valveStatus = ctypes.c_int()
-		ADRY.getDumpOutValve(ctypes.byref(valveStatus))
-		return valveStatus.value
+		out = self._buffers
+		ADRY.getDumpOutValve(out.intRef)
+		return out.int.value
 
 
-	def getDumpPressure():
+	def getDumpPressure(self):
 		"""
 		ATTODRY2100 ONLY. Gets the pressure at the Dump
 		"""
-		DumpPressureMbar = ctypes.c_float()
-		ADRY.getDumpPressure(ctypes.byref(DumpPressureMbar))
-		return DumpPressureMbar.value
+		out = self._buffers
+		ADRY.getDumpPressure(out.floatRef)
+		return out.float.value
 
 
-	def getReservoirHeaterPower():
+	def getReservoirHeaterPower(self):
 		"""
 		ATTODRY2100 ONLY. Gets the pressure at the Dump
 		"""
-		ReservoirHeaterPowerW = ctypes.c_float()
-		ADRY.getReservoirHeaterPower(ctypes.byref(ReservoirHeaterPowerW))
-		return ReservoirHeaterPowerW.value
+		out = self._buffers
+		ADRY.getReservoirHeaterPower(out.floatRef)
+		return out.float.value
 
 
-	def getReservoirTemperature():
+	def getReservoirTemperature(self):
 		"""
 		ATTODRY2100 ONLY. Gets the pressure at the Dump
 		"""
-		ReservoirTemperatureK = ctypes.c_float()
-		ADRY.getReservoirTemperature(ctypes.byref(ReservoirTemperatureK))
-		return ReservoirTemperatureK.value
+		out = self._buffers
+		ADRY.getReservoirTemperature(out.floatRef)
+		return out.float.value
 
 
-	def toggleCryostatInValve():
+	def toggleCryostatInValve(self):
 		"""
 		ATTODRY2100 ONLY. Toggles the Cryostat In valve. If it is closed, it will 
 		open and if it is open, it will close. 
@@ -900,7 +1012,7 @@ class AttoDRY:
 		ADRY.toggleCryostatInValve()
 
 
-	def toggleCryostatOutValve():
+	def toggleCryostatOutValve(self):
 		"""
 		ATTODRY2100 ONLY. Toggles the Cryostat Out valve. If it is closed, it will 
 		open and if it is open, it will close. 
@@ -908,7 +1020,7 @@ class AttoDRY:
 		ADRY.toggleCryostatOutValve()
 
 
-	def toggleDumpInValve():
+	def toggleDumpInValve(self):
 		"""
 		ATTODRY2100 ONLY. Toggles the inner volume valve. If it is closed, it will 
 		open and if it is open, it will close.  
@@ -916,7 +1028,7 @@ class AttoDRY:
 		ADRY.toggleDumpInValve()
 
 
-	def toggleDumpOutValve():
+	def toggleDumpOutValve(self):
 		"""
 		ATTODRY2100 ONLY. Toggles the outer volume valve. If it is closed, it will 
 		open and if it is open, it will close. 
@@ -924,85 +1036,85 @@ class AttoDRY:
 		ADRY.toggleDumpOutValve()
 
 
-	def get40KStageTemperature():
+	def get40KStageTemperature(self):
 		"""
 		ATTODRY1100 ONLY. Gets the current temperature of the 40K Stage, in Kelvin
 		"""
-		StageTemperatureK = ctypes.c_float()
-		ADRY.get40KStageTemperature(ctypes.byref(StageTemperatureK))
-		return StageTemperatureK.value
+		out = self._buffers
+		ADRY.get40KStageTemperature(out.floatRef)
+		return out.float.value
 
 
-	def getHeliumValve():
+	def getHeliumValve(self):
 		"""
 		ATTODRY1100 ONLY. Gets the current status of the helium valve. True is 
 		opened, false is closed.
 		"""
-		valveStatus = ctypes.c_int()
-		ADRY.getHeliumValve(ctypes.byref(valveStatus))
-		return valveStatus.value
+		out = self._buffers
+		ADRY.getHeliumValve(out.intRef)
+		return out.int.value
 
 
-	def getInnerVolumeValve():
+	def getInnerVolumeValve(self):
 		"""
 		ATTODRY1100 ONLY. Gets the current status of the inner volume valve. True 
 		is opened, false is closed.
 		"""
-		valveStatus = ctypes.c_int()
-		ADRY.getInnerVolumeValve(ctypes.byref(valveStatus))
-		return valveStatus.value
+		out = self._buffers
+		ADRY.getInnerVolumeValve(out.intRef)
+		return out.int.value
 
 
-	def getOuterVolumeValve():
+	def getOuterVolumeValve(self):
 		"""
 		ATTODRY1100 ONLY. Gets the current status of the outer volume valve. True 
 		is opened, false is closed.
 		"""
-		valveStatus = ctypes.c_int()
-		ADRY.getOuterVolumeValve(ctypes.byref(valveStatus))
-		return valveStatus.value
+		out = self._buffers
+		ADRY.getOuterVolumeValve(out.intRef)
+		return out.int.value
 
 
-	def getPressure():
+	def getPressure(self):
 		"""
 		ATTODRY1100 ONLY. Gets the current presure in the valve junction block, in 
 		mbar. 
 		"""
-		PressureMbar = ctypes.c_float()
-		ADRY.getPressure(ctypes.byref(PressureMbar))
-		return PressureMbar.value
+		out = self._buffers
+		ADRY.getPressure(out.floatRef)
+		return out.float.value
 
 
-	def getPumpValve():
+	def getPumpValve(self):
 		"""
 		ATTODRY1100 ONLY. Gets the current status of the pump valve. True is 
 		opened, false is closed.
 		"""
-		valveStatus = ctypes.c_int()
-		ADRY.getPumpValve(ctypes.byref(valveStatus))
-		return valveStatus.value
+		out = self._buffers
+		ADRY.getPumpValve(out.intRef)
+		return out.int.value
 
 
-	def getTurbopumpFrequency():
+	def getTurbopumpFrequency(self):
 		"""
 		ATTODRY1100 ONLY. Gets the current frequency of the turbopump.
 		"""
-		TurbopumpFrequencyHz = ctypes.c_float()
-		ADRY.getTurbopumpFrequency(ctypes.byref(TurbopumpFrequencyHz))
-		return TurbopumpFrequencyHz.value
+		out = self._buffers
+		ADRY.getTurbopumpFrequency(out.floatRef)
+		return out.float.value
 
 
-	def isExchangeHeaterOn():
+	def isExchangeHeaterOn(self):
 		"""
 		Checks to see if the exchange/vti heater is on. 'On' is defined as PID 
 		control is active or a constant heater power is set. 
 		"""
-		ExchangeHeaterStatus = ctypes.c_int()
-		ADRY.isExchangeHeaterOn(ctypes.byref(ExchangeHeaterStatus))
-		return ExchangeHeaterStatus.value
+		out = self._buffers
+		ADRY.isExchangeHeaterOn(out.intRef)
+		return out.int.value
 
 
-	def toggleExchangeHeaterControl():
+	def toggleExchangeHeaterControl(self):
 		"""
 		This command only toggles the exchange/vti temperature controller. If a 
 		sample temperature sensor is connected, this will be controlled, otherwise 
@@ -1011,7 +1123,7 @@ class AttoDRY:
 		ADRY.toggleExchangeHeaterControl()
 
 
-	def toggleHeliumValve():
+	def toggleHeliumValve(self):
 		"""
 		ATTODRY1100 ONLY. Toggles the helium valve. If it is closed, it will open 
 		and if it is open, it will close.
@@ -1019,7 +1131,7 @@ class AttoDRY:
 		ADRY.toggleHeliumValve()
 
 
-	def toggleInnerVolumeValve():
+	def toggleInnerVolumeValve(self):
 		"""
 		ATTODRY1100 ONLY. 
 		Toggles the inner volume valve. If it is closed, it will open and if it is 
@@ -1028,7 +1140,7 @@ class AttoDRY:
 		ADRY.toggleInnerVolumeValve()
 
 
-	def toggleOuterVolumeValve():
+	def toggleOuterVolumeValve(self):
 		"""
 		ATTODRY1100 ONLY. Toggles the outer volume valve. If it is closed, it will 
 		open and if it is open, it will close. 
@@ -1036,7 +1148,7 @@ class AttoDRY:
 		ADRY.toggleOuterVolumeValve()
 
 
-	def togglePumpValve():
+	def togglePumpValve(self):
 		"""
 		ATTODRY1100 ONLY. Toggles the pump valve. If it is closed, it will open and 
 		if it is open, it will close. 
@@ -1044,16 +1156,16 @@ class AttoDRY:
 		ADRY.togglePumpValve()
 
 
-	def getBreakVac800Valve():
+	def getBreakVac800Valve(self):
 		"""
 		ATTODRY800 ONLY. Gets the current status of the BreakVacuum valve. 
 		"""
-		valveStatus = ctypes.c_int()
-		ADRY.getTurbopumpFrequency(ctypes.byref(valveStatus))
-		return valveStatus.value
+		out = self._buffers
+		ADRY.getBreakVac800Valve(out.intRef)
+		return out.int.value
 
 
-	def toggleSampleSpace800Valve():
+	def toggleSampleSpace800Valve(self):
 		"""
 		ATTODRY800 ONLY. Toggles the SampleSpace valve. If it is closed, it will 
 		open and if it is open, it will close.
@@ -1061,25 +1173,25 @@ class AttoDRY:
 		ADRY.toggleSampleSpace800Valve()
 
 
-	def getPump800Valve():
+	def getPump800Valve(self):
 		"""
 		ATTODRY800 ONLY. Gets the current status of the Pump valve. 
 		"""
-		valveStatus = ctypes.c_int()
-		ADRY.getPump800Valve(ctypes.byref(valveStatus))
-		return valveStatus.value
+		out = self._buffers
+		ADRY.getPump800Valve(out.intRef)
+		return out.int.value
 
 
-	def getSampleSpace800Valve():
+	def getSampleSpace800Valve(self):
 		"""
 		ATTODRY800 ONLY. Gets the current status of the SampleSpace valve.
 		"""
-		valveStatus = ctypes.c_int()
-		ADRY.getSampleSpace800Valve(ctypes.byref(valveStatus))
-		return valveStatus.value
+		out = self._buffers
+		ADRY.getSampleSpace800Valve(out.intRef)
+		return out.int.value
 
 
-	def togglePump800Valve():
+	def togglePump800Valve(self):
 		"""
 		ATTODRY800 ONLY. Toggles the Pump valve. If it is closed, it will open and 
 		if it is open, it will close.
@@ -1087,7 +1199,7 @@ class AttoDRY:
 		ADRY.togglePump800Valve()
 
 
-	def toggleBreakVac800Valve():
+	def toggleBreakVac800Valve(self):
 		"""
 		ATTODRY800 ONLY. Toggles the BreakVacuum valve. If it is closed, it will 
 		open and if it is open, it will close. 
@@ -1095,19 +1207,40 @@ class AttoDRY:
 		ADRY.toggleBreakVac800Valve()
 
 
-	def getPressure800():
+	def getPressure800(self):
 		"""
 		ATTODRY800 ONLY. Gets the pressure at the Cryostat Inlet.
 		"""
-		CryostatInPressureMbar = ctypes.c_float()
-		ADRY.getPressure800(ctypes.byref(CryostatInPressureMbar))
-		return CryostatInPressureMbar.value
+		out = self._buffers
+		ADRY.getPressure800(out.floatRef)
+		return out.float.value
 
 
-	def GetTurbopumpFrequ800():
+	def GetTurbopumpFrequ800(self):
 		"""
 		ATTODRY800 ONLY. Gets the current frequency of the turbopump.
 		"""
-		TurbopumpFrequencyHz = ctypes.c_float()
-		ADRY.GetTurbopumpFrequ800(ctypes.byref(TurbopumpFrequencyHz))
-		return TurbopumpFrequencyHz.value
\ No newline at end of file
+		out = self._buffers
+		ADRY.GetTurbopumpFrequ800(out.floatRef)
+		return out.float.value
+
+
+def _getter(channel):
+	# reads <channel> like the getters above; for channels of the registry without a method
+	def get(self):
+		out = self._buffers
+		if channel.ctype is ctypes.c_float:
+			getattr(ADRY, channel.name)(out.floatRef)
+			return out.float.value
+		getattr(ADRY, channel.name)(out.intRef)
+		return out.int.value
+	get.__name__ = channel.name
+	get.__qualname__ = 'AttoDRY.' + channel.name
+	get.__doc__ = channel.description + '.'
+	return get
+
+
+for _channel in AttoDRYchannels.registry:
+	if not hasattr(AttoDRY, _channel.name):
+		setattr(AttoDRY, _channel.name, _getter(_channel))
+del _channel
\ No newline at end of file
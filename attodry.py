@@ -0,0 +1,245 @@
+# Command line tool for the attoDRY.
+# Connects through a Session (waits for the initialisation, reconnects if the connection is
+# lost) and reads the channels with a Poller, i.e. one batch of DLL calls per refresh. The DLL
+# is only loaded once a command needs it, and with --backend sim not at all.
+#
+# usage:
+#	python attodry.py status						live view of all channels (Ctrl-C to quit)
+#	python attodry.py watch getSampleTemperature getMagneticField --interval 0.5
+#	python attodry.py set temperature 1.9 --wait
+#	python attodry.py set field 0.5 --wait --tolerance 0.001
+#	python attodry.py valve pump open
+#	python attodry.py record run.adtel --interval 1 --duration 3600
+#	python attodry.py --backend sim --speed 100 --cold status
+
+import argparse
+import math
+import sys
+import threading
+import time
+
+import AttoDRYclock
+import AttoDRYlib as ADRY
+
+# name -> (getter, toggle); the first pair that is available on the model is used
+valves = {
+	'cryostat-in': (('getCryostatInValve', 'toggleCryostatInValve'),),
+	'cryostat-out': (('getCryostatOutValve', 'toggleCryostatOutValve'),),
+	'dump-in': (('getDumpInValve', 'toggleDumpInValve'),),
+	'dump-out': (('getDumpOutValve', 'toggleDumpOutValve'),),
+	'helium': (('getHeliumValve', 'toggleHeliumValve'),),
+	'inner-volume': (('getInnerVolumeValve', 'toggleInnerVolumeValve'),),
+	'outer-volume': (('getOuterVolumeValve', 'toggleOuterVolumeValve'),),
+	'pump': (('getPumpValve', 'togglePumpValve'), ('getPump800Valve', 'togglePump800Valve')),
+	'sample-space': (('getSampleSpace800Valve', 'toggleSampleSpace800Valve'),),
+	'break-vacuum': (('getBreakVac800Valve', 'toggleBreakVac800Valve'),),
+}
+
+# quantity -> (setter, is controlling, toggle control, getter, default tolerance)
+setpoints = {
+	'temperature': ('setUserTemperature', 'isControllingTemperature', 'toggleFullTemperatureControl', 'getSampleTemperature', 0.05),
+	'field': ('setUserMagneticField', 'isControllingField', 'toggleMagneticFieldControl', 'getMagneticField', 0.001),
+}
+
+
+def connect(options):
+	"""
+	Selects the backend and returns a started Session
+	"""
+	if options.backend == 'sim':
+		import AttoDRYsim
+		if options.speed != 1:
+			AttoDRYclock.setClock(AttoDRYclock.VirtualClock(options.speed))
+		AttoDRYsim.install(state=dict(AttoDRYsim.cold) if options.cold else None)
+	elif options.dll_dir is not None:
+		ADRY.dll_directory = options.dll_dir
+	from AttoDRYsession import Session
+	session = Session(setup_version=options.model, COMPort=options.port, timeout=options.timeout)
+	session.start()
+	return session
+
+
+def formatValue(value):
+	if isinstance(value, float):
+		return '-' if math.isnan(value) else '%.6g' % value
+	return str(value)
+
+
+def formatTime(t):
+	return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(t))
+
+
+def render(snapshot, poller):
+	lines = ['%s  %s  polls: %d  read errors: %d' % (ADRY.models[ADRY.model], formatTime(snapshot.time), poller.polls, poller.errors), '']
+	width = max(len(name) for name in snapshot.values)
+	for name, value in snapshot.values.items():
+		lines.append('%-*s  %s' % (width, name, formatValue(value)))
+	return '\n'.join(lines)
+
+
+def status(session, options):
+	from AttoDRYpoller import Poller
+	# the polling thread waits for the session to be ready (e.g. while it reconnects)
+	poller = Poller(session.dev, interval=options.interval, gate=session.ready)
+	clear = sys.stdout.isatty() and not options.once
+	done = threading.Event()
+	failed = []
+
+	def show(snapshot):
+		try:
+			text = render(snapshot, poller)
+			if clear:
+				# redraw in place: cursor home, clear the screen
+				sys.stdout.write('\x1b[H\x1b[J')
+			print(text, flush=True)
+		except Exception as e:
+			# e.g. a closed pipe: ends the command instead of failing on every poll
+			failed.append(e)
+			done.set()
+		if options.once:
+			done.set()
+	poller.subscribe(show)
+	poller.start()
+	try:
+		while not done.wait(0.2):
+			pass
+	finally:
+		poller.stop()
+	if failed:
+		raise failed[0]
+
+
+def watch(session, options):
+	from AttoDRYpoller import Poller
+	channels = options.channels or ['getSampleTemperature', 'getMagneticField']
+	# only getters: any other alias (a setter or a toggle) would be called with every poll
+	available = session.dev.channels()
+	for name in channels:
+		if name not in available:
+			raise Exception('Error: '+name+' is not a channel of the '+ADRY.models[ADRY.model])
+	poller = Poller(session.dev, channels=channels, interval=options.interval, gate=session.ready)
+	done = threading.Event()
+	print('time                 ' + '  '.join('%14s' % name[:14] for name in channels), flush=True)
+
+	def show(snapshot):
+		print(formatTime(snapshot.time) + '  ' + '  '.join('%14s' % formatValue(snapshot.values[name]) for name in channels), flush=True)
+		if options.count and poller.polls >= options.count:
+			done.set()
+	poller.subscribe(show)
+	poller.start()
+	try:
+		while not done.wait(0.2):
+			pass
+	finally:
+		poller.stop()
+
+
+def setpoint(session, options):
+	setter, controlling, toggle, getter, tolerance = setpoints[options.quantity]
+	session.call(setter, options.value)
+	if session.call(controlling) != 1:
+		session.call(toggle)
+	if not options.wait:
+		return
+	tolerance = options.tolerance if options.tolerance is not None else tolerance
+	value = AttoDRYclock.waitStable(lambda: session.call(getter), options.value, tolerance, options.stable, options.wait_timeout, options.interval)
+	print('%s stable at %s' % (options.quantity, formatValue(value)))
+
+
+def valve(session, options):
+	for getter, toggle in valves[options.valve]:
+		if ADRY.available(toggle):
+			break
+	else:
+		raise Exception('Error: the '+ADRY.models[ADRY.model]+' has no '+options.valve+' valve')
+	state = session.call(getter)
+	if options.action == 'toggle' or state != (options.action == 'open'):
+		session.call(toggle)
+		AttoDRYclock.waitUntil(lambda: session.call(getter) != state, options.timeout, 0.5)
+		state = session.call(getter)
+	print('%s valve is %s' % (options.valve, 'open' if state else 'closed'))
+
+
+def record(session, options):
+	from AttoDRYpoller import Poller
+	from AttoDRYtelemetry import Writer
+	poller = Poller(session.dev, interval=options.interval, gate=session.ready)
+	with Writer(options.path, poller.channels) as writer:
+		poller.subscribe(writer.write)
+		poller.start()
+		try:
+			stop = threading.Event()
+			if options.duration is None:
+				while not stop.wait(1.0):
+					pass
+			else:
+				AttoDRYclock.wait(stop, options.duration)
+		finally:
+			poller.stop()
+	print('recorded %d snapshots of %d channels to %s' % (writer.records, len(poller.channels), options.path))
+
+
+def parser():
+	p = argparse.ArgumentParser(prog='attodry', description='Status, monitoring and scripted actions for the attoDRY')
+	p.add_argument('--model', type=int, default=1, choices=(0, 1, 2), help='setup version (0: 1100, 1: 2100, 2: 800)')
+	p.add_argument('--port', default='COM4', help='COM port of the attoDRY')
+	p.add_argument('--backend', default='dll', choices=('dll', 'sim'), help='attoDRYLib or the simulator')
+	p.add_argument('--dll-dir', help='directory of attoDRYLib.dll')
+	p.add_argument('--speed', type=float, default=1.0, help='simulator only: run the clock this many times faster')
+	p.add_argument('--cold', action='store_true', help='simulator only: start at base temperature')
+	p.add_argument('--timeout', type=float, default=60.0, help='seconds to wait for the initialisation')
+	commands = p.add_subparsers(dest='command', required=True)
+
+	c = commands.add_parser('status', help='live view of all channels')
+	c.add_argument('--interval', type=float, default=1.0, help='seconds between refreshes')
+	c.add_argument('--once', action='store_true', help='print one snapshot and exit')
+	c.set_defaults(run=status)
+
+	c = commands.add_parser('watch', help='print selected channels, one line per poll')
+	c.add_argument('channels', nargs='*', help='channels (getters) to print')
+	c.add_argument('--interval', type=float, default=1.0, help='seconds between polls')
+	c.add_argument('--count', type=int, default=0, help='exit after this many polls')
+	c.set_defaults(run=watch)
+
+	c = commands.add_parser('set', help='set the temperature or field and switch its control on')
+	c.add_argument('quantity', choices=sorted(setpoints))
+	c.add_argument('value', type=float, help='K or T')
+	c.add_argument('--wait', action='store_true', help='wait until the value is stable')
+	c.add_argument('--tolerance', type=float, help='K or T (default: 0.05 K, 0.001 T)')
+	c.add_argument('--stable', type=float, default=60.0, help='seconds the value has to stay within the tolerance')
+	c.add_argument('--interval', type=float, default=1.0, help='seconds between readings while waiting')
+	c.add_argument('--wait-timeout', type=float, default=4*3600.0, help='give up after this many seconds')
+	c.set_defaults(run=setpoint)
+
+	c = commands.add_parser('valve', help='open, close or toggle a valve')
+	c.add_argument('valve', choices=sorted(valves))
+	c.add_argument('action', choices=('open', 'close', 'toggle'))
+	c.set_defaults(run=valve)
+
+	c = commands.add_parser('record', help='record all channels to a binary telemetry file')
+	c.add_argument('path')
+	c.add_argument('--interval', type=float, default=1.0, help='seconds between snapshots')
+	c.add_argument('--duration', type=float, help='seconds to record (default: until Ctrl-C)')
+	c.set_defaults(run=record)
+	return p
+
+
+def main(argv=None):
+	options = parser().parse_args(argv)
+	session = None
+	try:
+		session = connect(options)
+		options.run(session, options)
+	except KeyboardInterrupt:
+		pass
+	except Exception as e:
+		print(e, file=sys.stderr)
+		return 1
+	finally:
+		if session is not None:
+			session.stop()
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
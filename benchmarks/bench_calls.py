@@ -0,0 +1,192 @@
+# Micro-benchmarks for the python layer (PyAttoDRY, AttoDRYlib, AttoDRYpoller).
+# The calls are timed against a stub backend whose functions only return 0, so the numbers show
+# the cost of the python code between the caller and the DLL, not of the LabVIEW runtime or of
+# the simulator's thermal model. The poller runs against the simulated backend (AttoDRYsim).
+# Measured are:
+# - the time per call of every AttoDRY getter/setter/toggle
+# - the overhead of checkError (the errcheck on every DLL function)
+# - snapshot throughput of Poller.pollOnce and the jitter of the polling thread
+# - the memory allocated per call
+# Results are written as JSON; with --compare they are checked against a stored baseline.
+#
+# usage:
+#	python benchmarks/bench_calls.py --save benchmarks/baseline.json
+#	python benchmarks/bench_calls.py --compare benchmarks/baseline.json
+
+import argparse
+import ctypes
+import inspect
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+
+import AttoDRYlib as ADRY
+import AttoDRYsim
+from AttoDRYpoller import Poller
+from PyAttoDRY import AttoDRY
+
+# not benchmarked: they change the connection or only describe the model
+skipped = ('begin', 'Connect', 'Disconnect', 'end', 'channels')
+
+# arguments used for the calls that need some
+arguments = {'savepath': 'bench.crv', 'loadpath': 'bench.crv'}
+
+
+class StubLib:
+	"""
+	Backend whose exported functions do nothing and return 0 (no error)
+	"""
+	def __getattr__(self, export):
+		if not export.startswith(AttoDRYsim.PREFIX):
+			raise AttributeError(export)
+		def func(*args):
+			return 0
+		func.__name__ = export
+		setattr(self, export, func)
+		return func
+
+
+def methods(setup_version):
+	"""
+	Returns name -> argument tuple of all AttoDRY methods that can be called on
+	<setup_version>
+	"""
+	calls = {}
+	for name, func in inspect.getmembers(AttoDRY, inspect.isfunction):
+		if name.startswith('_') or name in skipped or not ADRY.available(name):
+			continue
+		args = []
+		for parameter in list(inspect.signature(func).parameters.values())[1:]:
+			if parameter.default is not inspect.Parameter.empty:
+				break
+			args.append(arguments.get(parameter.name, 1))
+		calls[name] = tuple(args)
+	return calls
+
+
+def timeCall(func, args, number, repeat=5):
+	"""
+	Returns the best time per call in ns of <repeat> runs of <number> calls
+	"""
+	best = None
+	for i in range(repeat):
+		start = time.perf_counter_ns()
+		for j in range(number):
+			func(*args)
+		elapsed = (time.perf_counter_ns() - start)/number
+		best = elapsed if best is None else min(best, elapsed)
+	return best
+
+
+def allocated(func, args):
+	"""
+	Returns the peak memory in bytes allocated by a single call
+	"""
+	func(*args)
+	tracemalloc.start()
+	try:
+		before = tracemalloc.get_traced_memory()[0]
+		tracemalloc.reset_peak()
+		func(*args)
+		return tracemalloc.get_traced_memory()[1] - before
+	finally:
+		tracemalloc.stop()
+
+
+def jitter(dev, interval, polls):
+	"""
+	Runs a Poller for <polls> polls and returns the deviation of the polls from
+	the ideal schedule in microseconds
+	"""
+	stamps = []
+	poller = Poller(dev, interval=interval)
+	poller.subscribe(lambda snapshot: stamps.append(time.perf_counter()))
+	poller.start()
+	while len(stamps) < polls:
+		time.sleep(interval)
+	poller.stop()
+	periods = [1e6*(b - a - interval) for a, b in zip(stamps, stamps[1:])]
+	return {'mean_us': statistics.mean(periods), 'stdev_us': statistics.stdev(periods), 'max_us': max(abs(p) for p in periods)}
+
+
+def run(setup_version, number):
+	stub = StubLib()
+	ADRY.useBackend(stub)
+	dev = AttoDRY(setup_version)
+	dev.begin()
+	dev.Connect()
+	results = {'setup_version': setup_version, 'python': sys.version.split()[0], 'calls_ns': {}, 'alloc_bytes': {}}
+	for name, args in sorted(methods(setup_version).items()):
+		func = getattr(dev, name)
+		results['calls_ns'][name] = timeCall(func, args, number)
+		results['alloc_bytes'][name] = allocated(func, args)
+
+	# checkError on its own, and a DLL function with and without it
+	ref = ctypes.byref(ctypes.c_float())
+	raw = getattr(stub, 'AttoDRY_Interface_getSampleTemperature')
+	results['checkError_ns'] = timeCall(ADRY.checkError, (0, raw, ()), number)
+	results['raw_call_ns'] = timeCall(raw, (ref,), number)
+	results['checked_call_ns'] = timeCall(ADRY.getSampleTemperature, (ref,), number)
+	dev.Disconnect()
+	dev.end()
+
+	# snapshots and polling against the simulator, whose replies change like the device's
+	AttoDRYsim.install()
+	dev.begin()
+	dev.Connect()
+	poller = Poller(dev)
+	results['snapshot_channels'] = len(poller.channels)
+	results['snapshot_ns'] = timeCall(poller.pollOnce, (), max(1, number//10))
+	results['snapshots_per_s'] = 1e9/results['snapshot_ns']
+	results['poller_jitter'] = jitter(dev, 0.01, 200)
+
+	dev.Disconnect()
+	dev.end()
+	return results
+
+
+def compare(results, baseline, tolerance):
+	"""
+	Prints the calls that got slower than <tolerance> times the baseline and
+	returns their number
+	"""
+	regressions = 0
+	for name, ns in sorted(results['calls_ns'].items()):
+		before = baseline.get('calls_ns', {}).get(name)
+		if before and ns > tolerance*before:
+			print('%-50s %10.0f ns  (baseline %10.0f ns)' % (name, ns, before))
+			regressions += 1
+	for key in ('checkError_ns', 'checked_call_ns', 'snapshot_ns'):
+		if key in baseline and results[key] > tolerance*baseline[key]:
+			print('%-50s %10.0f ns  (baseline %10.0f ns)' % (key, results[key], baseline[key]))
+			regressions += 1
+	return regressions
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Micro-benchmarks of the python layer against a stub and the simulated backend')
+	parser.add_argument('--model', type=int, default=1, help='setup version (0: 1100, 1: 2100, 2: 800)')
+	parser.add_argument('--number', type=int, default=2000, help='calls per timing run')
+	parser.add_argument('--save', help='write the results to this JSON file')
+	parser.add_argument('--compare', help='compare against this JSON baseline')
+	parser.add_argument('--tolerance', type=float, default=1.25, help='allowed slowdown factor')
+	options = parser.parse_args()
+
+	results = run(options.model, options.number)
+	print('%d calls, median %.0f ns, checkError %.0f ns, snapshot of %d channels %.1f us, poller jitter %.0f us' % (
+		len(results['calls_ns']), statistics.median(results['calls_ns'].values()), results['checkError_ns'],
+		results['snapshot_channels'], results['snapshot_ns']/1e3, results['poller_jitter']['stdev_us']))
+	if options.save:
+		with open(options.save, 'w') as f:
+			json.dump(results, f, indent=1, sort_keys=True)
+	if options.compare:
+		with open(options.compare) as f:
+			baseline = json.load(f)
+		if compare(results, baseline, options.tolerance):
+			sys.exit(1)
@@ -0,0 +1,40 @@
+# Import-time benchmark for PyAttoDRY.
+# Every run imports PyAttoDRY in a fresh interpreter and reports the time spent in the
+# import itself. On Windows it additionally reports how long loading attoDRYLib (and with
+# it the LabVIEW runtime) takes, which is the cost that used to be paid at import.
+#
+# usage: python benchmarks/bench_import.py [runs]
+
+import os
+import statistics
+import subprocess
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT = 'import time; t = time.perf_counter(); import PyAttoDRY; print(time.perf_counter() - t)'
+LOAD = 'import time, AttoDRYlib; t = time.perf_counter(); AttoDRYlib.load(); print(time.perf_counter() - t)'
+
+
+def measure(code, runs):
+	"""
+	Runs <code> in <runs> fresh interpreters and returns the printed timings in seconds
+	"""
+	timings = []
+	for i in range(runs):
+		out = subprocess.run([sys.executable, '-c', code], cwd=root, check=True, capture_output=True, text=True)
+		timings.append(float(out.stdout.split()[-1]))
+	return timings
+
+
+def report(label, timings):
+	print('%-28s median %8.2f ms   min %8.2f ms   max %8.2f ms' % (label, 1e3*statistics.median(timings), 1e3*min(timings), 1e3*max(timings)))
+
+
+if __name__ == '__main__':
+	runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+	report('import PyAttoDRY', measure(IMPORT, runs))
+	if sys.platform == 'win32':
+		report('AttoDRYlib.load() (deferred)', measure(LOAD, runs))
+	else:
+		print('AttoDRYlib.load() is only measured on Windows')
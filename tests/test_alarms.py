@@ -0,0 +1,76 @@
+# every alarm rule is raised and cleared again; the error rule against the simulator
+
+import unittest
+
+import AttoDRYlib as ADRY
+import AttoDRYsim
+from AttoDRYalarms import AlarmEngine, RateOfChange, Threshold, ZScore
+from AttoDRYpoller import Poller, Snapshot
+from PyAttoDRY import AttoDRY
+
+
+def run(rule, values, interval=1.0):
+	"""
+	Returns the (index, raised) of the alarms of <rule> on one value per <interval> seconds
+	"""
+	engine = AlarmEngine([rule])
+	alarms = []
+	for i, value in enumerate(values):
+		alarms.extend((i, alarm.raised) for alarm in engine.process(Snapshot(i*interval, {rule.channel: value})))
+	return alarms
+
+
+class RuleTest(unittest.TestCase):
+
+	def test_threshold(self):
+		rule = Threshold('getPressure', above=1.0, below=0.001)
+		self.assertEqual(run(rule, [0.5, 2.0, 2.0, 0.5, 0.0001, 0.5]), [(1, True), (3, False), (4, True), (5, False)])
+
+	def test_rate_of_change(self):
+		# warms by 1 K/s for 20 s, then stays
+		values = [2.0 + min(i, 20) for i in range(60)]
+		alarms = run(RateOfChange('getSampleTemperature', above=0.5, tau=2.0), values)
+		self.assertEqual([raised for i, raised in alarms], [True, False])
+		self.assertLess(alarms[0][0], 5)
+		self.assertTrue(20 < alarms[1][0] < 25)
+
+	def test_z_score(self):
+		values = [2.0 + 0.01*(i % 3) for i in range(30)] + [3.0] + [2.0 + 0.01*(i % 3) for i in range(5)]
+		self.assertEqual(run(ZScore('getSampleTemperature', limit=5.0), values), [(30, True), (31, False)])
+
+	def test_nan_is_skipped(self):
+		rule = Threshold('getPressure', above=1.0)
+		self.assertEqual(run(rule, [2.0, float('nan'), 2.0, 0.5]), [(0, True), (3, False)])
+
+
+class SimulatorTest(unittest.TestCase):
+
+	def setUp(self):
+		self.sim = AttoDRYsim.install(state=dict(AttoDRYsim.cold))
+		self.dev = AttoDRY(1)
+		self.dev.begin()
+		self.dev.Connect()
+
+	def tearDown(self):
+		self.dev.Disconnect()
+		self.dev.end()
+		ADRY.useBackend(None)
+
+	def test_error_status(self):
+		engine = AlarmEngine([Threshold('getAttodryErrorStatus', above=0, name='attoDRY error')])
+		alarms = []
+		engine.subscribe(alarms.append)
+		poller = Poller(self.dev)
+		engine.attach(poller)
+		poller.pollOnce()
+		self.sim.state['errorStatus'] = 37
+		poller.pollOnce()
+		self.assertEqual(engine.active()[0].name, 'attoDRY error')
+		self.dev.lowerError()
+		poller.pollOnce()
+		self.assertEqual([(alarm.value, alarm.raised) for alarm in alarms], [(37, True), (0, False)])
+		self.assertEqual(engine.active(), [])
+
+
+if __name__ == '__main__':
+	unittest.main()
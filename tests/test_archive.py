@@ -0,0 +1,58 @@
+# Archive round trip and recovery of an archive whose writer was not closed
+
+import os
+import tempfile
+import unittest
+
+import AttoDRYarchive
+from AttoDRYpoller import Snapshot
+
+channels = ('getSampleTemperature', 'getMagneticField')
+
+
+def snapshot(i):
+	return Snapshot(1700000000.0 + i, {'getSampleTemperature': 1.8 + i*1e-3, 'getMagneticField': i % 7})
+
+
+class ArchiveTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.path = os.path.join(self.directory.name, 'run.adarc')
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def test_closed(self):
+		with AttoDRYarchive.ArchiveWriter(self.path, channels, blockRows=100) as w:
+			for i in range(250):
+				w.add(snapshot(i))
+		archive = AttoDRYarchive.Archive(self.path)
+		self.assertFalse(archive.recovered)
+		self.assertEqual(archive.rows, 250)
+		times, values = archive.read('getMagneticField', 1700000010.0, 1700000012.0)
+		self.assertEqual(list(values), [3.0, 4.0, 5.0])
+
+	def test_not_closed(self):
+		w = AttoDRYarchive.ArchiveWriter(self.path, channels, blockRows=100)
+		w.open()
+		for i in range(250):
+			w.add(snapshot(i))
+		# as after a crash: two blocks are on disk, the last 50 rows and the index are not
+		archive = AttoDRYarchive.Archive(self.path)
+		self.assertTrue(archive.recovered)
+		self.assertEqual(archive.channels, channels)
+		self.assertEqual(archive.rows, 200)
+		# the second block was only partly written
+		with open(self.path, 'r+b') as f:
+			f.truncate(os.path.getsize(self.path) - 1)
+		archive = AttoDRYarchive.Archive(self.path)
+		self.assertEqual(archive.rows, 100)
+		times, values = archive.read('getSampleTemperature')
+		self.assertEqual(len(values), 100)
+		self.assertAlmostEqual(values[-1], 1.8 + 99e-3)
+		w._file.close()
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,82 @@
+# numpy layouts of the channel registry and the telemetry files (skipped without numpy)
+
+import importlib.util
+import math
+import os
+import tempfile
+import unittest
+
+import AttoDRYchannels
+import AttoDRYlib as ADRY
+import AttoDRYtelemetry
+from AttoDRYpoller import Snapshot
+
+channels = ('getSampleTemperature', 'getAttodryErrorStatus', 'isPumping', 'notAChannel')
+
+snapshots = [
+	Snapshot(1700000000.0, {'getSampleTemperature': 1.9, 'getAttodryErrorStatus': 0, 'isPumping': 1, 'notAChannel': 7.5}),
+	Snapshot(1700000001.0, {'getSampleTemperature': math.nan, 'getAttodryErrorStatus': 32, 'isPumping': 0}),
+]
+
+
+class RegistryTest(unittest.TestCase):
+
+	def test_from_functions(self):
+		for channel in AttoDRYchannels.registry:
+			self.assertEqual((channel.symbol, channel.models), ADRY.functions[channel.name])
+
+	def test_metrics(self):
+		# a metric name is shared by channels of different models, never within one model
+		for setup_version, model in ADRY.models.items():
+			metrics = [channel.metric for channel in AttoDRYchannels.registry if setup_version in channel.models]
+			self.assertEqual(len(metrics), len(set(metrics)), model)
+
+	def test_names(self):
+		names = AttoDRYchannels.names(ADRY.ATTODRY800)
+		self.assertIn('getPressure800', names)
+		self.assertNotIn('getPressure', names)
+
+
+@unittest.skipUnless(importlib.util.find_spec('numpy') is not None, 'needs numpy')
+class NumpyTest(unittest.TestCase):
+
+	def test_dtype(self):
+		import numpy
+		native = AttoDRYchannels.dtype(channels)
+		self.assertEqual(native.names, ('time',) + channels)
+		self.assertEqual(native['time'], numpy.dtype('<f8'))
+		self.assertEqual(native['getSampleTemperature'], numpy.dtype('<f4'))
+		self.assertEqual(native['getAttodryErrorStatus'], numpy.dtype('<i4'))
+		self.assertEqual(native['notAChannel'], numpy.dtype('<f8'))
+		stored = AttoDRYchannels.dtype(channels, native=False)
+		self.assertEqual(stored.itemsize, 8*(len(channels) + 1))
+
+	def test_records(self):
+		records = AttoDRYchannels.records(snapshots, channels)
+		self.assertEqual(list(records['time']), [s.time for s in snapshots])
+		self.assertEqual(records['getSampleTemperature'][0], 1.9)
+		self.assertTrue(math.isnan(records['getSampleTemperature'][1]))
+		self.assertEqual(list(records['getAttodryErrorStatus']), [0, 32])
+		self.assertTrue(math.isnan(records['notAChannel'][1]))
+
+	def test_telemetry_array(self):
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'run.adtel')
+			with AttoDRYtelemetry.Writer(path, channels, setup_version=ADRY.ATTODRY2100) as w:
+				for snapshot in snapshots:
+					w.write(snapshot)
+			# a record that was only partly written is not mapped
+			with open(path, 'ab') as f:
+				f.write(b'\0'*5)
+			records = AttoDRYtelemetry.array(path)
+			self.assertEqual(len(records), len(snapshots))
+			for record, snapshot in zip(records, AttoDRYtelemetry.read(path)[1]):
+				self.assertEqual(record['time'], snapshot.time)
+				for name in channels:
+					a, b = record[name], snapshot.values[name]
+					self.assertTrue(a == b or (math.isnan(a) and math.isnan(b)))
+			del records
+
+
+if __name__ == '__main__':
+	unittest.main()
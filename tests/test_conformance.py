@@ -0,0 +1,18 @@
+# every AttoDRY wrapper calls its DLL function correctly on every model (AttoDRYconformance)
+
+import unittest
+
+import AttoDRYlib as ADRY
+from AttoDRYconformance import check
+
+
+class ConformanceTest(unittest.TestCase):
+
+	def test_models(self):
+		for setup_version, model in sorted(ADRY.models.items()):
+			with self.subTest(model=model):
+				self.assertEqual(check(setup_version), [])
+
+
+if __name__ == '__main__':
+	unittest.main()
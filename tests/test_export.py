@@ -0,0 +1,80 @@
+# Round trip telemetry file -> Parquet / HDF5 (skipped without pyarrow or h5py)
+
+import importlib.util
+import json
+import math
+import os
+import tempfile
+import unittest
+
+import AttoDRYexport
+import AttoDRYlib as ADRY
+import AttoDRYtelemetry
+from AttoDRYpoller import Snapshot
+
+channels = ('getSampleTemperature', 'getAttodryErrorStatus', 'isPumping', 'GetTurbopumpFrequ800')
+
+snapshots = [
+	Snapshot(1700000000.0, {'getSampleTemperature': 1.9, 'getAttodryErrorStatus': 0, 'isPumping': 1, 'GetTurbopumpFrequ800': 1500.0}),
+	Snapshot(1700000001.5, {'getSampleTemperature': math.nan, 'getAttodryErrorStatus': 32, 'isPumping': 0, 'GetTurbopumpFrequ800': 1499.5}),
+]
+
+
+def available(module):
+	return importlib.util.find_spec(module) is not None
+
+
+class TelemetryExportTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.source = os.path.join(self.directory.name, 'run.adtel')
+		# recorded on an attoDRY800 while no model (or another one) is selected in this process
+		self.previous, ADRY.model = ADRY.model, ADRY.ATTODRY2100
+		with AttoDRYtelemetry.Writer(self.source, channels, setup_version=ADRY.ATTODRY800) as w:
+			for snapshot in snapshots:
+				w.write(snapshot)
+
+	def tearDown(self):
+		ADRY.model = self.previous
+		self.directory.cleanup()
+
+	def test_header(self):
+		with open(self.source, 'rb') as f:
+			header = AttoDRYtelemetry.header(f)
+		self.assertEqual(header.channels, channels)
+		self.assertEqual(header.setup_version, ADRY.ATTODRY800)
+
+	@unittest.skipUnless(available('pyarrow'), 'needs pyarrow')
+	def test_parquet(self):
+		import pyarrow.parquet
+		destination = os.path.join(self.directory.name, 'run.parquet')
+		self.assertEqual(AttoDRYexport.exportTelemetry(self.source, destination), 2)
+		table = pyarrow.parquet.read_table(destination)
+		meta = json.loads(table.schema.metadata[b'attodry'])
+		self.assertEqual(meta['model'], 'attoDRY800')
+		self.assertEqual(meta['units']['getSampleTemperature'], 'K')
+		columns = table.to_pydict()
+		self.assertEqual(columns['getSampleTemperature'], [1.9, None])
+		self.assertEqual(columns['getAttodryErrorStatus'], [0, 32])
+		self.assertEqual(columns['isPumping'], [True, False])
+		self.assertEqual([t.timestamp() for t in columns['time']], [s.time for s in snapshots])
+
+	@unittest.skipUnless(available('h5py'), 'needs h5py')
+	def test_hdf5(self):
+		import h5py
+		destination = os.path.join(self.directory.name, 'run.h5')
+		self.assertEqual(AttoDRYexport.exportTelemetry(self.source, destination), 2)
+		with h5py.File(destination, 'r') as f:
+			self.assertEqual(f.attrs['model'], 'attoDRY800')
+			self.assertEqual(list(f['time'][:]), [s.time for s in snapshots])
+			T = f['getSampleTemperature'][:]
+			self.assertEqual(T[0], 1.9)
+			self.assertTrue(math.isnan(T[1]))
+			self.assertEqual(list(f['getAttodryErrorStatus'][:]), [0, 32])
+			self.assertEqual(list(f['isPumping'][:]), [1, 0])
+			self.assertEqual(f['getSampleTemperature'].attrs['unit'], 'K')
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,83 @@
+# set points and WebSocket frames of the gateway, with a Session on the simulator
+
+import base64
+import http.client
+import json
+import os
+import socket
+import unittest
+
+import AttoDRYlib as ADRY
+import AttoDRYsim
+from AttoDRYgateway import Gateway
+from AttoDRYpoller import Poller
+from AttoDRYsession import Session
+
+
+class GatewayTest(unittest.TestCase):
+
+	def setUp(self):
+		self.sim = AttoDRYsim.install(state=dict(AttoDRYsim.cold))
+		self.session = Session()
+		self.session.start()
+		self.poller = Poller(self.session.dev, gate=self.session.ready)
+		self.poller.pollOnce()
+		self.gateway = Gateway(self.session, self.poller, port=0, host='127.0.0.1', token='secret')
+		self.gateway.start()
+		self.port = self.gateway.httpd.server_address[1]
+
+	def tearDown(self):
+		self.gateway.stop()
+		self.session.stop()
+		ADRY.useBackend(None)
+
+	def post(self, quantity, body, headers):
+		connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=10)
+		try:
+			connection.request('POST', '/setpoint/'+quantity, body, headers)
+			return connection.getresponse().status
+		finally:
+			connection.close()
+
+	def test_token(self):
+		body = json.dumps({'value': 4.2})
+		self.assertEqual(self.post('temperature', body, {}), 401)
+		self.assertEqual(self.post('temperature', body, {'Authorization': 'Bearer wrong'}), 401)
+		self.assertEqual(self.sim.state['userTemperature'], AttoDRYsim.defaults['userTemperature'])
+		self.assertEqual(self.post('temperature', body, {'Authorization': 'Bearer secret'}), 200)
+		self.assertAlmostEqual(self.sim.state['userTemperature'], 4.2, places=5)
+
+	def test_bad_requests(self):
+		authorization = {'Authorization': 'Bearer secret'}
+		for value in ('NaN', 'Infinity', '1000'):
+			self.assertEqual(self.post('temperature', '{"value": '+value+'}', authorization), 400)
+		for length in ('-1', 'abc', '100000'):
+			self.assertEqual(self.post('field', '{"value": 0.1}', dict(authorization, **{'Content-Length': length})), 400)
+		self.assertEqual(self.sim.state['magneticFieldSetPoint'], 0.0)
+
+	def test_unmasked_frame(self):
+		with socket.create_connection(('127.0.0.1', self.port), timeout=10) as s:
+			key = base64.b64encode(os.urandom(16)).decode('ascii')
+			s.sendall(('GET /stream HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+				'Sec-WebSocket-Key: '+key+'\r\nSec-WebSocket-Version: 13\r\n\r\n').encode('ascii'))
+			f = s.makefile('rb')
+			self.assertIn(b' 101 ', f.readline())
+			while f.readline() not in (b'\r\n', b''):
+				pass
+			s.sendall(b'\x89\x00')	# a ping without a mask
+			frames = []
+			while True:
+				header = f.read(2)
+				if len(header) < 2:
+					break
+				n = header[1] & 0x7f
+				if n == 126:
+					n = int.from_bytes(f.read(2), 'big')
+				frames.append((header[0] & 0x0f, f.read(n)))
+				if frames[-1][0] == 0x8:
+					break
+			self.assertEqual(frames[-1], (0x8, b'\x03\xea'))
+
+
+if __name__ == '__main__':
+	unittest.main()
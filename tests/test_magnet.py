@@ -0,0 +1,70 @@
+# order of the DLL calls of the field changes and the time budget, against the simulator
+
+import unittest
+
+import AttoDRYclock
+import AttoDRYlib as ADRY
+import AttoDRYsim
+from AttoDRYmagnet import Magnet
+from PyAttoDRY import AttoDRY
+
+# the calls that change the magnet
+commands = ('setUserMagneticField', 'togglePersistentMode', 'toggleMagneticFieldControl', 'sweepFieldToZero')
+
+
+class MagnetTest(unittest.TestCase):
+
+	def setUp(self):
+		AttoDRYclock.setClock(AttoDRYclock.VirtualClock(1000))
+		self.sim = AttoDRYsim.install(state=dict(AttoDRYsim.cold))
+		# (command, field when it was sent)
+		self.calls = []
+		ADRY.addHook(self.hook)
+		self.dev = AttoDRY(1)
+		self.dev.begin()
+		self.dev.Connect()
+		self.magnet = Magnet(self.dev, interval=1.0, stable=5.0, switchTime=10.0)
+
+	def tearDown(self):
+		self.dev.Disconnect()
+		self.dev.end()
+		ADRY.removeHook(self.hook)
+		ADRY.useBackend(None)
+		AttoDRYclock.setClock(AttoDRYclock.RealClock())
+
+	def hook(self, name, export, func):
+		if name not in commands:
+			return func
+		def recorded(*args):
+			self.calls.append((name, self.sim.state['magneticField']))
+			return func(*args)
+		return recorded
+
+	def test_set_field(self):
+		self.assertAlmostEqual(self.magnet.setField(0.2, persistent=True, timeout=600), 0.2, places=3)
+		self.assertEqual([name for name, field in self.calls], ['setUserMagneticField', 'togglePersistentMode', 'toggleMagneticFieldControl'])
+		self.assertEqual([step for step, seconds in self.magnet.steps], ['persistent mode on', 'field control on', 'the set point', 'the ramp', 'the persistent switch'])
+		self.assertEqual(self.sim.state['persistentMode'], 1)
+
+	def test_leave_persistent(self):
+		self.magnet.setField(0.2, persistent=True, timeout=600)
+		# the supply was ramped down after the switch closed
+		self.dev.setUserMagneticField(0.0)
+		self.sim.state['magneticField'] = 0.0
+		self.calls = []
+		self.magnet.leavePersistent(0.2, timeout=600)
+		self.assertEqual([name for name, field in self.calls], ['setUserMagneticField', 'togglePersistentMode'])
+		# the persistent flag is only cleared once the supply is at the persistent field
+		self.assertAlmostEqual(self.calls[1][1], 0.2, places=3)
+		self.assertEqual([step for step, seconds in self.magnet.steps], ['the set point', 'the ramp', 'persistent mode off', 'the persistent switch'])
+		self.assertEqual(self.sim.state['persistentMode'], 0)
+
+	def test_timeout(self):
+		# 0.01 T/s: 5 T cannot be reached in 60 s
+		with self.assertRaises(Exception) as raised:
+			self.magnet.setField(5.0, timeout=60)
+		self.assertIn('did not reach 5.0 T within the time budget', str(raised.exception))
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,59 @@
+# the CostModel learns the ramp rates from synthetic changes
+
+import os
+import tempfile
+import unittest
+
+from AttoDRYmap import CostModel
+
+# kind -> (quantity, offset in s, seconds per K or T) of the synthetic cryostat
+laws = {
+	'warm': ('temperature', 60.0, 20.0),
+	'cool': ('temperature', 300.0, 100.0),
+	'field': ('field', 5.0, 50.0),
+}
+
+
+def learned():
+	cost = CostModel(persistentOverhead=30.0)
+	for i in range(200):
+		change = 0.05*(1 + i % 20)
+		for kind, (quantity, offset, slope) in laws.items():
+			start, end = (2.0, 2.0 + 10*change) if kind == 'warm' else (2.0 + 10*change, 2.0) if kind == 'cool' else (0.0, change)
+			cost.observe(quantity, start, end, offset + slope*abs(end - start))
+	return cost
+
+
+class CostModelTest(unittest.TestCase):
+
+	def test_defaults(self):
+		cost = CostModel()
+		for kind, (offset, rate, change) in CostModel.defaults.items():
+			coefficients = cost.coefficients(kind)
+			self.assertAlmostEqual(coefficients[0], offset, places=6)
+			self.assertAlmostEqual(coefficients[1], 1/rate, places=6)
+
+	def test_fit(self):
+		# the two changes of the default model are outweighed by the observations
+		cost = learned()
+		for kind, (quantity, offset, slope) in laws.items():
+			coefficients = cost.coefficients(kind)
+			self.assertAlmostEqual(coefficients[0], offset, delta=max(0.05*offset, 1.0))
+			self.assertAlmostEqual(coefficients[1], slope, delta=0.05*slope)
+		self.assertAlmostEqual(cost.cost('temperature', 2.0, 12.0), 60.0 + 20.0*10, delta=10.0)
+		self.assertAlmostEqual(cost.cost('field', 0.0, 1.0, persistent=True) - cost.cost('field', 0.0, 1.0), 30.0)
+		self.assertEqual(cost.cost('temperature', 5.0, 5.0), 0.0)
+
+	def test_save(self):
+		cost = learned()
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'cost.json')
+			cost.save(path)
+			loaded = CostModel.load(path)
+		self.assertEqual(loaded.persistentOverhead, 30.0)
+		for kind in laws:
+			self.assertEqual(loaded.coefficients(kind), cost.coefficients(kind))
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,57 @@
+# the message getters call their own DLL functions; MessageFeed only reports changes
+
+import unittest
+
+import AttoDRYlib as ADRY
+import AttoDRYsim
+from AttoDRYmessages import MessageFeed
+from PyAttoDRY import AttoDRY
+
+
+class MessagesTest(unittest.TestCase):
+
+	def setUp(self):
+		self.sim = AttoDRYsim.install(state=dict(AttoDRYsim.cold, actionMessage='Cooling down', errorMessage='Pump error'))
+		self.exports = []
+		ADRY.addHook(self.hook)
+		self.dev = AttoDRY(1)
+		self.dev.begin()
+		self.dev.Connect()
+
+	def tearDown(self):
+		self.dev.Disconnect()
+		self.dev.end()
+		ADRY.removeHook(self.hook)
+		ADRY.useBackend(None)
+
+	def hook(self, name, export, func):
+		def recorded(*args):
+			self.exports.append(export)
+			return func(*args)
+		return recorded
+
+	def test_getters(self):
+		self.assertEqual(self.dev.getActionMessage(), 'Cooling down')
+		self.assertEqual(self.exports[-1], 'AttoDRY_Interface_getActionMessage')
+		self.assertEqual(self.dev.getAttodryErrorMessage(), 'Pump error')
+		self.assertEqual(self.exports[-1], 'AttoDRY_Interface_getAttodryErrorMessage')
+
+	def test_feed(self):
+		feed = MessageFeed(self.dev)
+		events = []
+		feed.subscribe(events.append)
+		feed.pollOnce(1.0)
+		feed.pollOnce(2.0)
+		self.sim.state['actionMessage'] = ''
+		feed.pollOnce(3.0)
+		self.assertEqual([(e.time, e.kind, e.text, e.previous) for e in events], [
+			(1.0, 'action', 'Cooling down', ''),
+			(1.0, 'error', 'Pump error', ''),
+			(3.0, 'action', '', 'Cooling down'),
+		])
+		self.assertEqual(feed.since(2.0), events[2:])
+		self.assertEqual(feed.message('error'), 'Pump error')
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,68 @@
+# RampPredictor fits the settle times of synthetic changes, with and without numpy
+
+import importlib.util
+import math
+import sys
+import unittest
+from unittest import mock
+
+import AttoDRYpredict
+from AttoDRYpoller import Snapshot
+from AttoDRYpredict import RampPredictor
+
+
+def seconds(start, end):
+	# settle time of a temperature change of the synthetic cryostat
+	return 100.0 + 30.0*abs(end - start) + 200.0*abs(math.log(end/start))
+
+
+def changes():
+	for start in (1.8, 2.5, 3.0, 4.0):
+		for end in (6.0, 8.0, 12.0, 15.0, 19.0):
+			yield start, end
+
+
+class PredictorTest(unittest.TestCase):
+
+	def check(self):
+		p = RampPredictor()
+		for start, end in changes():
+			p.observe('temperature', start, end, seconds(start, end))
+		p.observe('field', 0.0, 1.0, 110.0)
+		p.observe('field', 0.0, 0.5, 60.0)
+		p.observe('field', 1.0, -1.0, 210.0)
+		self.assertAlmostEqual(p.predict_settle_time(2.0, 10.0), seconds(2.0, 10.0), places=3)
+		self.assertAlmostEqual(p.predict_settle_time(0.0, 2.0, 'field'), 210.0, places=3)
+		self.assertEqual(p.predict_settle_time(5.0, 5.0), 0.0)
+		# an exact fit: the timeout only adds the minimum margin
+		self.assertAlmostEqual(p.timeout(2.0, 10.0), seconds(2.0, 10.0) + 60.0, places=3)
+		# nothing was observed for cooling: the CostModel defaults are used
+		self.assertEqual(p.predict_settle_time(10.0, 2.0), p.fallback.cost('temperature', 10.0, 2.0))
+
+	@unittest.skipUnless(importlib.util.find_spec('numpy') is not None, 'needs numpy')
+	def test_numpy(self):
+		self.check()
+
+	def test_python(self):
+		with mock.patch.dict(sys.modules, {'numpy': None}):
+			self.check()
+
+	def test_fit_snapshots(self):
+		# the set point goes from 2 K to 10 K at t = 100 s; the sample follows with a 60 s time constant
+		snapshots = []
+		for i in range(200):
+			t = 10.0*i
+			setpoint = 2.0 if t < 100 else 10.0
+			reading = 2.0 if t < 100 else 10.0 - 8.0*math.exp(-(t - 100)/60.0)
+			snapshots.append(Snapshot(t, {'getUserTemperature': setpoint, 'getSampleTemperature': reading}))
+		p = RampPredictor()
+		self.assertEqual(p.fit(snapshots), 1)
+		quantity, start, end, duration = p.changes[0]
+		self.assertEqual((quantity, start, end), ('temperature', 2.0, 10.0))
+		# within 0.05 K after 60 s ln(8/0.05) = 305 s, measured from the middle of the poll interval
+		self.assertTrue(300 <= duration <= 320, duration)
+		self.assertEqual(AttoDRYpredict.group('temperature', start, end), ('warm', 1))
+
+
+if __name__ == '__main__':
+	unittest.main()
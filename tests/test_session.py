@@ -0,0 +1,53 @@
+# Session against the simulator: retries after lost connections and replies, cleanup of a failed start
+
+import threading
+import unittest
+
+import AttoDRYlib as ADRY
+import AttoDRYsim
+from AttoDRYsession import Session
+from PyAttoDRY import AttoDRY
+
+
+class SessionTest(unittest.TestCase):
+
+	def tearDown(self):
+		ADRY.useBackend(None)
+
+	def test_retry(self):
+		faults = AttoDRYsim.Faults(seed=1, dropRate=0.05, lostReplyRate=0.05)
+		sim = AttoDRYsim.install(state=dict(AttoDRYsim.cold), faults=faults)
+		with Session(watchdogInterval=0.05) as s:
+			for i in range(100):
+				self.assertAlmostEqual(s.call('getSampleTemperature', timeout=10.0), 2.3, places=1)
+			self.assertGreater(s.reconnects, 0)
+		kinds = set(kind for t, kind, detail in faults.events)
+		self.assertIn('drop', kinds)
+		self.assertIn('lost', kinds)
+		self.assertFalse(sim.running)
+
+	def test_toggle_not_resent(self):
+		# the toggle is executed, then its reply is lost: it fails and is not sent again
+		faults = AttoDRYsim.Faults(seed=1)
+		sim = AttoDRYsim.install(state=dict(AttoDRYsim.cold), faults=faults)
+		with Session(watchdogInterval=0.05) as s:
+			faults.lostReplyRate = 1.0
+			with self.assertRaises(Exception):
+				s.call('toggleMagneticFieldControl', timeout=10.0)
+			faults.lostReplyRate = 0.0
+			self.assertEqual(s.call('isControllingField', timeout=10.0), 1)
+			self.assertEqual(sim.state['controllingField'], 1)
+
+	def test_stopped_while_connecting(self):
+		sim = AttoDRYsim.install(initDelay=60.0)
+		s = Session(timeout=120.0)
+		threading.Timer(0.2, s._stop.set).start()
+		with self.assertRaises(Exception):
+			s.start()
+		self.assertIsNone(AttoDRY.running)
+		self.assertFalse(sim.running)
+		self.assertFalse(sim.connected)
+
+
+if __name__ == '__main__':
+	unittest.main()
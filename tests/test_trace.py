@@ -0,0 +1,60 @@
+# a session against the simulator is recorded and replayed with ReplayLib
+
+import os
+import tempfile
+import unittest
+
+import AttoDRYlib as ADRY
+import AttoDRYsim
+import AttoDRYtrace
+from PyAttoDRY import AttoDRY
+
+
+def session(dev):
+	# the calls that are recorded and replayed
+	dev.begin()
+	dev.Connect()
+	dev.setUserTemperature(4.2)
+	values = [dev.getSampleTemperature(), dev.getUserTemperature(), dev.isSystemRunning(), dev.getActionMessage()]
+	dev.Disconnect()
+	dev.end()
+	return values
+
+
+class TraceTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.path = os.path.join(self.directory.name, 'session.adtrace')
+		AttoDRYsim.install(state=dict(AttoDRYsim.cold, actionMessage='Cooling down'))
+		with AttoDRYtrace.Recorder(self.path) as recorder:
+			self.values = session(AttoDRY(1))
+		self.calls = recorder.calls
+
+	def tearDown(self):
+		ADRY.useBackend(None)
+		self.directory.cleanup()
+
+	def test_replay(self):
+		t0, calls = AttoDRYtrace.read(self.path)
+		self.assertEqual(len(calls), self.calls)
+		self.assertEqual(calls[0].export, 'AttoDRY_Interface_begin')
+		lib = AttoDRYtrace.install(self.path)
+		self.assertEqual(session(AttoDRY(1)), self.values)
+		self.assertAlmostEqual(self.values[1], 4.2, places=5)
+		self.assertEqual(self.values[2:], [1, 'Cooling down'])
+		with self.assertRaises(Exception):
+			lib.AttoDRY_Interface_begin(1)
+
+	def test_truncated(self):
+		# a trace that was not closed ends with a partly written record
+		with open(self.path, 'rb') as f:
+			data = f.read()
+		with open(self.path, 'wb') as f:
+			f.write(data[:-3])
+		t0, calls = AttoDRYtrace.read(self.path)
+		self.assertEqual(len(calls), self.calls - 1)
+
+
+if __name__ == '__main__':
+	unittest.main()